@@ -0,0 +1,424 @@
+"""Headless rerun benchmark for App.py.
+
+Runs the app script in-process against a recording stand-in for the
+``streamlit`` module, replays a scripted sequence of interactions (switching
+views, answering quizzes, changing playground datasets, ...) and reports the
+wall time, view and peak allocation of every rerun as JSON.  Module-level
+caches persist between reruns exactly as they do in a real worker, so the
+numbers include warm-cache behaviour.
+
+    python benchmarks/rerun_bench.py --repeat 3 --output bench.json
+    python benchmarks/rerun_bench.py --scenario my_steps.json
+
+A scenario is a JSON list of steps, each one interaction followed by a rerun:
+
+    {"set": {"active_view": "Learning Hub"}}   set widgets by key or label
+    {"click": "quiz_excel_basics"}             click a button by key or label
+    {"label": "initial load"}                  just rerun
+
+Values set on radios and selectboxes match an option exactly or, failing that,
+the first option containing the given text.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import runpy
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_APP = os.path.join(REPO_ROOT, 'App.py')
+MAX_RERUNS_PER_STEP = 5
+
+DEFAULT_SCENARIO = [
+    {'label': 'initial load'},
+    {'set': {'active_view': 'Learning Hub'}},
+    {'click': 'quiz_excel_basics'},
+    {'set': {'q_excel_basics_0': 'Ctrl+Shift+Space'}},
+    {'set': {'q_excel_basics_1': 'Both 1 and 3'}},
+    {'set': {'q_excel_basics_2': 'Flash Fill'}},
+    {'click': 'complete_excel_basics_0'},
+    {'set': {'module_select': 'excel_formulas'}},
+    {'set': {'active_view': 'Practice Lab'}},
+    {'set': {'Choose a sample dataset:': 'HR Analytics'}},
+    {'set': {'Choose a sample dataset:': 'Financial Data'}},
+    {'set': {'Rows:': 100_000}},
+    {'set': {'dax_measure_Financial Data': "Revenue YoY = DIVIDE(CALCULATE(SUM('Financial Data'[Actual]), "
+                                           "'Financial Data'[Account] = \"Revenue\"), CALCULATE(SUM("
+                                           "'Financial Data'[Actual]), SAMEPERIODLASTYEAR('Financial Data'[Date])))"}},
+    {'set': {'show_visual': True}},
+    {'set': {'visual_kind': 'Heatmap'}},
+    {'set': {'active_view': 'Progress Analytics'}},
+    {'set': {'active_view': 'Dashboard'}},
+]
+
+
+class RerunRequested(Exception):
+    pass
+
+
+class SessionState(dict):
+    """dict with attribute access, like st.session_state."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        del self[name]
+
+
+class Recorder:
+    """Widget values, pending clicks and per-run element counts."""
+
+    def __init__(self, serialize_charts=True):
+        self.session_state = SessionState()
+        self.query_params = {}
+        self.widgets = {}       # unkeyed widgets, by label
+        self.requested = {}     # values set by the scenario, resolved at widget call
+        self.callbacks = {}     # widget id -> (callback, args) from the last run
+        self.clicked = None
+        self.elements = 0
+        self.serialize_charts = serialize_charts
+
+    def widget_id(self, label, key):
+        return key if key is not None else label
+
+    def current(self, label, key, default):
+        wid = self.widget_id(label, key)
+        if key is not None:
+            return self.session_state.get(key, default)
+        return self.widgets.get(wid, default)
+
+    def store(self, label, key, value):
+        if key is not None:
+            self.session_state[key] = value
+        else:
+            self.widgets[label] = value
+        return value
+
+    def apply(self, step):
+        """Stage one scenario step; callbacks run before the rerun, as in Streamlit."""
+        self.clicked = step.get('click')
+        for wid, value in step.get('set', {}).items():
+            self.requested[wid] = value
+            callback = self.callbacks.get(wid)
+            if callback is not None:
+                self.session_state[wid] = value
+                fn, args = callback
+                fn(*args)
+
+
+def _resolve(options, wanted):
+    options = list(options)
+    if wanted in options:
+        return wanted
+    for option in options:
+        if isinstance(wanted, str) and wanted in str(option):
+            return option
+    return None
+
+
+class Container:
+    """Anything elements can be written into: the page, columns, sidebar, expanders."""
+
+    def __init__(self, recorder):
+        self._rec = recorder
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _element(self, *args, **kwargs):
+        self._rec.elements += 1
+
+    markdown = write = caption = info = success = warning = error = _element
+    metric = progress = video = balloons = json = code = _element
+    title = header = subheader = text = divider = _element
+
+    def data_editor(self, data, *args, **kwargs):
+        # Returned unedited: the scenario has no way to type into cells
+        self._rec.elements += 1
+        return data
+
+    def dataframe(self, data=None, *args, **kwargs):
+        self._rec.elements += 1
+
+    def plotly_chart(self, figure, *args, **kwargs):
+        self._rec.elements += 1
+        if self._rec.serialize_charts:
+            # Streamlit serializes every chart it sends to the browser
+            figure.to_json()
+
+    def columns(self, spec, **kwargs):
+        n = spec if isinstance(spec, int) else len(spec)
+        return [Container(self._rec) for _ in range(n)]
+
+    def tabs(self, labels):
+        return [Container(self._rec) for _ in labels]
+
+    def expander(self, *args, **kwargs):
+        return Container(self._rec)
+
+    def container(self, *args, **kwargs):
+        return Container(self._rec)
+
+    def spinner(self, *args, **kwargs):
+        return Container(self._rec)
+
+    def empty(self):
+        return Container(self._rec)
+
+    def _choice(self, label, options, index, key, format_func=None, on_change=None, args=()):
+        rec = self._rec
+        rec.elements += 1
+        options = list(options)
+        wid = rec.widget_id(label, key)
+        if on_change is not None:
+            rec.callbacks[wid] = (on_change, tuple(args or ()))
+        default = options[index] if index is not None and options else None
+        value = rec.current(label, key, default)
+        if wid in rec.requested:
+            resolved = _resolve(options, rec.requested.pop(wid))
+            if resolved is not None:
+                value = resolved
+        if value not in options:
+            value = default
+        return rec.store(label, key, value)
+
+    def selectbox(self, label, options, index=0, format_func=None, key=None, on_change=None,
+                  args=(), **kwargs):
+        return self._choice(label, options, index, key, format_func, on_change, args)
+
+    def radio(self, label, options, index=0, format_func=None, key=None, on_change=None,
+              args=(), **kwargs):
+        return self._choice(label, options, index, key, format_func, on_change, args)
+
+    def _value(self, label, key, default, on_change=None, args=()):
+        rec = self._rec
+        rec.elements += 1
+        wid = rec.widget_id(label, key)
+        if on_change is not None:
+            rec.callbacks[wid] = (on_change, tuple(args or ()))
+        value = rec.requested.pop(wid, rec.current(label, key, default))
+        return rec.store(label, key, value)
+
+    def number_input(self, label, min_value=None, max_value=None, value=0, step=None, key=None,
+                     on_change=None, args=(), **kwargs):
+        return self._value(label, key, value, on_change, args)
+
+    def text_input(self, label, value='', key=None, on_change=None, args=(), **kwargs):
+        return self._value(label, key, value, on_change, args)
+
+    text_area = text_input
+
+    def slider(self, label, min_value=None, max_value=None, value=None, key=None, on_change=None,
+               args=(), **kwargs):
+        return self._value(label, key, value, on_change, args)
+
+    def multiselect(self, label, options, default=None, key=None, on_change=None, args=(), **kwargs):
+        return self._value(label, key, list(default or []), on_change, args)
+
+    def checkbox(self, label, value=False, key=None, on_change=None, args=(), **kwargs):
+        return self._value(label, key, value, on_change, args)
+
+    def file_uploader(self, label, *args, key=None, **kwargs):
+        self._rec.elements += 1
+        return None
+
+    def button(self, label, key=None, on_click=None, args=(), **kwargs):
+        rec = self._rec
+        rec.elements += 1
+        clicked = rec.clicked is not None and rec.clicked == rec.widget_id(label, key)
+        if clicked:
+            rec.clicked = None
+            if on_click is not None:
+                on_click(*(args or ()))
+        return clicked
+
+    def download_button(self, label, data=None, *args, **kwargs):
+        self._rec.elements += 1
+        return False
+
+    def fragment(self, func=None, *, run_every=None, **kwargs):
+        # Fragments only rerun on their own in a browser; here they run with the page
+        if func is None:
+            return lambda f: f
+        return func
+
+
+def make_streamlit(recorder):
+    """Build the stand-in ``streamlit`` module around ``recorder``."""
+    page = Container(recorder)
+    st = types.ModuleType('streamlit')
+    for name in dir(Container):
+        if not name.startswith('_'):
+            setattr(st, name, getattr(page, name))
+    st.sidebar = Container(recorder)
+    st.session_state = recorder.session_state
+    st.query_params = recorder.query_params
+    st.set_page_config = lambda *args, **kwargs: None
+
+    def rerun():
+        raise RerunRequested()
+
+    st.rerun = rerun
+    st.experimental_rerun = rerun
+    return st
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _stats(values):
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values), 3) if values else None,
+        'p50_ms': round(_percentile(values, 50), 3) if values else None,
+        'p95_ms': round(_percentile(values, 95), 3) if values else None,
+        'max_ms': round(max(values), 3) if values else None,
+    }
+
+
+def run_benchmark(app_path=DEFAULT_APP, scenario=DEFAULT_SCENARIO, repeat=1, trace_memory=True,
+                  serialize_charts=True):
+    app_path = os.path.abspath(app_path)
+    app_dir = os.path.dirname(app_path)
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+
+    recorder = Recorder(serialize_charts=serialize_charts)
+    previous_streamlit = sys.modules.get('streamlit')
+    sys.modules['streamlit'] = make_streamlit(recorder)
+    reruns = []
+    errors = 0
+    try:
+        for iteration in range(repeat):
+            for step_no, step in enumerate(scenario):
+                recorder.apply(step)
+                action = step.get('label') or json.dumps({k: v for k, v in step.items() if k != 'label'})
+                for attempt in range(MAX_RERUNS_PER_STEP):
+                    recorder.elements = 0
+                    if trace_memory:
+                        tracemalloc.start()
+                    started = time.perf_counter()
+                    error = None
+                    rerun_requested = False
+                    try:
+                        runpy.run_path(app_path, run_name='__main__')
+                    except RerunRequested:
+                        rerun_requested = True
+                    except Exception as exc:  # report and keep going
+                        error = f"{type(exc).__name__}: {exc}"
+                        errors += 1
+                    wall_ms = (time.perf_counter() - started) * 1000
+                    peak = None
+                    if trace_memory:
+                        peak = tracemalloc.get_traced_memory()[1]
+                        tracemalloc.stop()
+                    reruns.append({
+                        'iteration': iteration,
+                        'step': step_no,
+                        'action': action if attempt == 0 else 'st.rerun()',
+                        'view': recorder.session_state.get('active_view'),
+                        'wall_ms': round(wall_ms, 3),
+                        'peak_alloc_kb': None if peak is None else round(peak / 1024, 1),
+                        'elements': recorder.elements,
+                        'error': error,
+                    })
+                    if not rerun_requested:
+                        break
+    finally:
+        if previous_streamlit is not None:
+            sys.modules['streamlit'] = previous_streamlit
+        else:
+            sys.modules.pop('streamlit', None)
+
+    # Section timings from mastery.metrics, when the app sampled its reruns
+    metrics = sys.modules.get('mastery.metrics')
+    sections = metrics.get_metrics().snapshot() if metrics is not None else {}
+
+    # What one learner's session holds once the scenario has run
+    session = sys.modules.get('mastery.session')
+    session_memory = session.memory_report(recorder.session_state) if session is not None else None
+
+    by_view = {}
+    for run in reruns:
+        by_view.setdefault(run['view'], []).append(run['wall_ms'])
+    peaks = [r['peak_alloc_kb'] for r in reruns if r['peak_alloc_kb'] is not None]
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'app': os.path.relpath(app_path, REPO_ROOT),
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'trace_memory': trace_memory,
+        'reruns': reruns,
+        'sections': sections,
+        'session_memory': session_memory,
+        'summary': {
+            'reruns': len(reruns),
+            'errors': errors,
+            'wall': _stats([r['wall_ms'] for r in reruns]),
+            'by_view': {view: _stats(times) for view, times in by_view.items()},
+            'peak_alloc_kb_max': max(peaks) if peaks else None,
+            # ru_maxrss is KiB on Linux and bytes on macOS
+            'max_rss_mb': round(max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--app', default=DEFAULT_APP, help='script to benchmark (default: App.py)')
+    parser.add_argument('--scenario', help='JSON file with the list of steps to replay')
+    parser.add_argument('--repeat', type=int, default=1, help='times to replay the scenario')
+    parser.add_argument('--no-trace-memory', action='store_true',
+                        help='skip tracemalloc (faster, but no per-rerun peak allocation)')
+    parser.add_argument('--no-serialize-charts', action='store_true',
+                        help='do not serialize Plotly figures the way Streamlit would')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+
+    scenario = DEFAULT_SCENARIO
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+
+    # Keep benchmark progress out of the real progress database
+    os.environ.setdefault('MASTERY_DB_PATH', os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    # Time every section of every rerun
+    os.environ.setdefault('MASTERY_METRICS_SAMPLE', '1')
+
+    report = run_benchmark(args.app, scenario, args.repeat, not args.no_trace_memory,
+                           not args.no_serialize_charts)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 1 if report['summary']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
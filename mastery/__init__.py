@@ -0,0 +1 @@
+"""Supporting modules for the Excel & Power BI Mastery Platform (App.py)."""
@@ -0,0 +1,127 @@
+"""Incrementally materialized learning analytics.
+
+:class:`LearningAnalytics` keeps running aggregates of ``time_on_page``
+events (time per day, module, weekday and hour of day, plus session counts)
+and folds in only the events appended since its last update, so refreshing the
+Progress Analytics tab costs O(new events) instead of a full ``groupby`` over
+the log.  Aggregates from many learners combine with :meth:`merge`, which is
+how cohort views are built.
+"""
+
+import numpy as np
+import pandas as pd
+
+from mastery.events import KIND_CODES, NO_MODULE
+
+NS_PER_SECOND = 10**9
+SECONDS_PER_DAY = 24 * 3600
+SESSION_GAP_SECONDS = 30 * 60
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+_TIME_ON_PAGE = KIND_CODES['time_on_page']
+
+
+class LearningAnalytics:
+    """Running aggregates over one or more event logs."""
+
+    __slots__ = ('utc_offset', 'watermark', 'total_seconds', 'daily_seconds', 'module_seconds',
+                 'weekday_seconds', 'weekday_days', 'hour_seconds', 'sessions', '_last_event')
+
+    def __init__(self, utc_offset_hours=0):
+        self.utc_offset = int(utc_offset_hours * 3600)
+        self.watermark = 0  # events of the source log already folded in
+        self.total_seconds = 0.0
+        self.daily_seconds = {}  # day number since the epoch -> seconds
+        self.module_seconds = {}
+        self.weekday_seconds = np.zeros(7)
+        self.weekday_days = np.zeros(7, dtype=np.int64)
+        self.hour_seconds = np.zeros(24)
+        self.sessions = 0
+        self._last_event = None  # epoch seconds of the latest event seen
+
+    def update(self, log):
+        """Fold in the events appended to ``log`` since the previous update."""
+        cols = log.columns(start=self.watermark)
+        self.watermark = len(log)
+        mask = cols['kind'] == _TIME_ON_PAGE
+        if not mask.any():
+            return self
+        seconds = cols['value'][mask].astype(np.float64)
+        # Events are stamped when the time ends; attribute it to when it started
+        end = cols['timestamp'][mask] // NS_PER_SECOND + self.utc_offset
+        start = end - seconds.astype(np.int64)
+        self._add(start, end, seconds, cols['module'][mask], log.modules)
+        return self
+
+    def _add(self, start, end, seconds, module_codes, module_names):
+        self.total_seconds += float(seconds.sum())
+
+        days = start // SECONDS_PER_DAY
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        per_day = np.bincount(inverse, weights=seconds)
+        for day, value in zip(unique_days.tolist(), per_day.tolist()):
+            if day not in self.daily_seconds:
+                self.daily_seconds[day] = 0.0
+                self.weekday_days[(day + 3) % 7] += 1  # 1970-01-01 was a Thursday
+            self.daily_seconds[day] += value
+        self.weekday_seconds += np.bincount((days + 3) % 7, weights=seconds, minlength=7)
+        self.hour_seconds += np.bincount((start % SECONDS_PER_DAY) // 3600, weights=seconds, minlength=24)
+
+        has_module = module_codes != NO_MODULE
+        if has_module.any():
+            per_module = np.bincount(module_codes[has_module], weights=seconds[has_module])
+            for code in np.flatnonzero(per_module):
+                name = module_names[code]
+                self.module_seconds[name] = self.module_seconds.get(name, 0.0) + float(per_module[code])
+
+        # A new session starts after more than SESSION_GAP_SECONDS between the
+        # end of one event and the start of the next; idle time is never logged
+        previous_end = end[0] if self._last_event is None else self._last_event
+        gaps = start - np.concatenate(([previous_end], end[:-1]))
+        self.sessions += int(np.count_nonzero(gaps > SESSION_GAP_SECONDS)) + (self._last_event is None)
+        self._last_event = int(end[-1])
+
+    def merge(self, other):
+        """Add another learner's aggregates into this one (for cohort views)."""
+        self.total_seconds += other.total_seconds
+        for day, value in other.daily_seconds.items():
+            self.daily_seconds[day] = self.daily_seconds.get(day, 0.0) + value
+        for name, value in other.module_seconds.items():
+            self.module_seconds[name] = self.module_seconds.get(name, 0.0) + value
+        self.weekday_seconds += other.weekday_seconds
+        self.weekday_days += other.weekday_days
+        self.hour_seconds += other.hour_seconds
+        self.sessions += other.sessions
+        return self
+
+    @property
+    def total_hours(self):
+        return self.total_seconds / 3600
+
+    @property
+    def average_session_minutes(self):
+        return self.total_seconds / self.sessions / 60 if self.sessions else 0.0
+
+    @property
+    def peak_hour(self):
+        return int(self.hour_seconds.argmax()) if self.total_seconds else None
+
+    def daily_minutes(self, days=30, today=None):
+        """Minutes per day for the last ``days`` days, zero-filled."""
+        if today is None:
+            today = (pd.Timestamp.now(tz='UTC').value // NS_PER_SECOND + self.utc_offset) // SECONDS_PER_DAY
+        day_numbers = np.arange(today - days + 1, today + 1)
+        minutes = np.array([self.daily_seconds.get(d, 0.0) for d in day_numbers.tolist()]) / 60
+        return pd.DataFrame({
+            'Date': pd.to_datetime(day_numbers, unit='D'),
+            'Time_Spent': minutes.round(1),
+        })
+
+    def module_distribution(self):
+        return pd.Series(self.module_seconds, dtype=float).sort_values(ascending=False) / 60
+
+    def weekly_pattern(self):
+        """Average hours on active days, per weekday."""
+        hours = np.divide(self.weekday_seconds / 3600, self.weekday_days,
+                          out=np.zeros(7), where=self.weekday_days > 0)
+        return pd.Series(hours.round(2), index=WEEKDAYS)
@@ -0,0 +1,464 @@
+"""Automatic grading of Practice Lab exercise submissions.
+
+Each exercise's objectives are matched, by wording, to a check: workbook
+objectives ("Use conditional formatting", "Implement VLOOKUP or XLOOKUP
+...") inspect the uploaded XLSX for validations, formats, protection, styles,
+formulas, charts and pivot tables; Power BI challenges carry a ``grading``
+spec, and their objectives check the shape and the values of an exported
+summary table against the sample dataset it was built from.  Objectives with
+no automatic check are listed for manual review and do not count.
+
+Grading runs in a small process pool behind :class:`GradingQueue`, so parsing
+a heavy workbook never holds up a script thread.  Jobs are keyed by the
+exercise and a hash of the file's bytes: resubmitting a file that is queued
+or already graded returns the same job, and finished jobs double as the
+result cache.  Learners poll a job's state until it is done.
+"""
+
+import hashlib
+import io
+import multiprocessing
+import re
+import threading
+import time
+import zipfile
+from xml.etree import ElementTree
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from mastery.cache import ByteLRUCache, fingerprint
+from mastery.catalog import get_catalog
+from mastery.lazy import lazy_import
+
+openpyxl = lazy_import('openpyxl')
+
+GRADER_VERSION = 1  # part of every job key; bump when checks change
+GRADING_WORKERS = 2
+MAX_PENDING = 16
+MAX_SUBMISSION_BYTES = 20 << 20
+POWERBI_PREFIX = 'powerbi'
+MIN_STYLED_CELLS = 5
+
+DATE_FUNCTIONS = ('EOMONTH', 'EDATE', 'NETWORKDAYS', 'WORKDAY', 'DATEDIF', 'YEARFRAC', 'WEEKNUM',
+                  'WEEKDAY', 'DATEVALUE', 'TODAY')
+SUMMARY_FUNCTIONS = ('SUMIF', 'SUMIFS', 'COUNTIF', 'COUNTIFS', 'AVERAGEIF', 'AVERAGEIFS', 'SUBTOTAL',
+                     'AGGREGATE', 'SUMPRODUCT', 'UNIQUE', 'GETPIVOTDATA')
+TOTAL_LABELS = ('total', 'grandtotal')
+
+
+class GradingError(ValueError):
+    pass
+
+
+# Exercises ---------------------------------------------------------------
+
+def exercise_ids():
+    """Every gradable exercise: workbook exercises, then ``powerbi/<index>`` challenges."""
+    catalog = get_catalog()
+    return list(catalog.exercises) + [f"{POWERBI_PREFIX}/{i}" for i in range(len(catalog.powerbi_challenges))]
+
+
+def exercise(exercise_id):
+    catalog = get_catalog()
+    prefix, _, index = exercise_id.partition('/')
+    if prefix == POWERBI_PREFIX and index.isdigit() and int(index) < len(catalog.powerbi_challenges):
+        return catalog.powerbi_challenges[int(index)]
+    found = catalog.exercise(exercise_id)
+    if found is None:
+        raise GradingError(f"Unknown exercise {exercise_id!r}")
+    return found
+
+
+def _spec(exercise_id):
+    # Plain, picklable copy of what a worker process needs
+    found = exercise(exercise_id)
+    grading = found.get('grading')
+    return {
+        'objectives': list(found.get('objectives', ())),
+        'grading': dict(grading) if grading is not None else None,
+    }
+
+
+# Submissions -------------------------------------------------------------
+
+class _Workbook:
+    """Everything the workbook checks look at, gathered in one pass over the file."""
+
+    def __init__(self, data):
+        wb = openpyxl.load_workbook(io.BytesIO(data))
+        builtin_formats = set(openpyxl.styles.numbers.BUILTIN_FORMATS.values())
+        builtin_styles = set(openpyxl.styles.builtins.styles)
+        self.formulas = []
+        self.validation_types = []
+        self.rule_types = []
+        self.protected = []
+        self.custom_formats = set()
+        self.styled_cells = 0
+        self.tables = 0
+        self.frozen = 0
+        for ws in wb.worksheets:
+            self.validation_types += [dv.type or 'any' for dv in ws.data_validations.dataValidation]
+            self.rule_types += [rule.type for cf in ws.conditional_formatting for rule in cf.rules]
+            if ws.protection.sheet:
+                self.protected.append(ws.title)
+            self.tables += len(ws.tables)
+            self.frozen += ws.freeze_panes is not None
+            for row in ws.iter_rows():
+                for cell in row:
+                    if cell.data_type == 'f':
+                        formula = getattr(cell.value, 'text', cell.value)
+                        self.formulas.append(str(formula).upper().replace('_XLFN.', ''))
+                    if not cell.has_style:
+                        continue
+                    if cell.number_format not in builtin_formats:
+                        self.custom_formats.add(cell.number_format)
+                    if cell.fill.fill_type or cell.border.left.style or cell.border.bottom.style or cell.font.b:
+                        self.styled_cells += 1
+        self.custom_styles = [name for name in wb.named_styles if name not in builtin_styles]
+        self.defined_names = list(wb.defined_names)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            # openpyxl drops sparklines (an x14 extension) and keeps charts and pivot
+            # tables only in private attributes, so these come from the package parts
+            parts = archive.namelist()
+            self.sparklines = sum(
+                archive.read(name).count(b'sparklineGroup>') for name in parts
+                if name.startswith('xl/worksheets/') and name.endswith('.xml')
+            )
+            self.charts = sum(name.startswith('xl/charts/chart') and name.endswith('.xml') for name in parts)
+            # (row fields, column fields, data fields) per pivot table
+            self.pivots = [_pivot_fields(archive.read(name)) for name in parts
+                           if name.startswith('xl/pivotTables/') and name.endswith('.xml')]
+
+    def calls(self, *functions):
+        """Formulas that call any of ``functions``."""
+        pattern = re.compile(r'\b(?:' + '|'.join(functions) + r')\(')
+        return [f for f in self.formulas if pattern.search(f)]
+
+
+def _pivot_fields(xml):
+    root = ElementTree.fromstring(xml)
+    counts = {}
+    for element in root:
+        tag = element.tag.rpartition('}')[2]
+        if tag in ('rowFields', 'colFields', 'dataFields'):
+            counts[tag] = len(element)
+    return counts.get('rowFields', 0), counts.get('colFields', 0), counts.get('dataFields', 0)
+
+
+def _read_table(data, file_name):
+    if file_name.lower().endswith('.csv'):
+        return pd.read_csv(io.BytesIO(data))
+    return pd.read_excel(io.BytesIO(data), sheet_name=0)
+
+
+def _normalize(name):
+    return re.sub(r'[^0-9a-z]', '', str(name).lower())
+
+
+# Checks: each returns (passed, detail) -------------------------------------
+
+def _sample(items, n=2):
+    return ', '.join(str(i) for i in list(items)[:n])
+
+
+def _check_dropdowns(wb, _spec):
+    lists = wb.validation_types.count('list')
+    return lists > 0, f"{lists} dropdown list(s)" if lists else "No list validation (dropdown) found"
+
+
+def _check_validation(wb, _spec):
+    n = len(wb.validation_types)
+    return n > 0, f"{n} validation rule(s): {_sample(sorted(set(wb.validation_types)), 4)}" if n else \
+        "No data validation rules found"
+
+
+def _check_number_formats(wb, _spec):
+    n = len(wb.custom_formats)
+    return n > 0, f"Custom formats such as {_sample(sorted(wb.custom_formats))}" if n else \
+        "Only built-in number formats are used"
+
+
+def _check_formula_rules(wb, _spec):
+    n = wb.rule_types.count('expression')
+    return n > 0, f"{n} formula-based rule(s)" if n else "No conditional formatting rule uses a formula"
+
+
+def _check_conditional_formatting(wb, _spec):
+    n = len(wb.rule_types)
+    return n > 0, f"{n} conditional formatting rule(s)" if n else "No conditional formatting found"
+
+
+def _check_protection(wb, _spec):
+    return bool(wb.protected), f"Protected: {_sample(wb.protected, 3)}" if wb.protected else \
+        "No worksheet is protected"
+
+
+def _check_styles(wb, _spec):
+    return bool(wb.custom_styles), f"Custom styles: {_sample(wb.custom_styles, 3)}" if wb.custom_styles else \
+        "No custom cell styles defined"
+
+
+def _check_sparklines(wb, _spec):
+    return wb.sparklines > 0, f"{wb.sparklines} sparkline group(s)" if wb.sparklines else "No sparklines found"
+
+
+def _check_cell_formatting(wb, _spec):
+    passed = wb.styled_cells >= MIN_STYLED_CELLS and bool(wb.custom_formats or wb.rule_types or wb.custom_styles)
+    return passed, (f"{wb.styled_cells} cells with fills, borders or bold text, plus custom formats or rules"
+                    if passed else f"Needs at least {MIN_STYLED_CELLS} formatted cells and a custom format, "
+                    f"style or rule ({wb.styled_cells} formatted cells found)")
+
+
+def _check_nested_if(wb, _spec):
+    found = wb.calls('IFS') + [f for f in wb.formulas if len(re.findall(r'\bIF\(', f)) >= 2]
+    return bool(found), f"e.g. ={found[0][1:80]}" if found else "No nested IF or IFS formula found"
+
+
+def _check_lookup(wb, _spec):
+    found = wb.calls('VLOOKUP', 'XLOOKUP')
+    return bool(found), f"{len(found)} lookup formula(s), e.g. ={found[0][1:80]}" if found else \
+        "No VLOOKUP or XLOOKUP formula found"
+
+
+def _check_summary(wb, _spec):
+    found = wb.calls(*SUMMARY_FUNCTIONS)
+    if wb.pivots:
+        return True, f"{len(wb.pivots)} pivot table(s)"
+    return bool(found), f"{len(found)} summary formula(s)" if found else \
+        "No pivot table or SUMIFS/COUNTIFS/SUBTOTAL-style summary found"
+
+
+def _check_dates(wb, _spec):
+    found = wb.calls(*DATE_FUNCTIONS)
+    return bool(found), f"{len(found)} date formula(s), e.g. ={found[0][1:80]}" if found else \
+        f"No date functions ({', '.join(DATE_FUNCTIONS[:5])}, ...) found"
+
+
+def _check_charts(wb, _spec):
+    passed = wb.charts > 0 and bool(wb.formulas)
+    return passed, f"{wb.charts} chart(s) over a sheet with {len(wb.formulas)} formula(s)" if passed else \
+        "Needs a chart and formulas that feed it"
+
+
+def _check_layout(wb, _spec):
+    parts = [f"{wb.tables} Excel table(s)" if wb.tables else '', f"{wb.frozen} frozen pane(s)" if wb.frozen else '',
+             f"{len(wb.defined_names)} named range(s)" if wb.defined_names else '']
+    parts = [p for p in parts if p]
+    return bool(parts), ', '.join(parts) if parts else "Use Excel tables, named ranges or frozen panes"
+
+
+def _summary_columns(table, spec):
+    by = next((c for c in table.columns if _normalize(c) == _normalize(spec['by'])), None)
+    value = next((c for c in table.columns if c != by and _normalize(spec['value']) in _normalize(c)), None)
+    return by, value
+
+
+def _summary_rows(table, by):
+    labels = table[by].astype(str).str.strip()
+    keep = table[by].notna() & ~labels.map(_normalize).isin(TOTAL_LABELS)
+    return table[keep].assign(**{by: labels[keep]})
+
+
+def _check_shape(table, spec):
+    by, value = _summary_columns(table, spec)
+    if by is None or value is None:
+        return False, f"Needs a {spec['by']} column and a {spec['value']} column; found {_sample(table.columns, 6)}"
+    rows = _summary_rows(table, by)
+    expected = set(_expected(spec).index)
+    labels = list(rows[by])
+    missing, extra = expected - set(labels), set(labels) - expected
+    duplicated = len(labels) != len(set(labels))
+    if missing or extra or duplicated:
+        problems = [f"missing {_sample(sorted(missing), 4)}" if missing else '',
+                    f"unexpected {_sample(sorted(extra), 4)}" if extra else '',
+                    "repeated rows" if duplicated else '']
+        return False, '; '.join(p for p in problems if p)
+    return True, f"One row per {spec['by']} ({len(labels)} rows)"
+
+
+def _check_values(table, spec):
+    by, value = _summary_columns(table, spec)
+    if by is None or value is None:
+        return False, f"Needs a {spec['by']} column and a {spec['value']} column"
+    rows = _summary_rows(table, by)
+    actual = pd.to_numeric(rows[value], errors='coerce').to_numpy(dtype=np.float64)
+    expected = _expected(spec).reindex(rows[by]).to_numpy(dtype=np.float64)
+    # Exports may round averages to the cent; totals of whole numbers come out exact
+    close = np.isclose(actual, expected, rtol=1e-6, atol=0.01)
+    wrong = [label for label, ok in zip(rows[by], close) if not ok]
+    if wrong or not len(rows):
+        return False, f"Values differ for {_sample(wrong, 4)}" if wrong else "The table has no rows"
+    return True, f"All {len(rows)} {spec['agg']} values match"
+
+
+def _expected(spec):
+    from mastery.datasets import get_dataset
+    df = get_dataset(spec['dataset'], spec['rows'], spec['seed'])
+    expected = df.groupby(spec['by'], observed=True)[spec['value']].agg(spec['agg'])
+    expected.index = expected.index.astype(str)
+    return expected
+
+
+# First matching pattern wins, so the more specific wording comes first
+WORKBOOK_CHECKS = (
+    (r'dropdown', _check_dropdowns),
+    (r'data validation', _check_validation),
+    (r'number format', _check_number_formats),
+    (r'conditional formatting with formula', _check_formula_rules),
+    (r'conditional formatting', _check_conditional_formatting),
+    (r'protect', _check_protection),
+    (r'custom styles', _check_styles),
+    (r'sparkline', _check_sparklines),
+    (r'cell formatting', _check_cell_formatting),
+    (r'nested if|\bifs\b', _check_nested_if),
+    (r'vlookup|xlookup|lookup', _check_lookup),
+    (r'summary report', _check_summary),
+    (r'date function', _check_dates),
+    (r'chart', _check_charts),
+    (r'layout', _check_layout),
+)
+TABLE_CHECKS = (
+    (r'^summarize ', _check_shape),
+    (r'^match ', _check_values),
+)
+
+
+def checks_for(objectives, table=False):
+    """``(objective, check or None)`` per objective; None means manual review."""
+    rules = TABLE_CHECKS if table else WORKBOOK_CHECKS
+    return [(objective, next((check for pattern, check in rules if re.search(pattern, objective.lower())), None))
+            for objective in objectives]
+
+
+def grade_submission(spec, data, file_name):
+    """Grade one file against an exercise spec; runs in a worker process.
+
+    Returns ``{'checks': [(objective, 'pass' | 'fail' | 'manual', detail)],
+    'passed', 'gradable', 'seconds', 'error'}``.
+    """
+    started = time.perf_counter()
+    result = {'file_name': file_name, 'checks': [], 'passed': 0, 'gradable': 0, 'error': None}
+    table = spec['grading'] is not None
+    try:
+        if table:
+            submission = _read_table(data, file_name)
+        elif not file_name.lower().endswith('.xlsx'):
+            raise GradingError("Upload the .xlsx workbook; a CSV file has no formulas or formatting to check")
+        else:
+            submission = _Workbook(data)
+    except (GradingError, ValueError, KeyError, OSError, zipfile.BadZipFile, ElementTree.ParseError) as exc:
+        result['error'] = f"Could not read {file_name}: {exc}"
+        result['seconds'] = time.perf_counter() - started
+        return result
+    for objective, check in checks_for(spec['objectives'], table):
+        if check is None:
+            result['checks'].append((objective, 'manual', "Checked by a reviewer"))
+            continue
+        passed, detail = check(submission, spec['grading'])
+        result['checks'].append((objective, 'pass' if passed else 'fail', detail))
+        result['gradable'] += 1
+        result['passed'] += passed
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+# Queue -------------------------------------------------------------------
+
+class Job:
+    __slots__ = ('id', 'exercise_id', 'file_name', 'submitted', 'future', 'result', 'error')
+
+    def __init__(self, job_id, exercise_id, file_name):
+        self.id = job_id
+        self.exercise_id = exercise_id
+        self.file_name = file_name
+        self.submitted = time.time()
+        self.future = None
+        self.result = None
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.result is not None or self.error is not None
+
+    @property
+    def state(self):
+        if self.error is not None:
+            return 'failed'
+        if self.result is not None:
+            return 'done'
+        return 'running' if self.future is not None and self.future.running() else 'queued'
+
+
+class GradingQueue:
+    """Grading jobs on a process pool, shared by every session.
+
+    Jobs are kept, finished or not, in an LRU of ``max_jobs`` entries; a
+    finished job is the cached result for its (exercise, file) pair.
+    """
+
+    def __init__(self, workers=GRADING_WORKERS, max_pending=MAX_PENDING, max_jobs=1024):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._jobs = ByteLRUCache(max_jobs, sizeof=lambda _: 1)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn: forking a process that runs many script threads is unsafe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def submit(self, exercise_id, data, file_name):
+        """Queue ``data`` for grading and return the job id; a known file returns its existing job."""
+        if len(data) > MAX_SUBMISSION_BYTES:
+            raise GradingError(f"Submissions are limited to {MAX_SUBMISSION_BYTES >> 20} MB")
+        spec = _spec(exercise_id)
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        job_id = fingerprint('grade', GRADER_VERSION, exercise_id, digest)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.error is None:
+                return job_id
+            if self.pending >= self.max_pending:
+                raise GradingError("The grader is busy; please submit again in a minute")
+            job = Job(job_id, exercise_id, file_name)
+            try:
+                job.future = self._executor().submit(grade_submission, spec, data, file_name)
+            except BrokenProcessPool:
+                self._pool = None
+                job.future = self._executor().submit(grade_submission, spec, data, file_name)
+            self.pending += 1
+            self._jobs.put(job_id, job)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job_id
+
+    def _finish(self, job, future):
+        try:
+            job.result = future.result()
+        except BaseException as exc:  # a crashed worker surfaces here too
+            job.error = f"{type(exc).__name__}: {exc}"
+        with self._lock:
+            self.pending -= 1
+
+    def job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def stats(self):
+        return {'pending': self.pending, **self._jobs.stats()}
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_grading_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = GradingQueue()
+        return _queue
@@ -0,0 +1,144 @@
+"""Small process-wide caches shared by all sessions."""
+
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def _same(old, value):
+    # Only compare plain values; == on frames or arrays is elementwise
+    if old is value:
+        return True
+    return isinstance(old, (str, bytes)) and type(old) is type(value) and old == value
+
+
+class ByteLRUCache:
+    """Thread-safe LRU cache bounded by the total size of its values in bytes.
+
+    ``sizeof`` returns the size of a value; values larger than the whole budget
+    are returned to the caller but never stored.  ``on_evict`` is called with
+    ``(key, value)`` for every entry pushed out of the cache.  Replacing an
+    entry with an equal string (the same file path, say) is not an eviction.
+    """
+
+    def __init__(self, max_bytes, sizeof=len, on_evict=None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        evicted = []
+        with self._lock:
+            if key in self._items:
+                old, old_size = self._items.pop(key)
+                self.nbytes -= old_size
+                if not _same(old, value):
+                    evicted.append((key, old))
+            if size <= self.max_bytes:
+                self._items[key] = (value, size)
+                self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                old_key, (old, old_size) = self._items.popitem(last=False)
+                self.nbytes -= old_size
+                evicted.append((old_key, old))
+        if self.on_evict is not None:
+            for item in evicted:
+                self.on_evict(*item)
+        return value
+
+    def get_or_create(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, factory())
+        return value
+
+    def clear(self):
+        with self._lock:
+            evicted = [(k, v) for k, (v, _) in self._items.items()]
+            self._items.clear()
+            self.nbytes = 0
+        if self.on_evict is not None:
+            for item in evicted:
+                self.on_evict(*item)
+
+    def stats(self):
+        return {
+            'entries': len(self._items),
+            'bytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+def fingerprint(*parts):
+    """Short stable hash of the given parts, used as a cache key."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        elif not isinstance(part, (bytes, bytearray, memoryview)):
+            part = repr(part).encode()
+        digest.update(part)
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+# Fingerprints of the exact frames the engines hand out, by id().  Not kept in
+# df.attrs: pandas copies attrs to every derived frame (head, filters, copies)
+_fingerprints = {}
+
+
+def _forget(frame_id):
+    _fingerprints.pop(frame_id, None)
+
+
+def set_frame_fingerprint(df, key):
+    """Record ``key`` as the fingerprint of ``df`` itself, not of frames derived from it."""
+    _fingerprints[id(df)] = key
+    weakref.finalize(df, _forget, id(df))
+    return df
+
+
+def frame_fingerprint(df):
+    """Fingerprint of a DataFrame's contents.
+
+    Frames from ``mastery.datasets`` and ``mastery.ingest`` have a precomputed
+    fingerprint (see :func:`set_frame_fingerprint`); anything else, including
+    frames derived from those, is hashed row by row.
+    """
+    cached = _fingerprints.get(id(df))
+    if cached:
+        return cached
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return fingerprint('frame', tuple(df.columns), tuple(map(str, df.dtypes)), row_hashes.tobytes())
+
+
+def frame_nbytes(df):
+    # deep=True is cheap here: playground frames use categoricals, not objects
+    return int(df.memory_usage(index=True, deep=True).sum())
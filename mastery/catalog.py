@@ -0,0 +1,114 @@
+"""Immutable, indexed view over the curriculum content.
+
+Streamlit re-executes App.py on every widget interaction, so anything built at
+the top level of the script is rebuilt per rerun and per session.  The catalog
+is built once per process by :func:`get_catalog` and shared by every session;
+all lookups the tabs need are precomputed here so rendering is plain dict
+access instead of scanning the nested content literals.
+"""
+
+from functools import lru_cache
+from types import MappingProxyType
+
+from mastery import content
+
+CATEGORIES = ('Excel', 'Power BI', 'Other')
+
+
+def category_of(module_key):
+    # Same rule the dashboard has always used to colour the progress chart
+    if 'excel' in module_key:
+        return 'Excel'
+    if 'powerbi' in module_key:
+        return 'Power BI'
+    return 'Other'
+
+
+def _freeze(value):
+    # Deep-freeze the content so sessions cannot mutate shared state
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _group(pairs):
+    groups = {}
+    for key, value in pairs:
+        groups.setdefault(key, []).append(value)
+    return MappingProxyType({k: tuple(v) for k, v in groups.items()})
+
+
+class Catalog:
+    """Read-only curriculum with O(1) lookups by module, category, difficulty and id.
+
+    Lesson and exercise ids have the form ``"<module_key>/<index>"``.
+    """
+
+    __slots__ = (
+        'modules', 'module_keys', 'module_titles', 'modules_by_category',
+        'modules_by_difficulty', 'prerequisite_titles', 'badges',
+        'lessons', 'lessons_by_module', 'quizzes', 'case_studies',
+        'exercises', 'exercises_by_module', 'exercises_by_category',
+        'exercises_by_difficulty', 'powerbi_challenges',
+    )
+
+    def __init__(self, learning_content, quiz_questions, practice_exercises,
+                 case_studies, powerbi_challenges=()):
+        modules = _freeze(learning_content)
+        self.modules = modules
+        self.module_keys = tuple(modules)
+        self.module_titles = MappingProxyType({k: m['title'] for k, m in modules.items()})
+        self.modules_by_category = _group((category_of(k), k) for k in modules)
+        self.modules_by_difficulty = _group((m['difficulty'], k) for k, m in modules.items())
+        # Prerequisites may point at modules whose content is not written yet,
+        # fall back to the key so the Learning Hub never raises on them
+        self.prerequisite_titles = MappingProxyType({
+            k: tuple(self.module_titles.get(p, p) for p in m['prerequisites'])
+            for k, m in modules.items()
+        })
+        self.badges = MappingProxyType({k: m['badge'] for k, m in modules.items() if 'badge' in m})
+
+        lessons = {}
+        for key, module in modules.items():
+            for i, lesson in enumerate(module['lessons']):
+                lessons[f"{key}/{i}"] = lesson
+        self.lessons = MappingProxyType(lessons)
+        self.lessons_by_module = _group((lid.split('/')[0], lid) for lid in lessons)
+
+        self.quizzes = _freeze(quiz_questions)
+        self.case_studies = _freeze(case_studies)
+
+        exercises = {}
+        for key, items in _freeze(practice_exercises).items():
+            for i, exercise in enumerate(items):
+                exercises[f"{key}/{i}"] = exercise
+        self.exercises = MappingProxyType(exercises)
+        self.exercises_by_module = _group((eid.split('/')[0], eid) for eid in exercises)
+        self.exercises_by_category = _group(
+            (category_of(eid.split('/')[0]), eid) for eid in exercises
+        )
+        self.exercises_by_difficulty = _group((e['difficulty'], eid) for eid, e in exercises.items())
+        self.powerbi_challenges = _freeze(powerbi_challenges)
+
+    def module(self, key):
+        return self.modules.get(key)
+
+    def lesson(self, lesson_id):
+        return self.lessons.get(lesson_id)
+
+    def exercise(self, exercise_id):
+        return self.exercises.get(exercise_id)
+
+
+@lru_cache(maxsize=None)
+def get_catalog():
+    """Return the process-wide catalog, building it on first use."""
+    return Catalog(
+        content.learning_content,
+        content.quiz_questions,
+        content.practice_exercises,
+        content.case_studies,
+        content.powerbi_challenges,
+    )
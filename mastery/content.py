@@ -0,0 +1,578 @@
+"""Curriculum content for the Excel & Power BI Mastery Platform.
+
+These literals are the source data for the catalog in ``mastery.catalog``.
+They are only read once per process, so edit them here rather than in App.py.
+"""
+
+# Expanded learning content with detailed lessons
+learning_content = {
+    'excel_basics': {
+        'title': 'Excel Fundamentals',
+        'description': 'Master the essential Excel skills needed for data manipulation and analysis.',
+        'lessons': [
+            {
+                'title': 'Excel Interface & Navigation',
+                'content': '''
+                - Ribbon, Quick Access Toolbar, and Formula Bar overview
+                - Worksheet navigation techniques and shortcuts
+                - Understanding workbooks vs. worksheets
+                - Customizing the Excel interface for efficiency
+                - Using the Status Bar for quick insights
+                - Different view modes and their purposes
+                ''',
+                'video_link': 'https://www.example.com/excel-interface',
+                'duration': '25 min',
+                'exercise': 'Customize your Excel interface and create a navigation shortcut sheet'
+            },
+            {
+                'title': 'Data Entry & Selection Mastery',
+                'content': '''
+                - Efficient data entry techniques and best practices
+                - Advanced selection methods (keyboard vs. mouse)
+                - AutoFill for sequences, patterns, and custom lists
+                - Flash Fill for intelligent data extraction and formatting
+                - Data validation for controlled input
+                - Using forms for structured data entry
+                ''',
+                'video_link': 'https://www.example.com/data-entry',
+                'duration': '35 min',
+                'exercise': 'Create a data entry form for a customer database'
+            },
+            {
+                'title': 'Formatting Excellence',
+                'content': '''
+                - Advanced font and cell formatting options
+                - Custom number formats for specialized display
+                - Conditional formatting with formulas
+                - Cell styles and themes for consistency
+                - Format Painter advanced techniques
+                - Using templates for standardized formatting
+                ''',
+                'video_link': 'https://www.example.com/formatting',
+                'duration': '40 min',
+                'exercise': 'Format a financial report with conditional formatting and custom styles'
+            },
+            {
+                'title': 'Workbook Management',
+                'content': '''
+                - Advanced save options and file formats
+                - AutoRecover and version history management
+                - Workbook protection and security features
+                - Sharing and collaboration techniques
+                - Inspecting workbooks for issues
+                - Managing workbook properties and metadata
+                ''',
+                'video_link': 'https://www.example.com/workbook-management',
+                'duration': '30 min',
+                'exercise': 'Create a protected workbook with specific user permissions'
+            },
+            {
+                'title': 'Advanced Worksheet Techniques',
+                'content': '''
+                - 3D references across multiple worksheets
+                - Grouping worksheets for simultaneous operations
+                - Custom views for different user perspectives
+                - Worksheet outlining and subtotals
+                - Data consolidation from multiple sheets
+                - Advanced hiding and protection techniques
+                ''',
+                'video_link': 'https://www.example.com/worksheet-techniques',
+                'duration': '45 min',
+                'exercise': 'Create a consolidated report from multiple department worksheets'
+            }
+        ],
+        'difficulty': 'Beginner',
+        'estimated_time': '3.5 hours',
+        'resources': [
+            'Excel Interface Cheat Sheet',
+            'Data Entry Best Practices Guide',
+            'Formatting Template Library',
+            'Workbook Security Checklist'
+        ],
+        'prerequisites': [],
+        'badge': 'Excel Basics Master'
+    },
+    'excel_formulas': {
+        'title': 'Excel Formulas & Functions',
+        'description': 'Master Excel\'s powerful formula language for advanced data analysis.',
+        'lessons': [
+            {
+                'title': 'Formula Fundamentals',
+                'content': '''
+                - Formula syntax and structure deep dive
+                - Relative, absolute, and mixed referencing
+                - Formula auditing and error checking
+                - Using the Function Wizard effectively
+                - Array formulas and dynamic arrays
+                - Best practices for formula efficiency
+                ''',
+                'video_link': 'https://www.example.com/formula-fundamentals',
+                'duration': '40 min',
+                'exercise': 'Create a complex calculation sheet with various reference types'
+            },
+            {
+                'title': 'Statistical & Mathematical Functions',
+                'content': '''
+                - Advanced SUM, COUNT, and AVERAGE variations
+                - Statistical functions: MEDIAN, MODE, STDEV, VAR
+                - Mathematical functions: ROUND, TRUNC, INT, MOD
+                - Random number generation with RAND and RANDBETWEEN
+                - Aggregate functions for conditional calculations
+                - Using SUMPRODUCT for advanced calculations
+                ''',
+                'video_link': 'https://www.example.com/statistical-functions',
+                'duration': '50 min',
+                'exercise': 'Build a statistical analysis dashboard for sales data'
+            },
+            {
+                'title': 'Logical Functions Mastery',
+                'content': '''
+                - Nested IF statements and alternatives
+                - Boolean logic with AND, OR, NOT
+                - IFS, SWITCH, and CHOOSE functions
+                - Using IFERROR and IFNA for error handling
+                - Combining logical functions with other function types
+                - Practical applications for decision-making models
+                ''',
+                'video_link': 'https://www.example.com/logical-functions',
+                'duration': '45 min',
+                'exercise': 'Create a grading system with multiple conditional criteria'
+            },
+            {
+                'title': 'Lookup & Reference Functions',
+                'content': '''
+                - VLOOKUP and HLOOKUP advanced techniques
+                - INDEX-MATCH powerful combinations
+                - XLOOKUP modern lookup capabilities
+                - OFFSET and INDIRECT for dynamic references
+                - Using CHOOSE for scenario analysis
+                - Advanced applications with multiple criteria
+                ''',
+                'video_link': 'https://www.example.com/lookup-functions',
+                'duration': '60 min',
+                'exercise': 'Build a dynamic dashboard with multiple lookup techniques'
+            },
+            {
+                'title': 'Text & Date Functions',
+                'content': '''
+                - Text manipulation with LEFT, RIGHT, MID, FIND, SEARCH
+                - Advanced text functions: TEXTJOIN, CONCAT, SUBSTITUTE
+                - Date and time calculations and formatting
+                - Working with business days and holidays
+                - Date intelligence functions: DATEDIF, EDATE, EOMONTH
+                - Practical applications for project planning
+                ''',
+                'video_link': 'https://www.example.com/text-date-functions',
+                'duration': '50 min',
+                'exercise': 'Create a project timeline with automated date calculations'
+            },
+            {
+                'title': 'Advanced Function Combinations',
+                'content': '''
+                - Array formulas and dynamic array functions
+                - LAMBDA functions for custom calculations
+                - Using FILTER, SORT, UNIQUE, and SEQUENCE
+                - Complex nested function strategies
+                - Optimizing formulas for performance
+                - Real-world complex modeling examples
+                ''',
+                'video_link': 'https://www.example.com/advanced-functions',
+                'duration': '70 min',
+                'exercise': 'Build a complex financial model using advanced function combinations'
+            }
+        ],
+        'difficulty': 'Beginner to Intermediate',
+        'estimated_time': '6 hours',
+        'resources': [
+            'Function Reference Guide',
+            'Formula Optimization Checklist',
+            'Common Formula Patterns',
+            'Advanced Lookup Techniques'
+        ],
+        'prerequisites': ['excel_basics'],
+        'badge': 'Excel Formulas Expert'
+    },
+    'data_analysis': {
+        'title': 'Data Analysis Techniques',
+        'description': 'Advanced analytical methods for deriving insights from data in Excel and Power BI.',
+        'lessons': [
+            {
+                'title': 'Exploratory Data Analysis',
+                'content': '''
+                - Data profiling and quality assessment
+                - Descriptive statistics and summary metrics
+                - Distribution analysis with histograms and box plots
+                - Correlation analysis and visualization
+                - Outlier detection and treatment strategies
+                - Data transformation techniques
+                ''',
+                'video_link': 'https://www.example.com/exploratory-analysis',
+                'duration': '55 min',
+                'exercise': 'Perform EDA on a sales dataset and create a summary report'
+            },
+            {
+                'title': 'Statistical Analysis Methods',
+                'content': '''
+                - Hypothesis testing fundamentals
+                - T-tests and Z-tests for means comparison
+                - ANOVA for multiple group comparisons
+                - Chi-square tests for categorical data
+                - Regression analysis basics
+                - Interpreting statistical results
+                ''',
+                'video_link': 'https://www.example.com/statistical-methods',
+                'duration': '65 min',
+                'exercise': 'Conduct hypothesis tests on customer demographic data'
+            },
+            {
+                'title': 'Predictive Analytics',
+                'content': '''
+                - Time series analysis and forecasting
+                - Moving averages and exponential smoothing
+                - Regression-based forecasting
+                - Using the Forecast Sheet feature in Excel
+                - Introduction to machine learning concepts
+                - Evaluating predictive model accuracy
+                ''',
+                'video_link': 'https://www.example.com/predictive-analytics',
+                'duration': '70 min',
+                'exercise': 'Create a sales forecast for the next quarter using multiple methods'
+            },
+            {
+                'title': 'Optimization Techniques',
+                'content': '''
+                - Linear programming concepts
+                - Using Solver for optimization problems
+                - Scenario analysis with Data Tables
+                - Goal Seek for reverse calculations
+                - Monte Carlo simulation basics
+                - Decision analysis under uncertainty
+                ''',
+                'video_link': 'https://www.example.com/optimization-techniques',
+                'duration': '60 min',
+                'exercise': 'Optimize a production plan using Solver'
+            }
+        ],
+        'difficulty': 'Advanced',
+        'estimated_time': '4.5 hours',
+        'resources': [
+            'Statistical Analysis Guide',
+            'Forecasting Methods Comparison',
+            'Solver Parameter Templates',
+            'Data Analysis Case Studies'
+        ],
+        'prerequisites': ['excel_formulas', 'excel_pivottables'],
+        'badge': 'Data Analysis Specialist'
+    }
+}
+
+# Quiz questions with detailed explanations
+quiz_questions = {
+    'excel_basics': [
+        {
+            'question': 'Which shortcut selects the entire worksheet?',
+            'options': ['Ctrl+A', 'Ctrl+Shift+Space', 'Alt+A', 'Shift+Space'],
+            'correct': 1,
+            'explanation': 'Ctrl+Shift+Space selects the entire worksheet in Excel. Ctrl+A selects the current region if the cursor is in a data range, or the entire worksheet if not.',
+            'points': 10,
+            'difficulty': 'Easy'
+        },
+        {
+            'question': 'How do you autofill a series of dates in Excel?',
+            'options': ['Use the Fill Handle', 'Use the AutoComplete feature', 'Use the Series dialog box', 'Both 1 and 3'],
+            'correct': 3,
+            'explanation': 'You can use either the Fill Handle by dragging or the Series dialog box (Home > Fill > Series) to autofill dates. The Series dialog offers more control over the pattern.',
+            'points': 15,
+            'difficulty': 'Medium'
+        },
+        {
+            'question': 'Which feature automatically completes data entry based on patterns it detects?',
+            'options': ['AutoComplete', 'Flash Fill', 'Quick Analysis', 'AutoFill'],
+            'correct': 1,
+            'explanation': 'Flash Fill (introduced in Excel 2013) automatically detects patterns in your data entry and completes the remaining entries without formulas.',
+            'points': 10,
+            'difficulty': 'Easy'
+        },
+        {
+            'question': 'What does the Format Painter tool do?',
+            'options': [
+                'Applies artistic effects to cells',
+                'Copies formatting from one cell to another',
+                'Paints cells with a selected color',
+                'Creates painterly charts from data'
+            ],
+            'correct': 1,
+            'explanation': 'The Format Painter copies formatting from one cell or range and applies it to another. Double-clicking the Format Painter button locks it for multiple applications.',
+            'points': 10,
+            'difficulty': 'Easy'
+        },
+        {
+            'question': 'How do you protect a worksheet in Excel?',
+            'options': [
+                'Review tab > Protect Sheet',
+                'Home tab > Format > Protect Sheet',
+                'File > Info > Protect Workbook',
+                'Both 1 and 3 are correct'
+            ],
+            'correct': 3,
+            'explanation': 'You can protect a worksheet from the Review tab or from File > Info > Protect Workbook. The latter offers additional protection options for the entire workbook structure.',
+            'points': 15,
+            'difficulty': 'Medium'
+        }
+    ],
+    'excel_formulas': [
+        {
+            'question': 'Which function adds up all the numbers in a range of cells?',
+            'options': ['COUNT', 'AVERAGE', 'SUM', 'TOTAL'],
+            'correct': 2,
+            'explanation': 'The SUM function adds all the numbers in a range of cells. SUMIF and SUMIFS provide conditional summing capabilities.',
+            'points': 5,
+            'difficulty': 'Easy'
+        },
+        {
+            'question': 'What does VLOOKUP do?',
+            'options': ['Looks for values vertically', 'Looks for values horizontally', 'Creates a vertical layout', 'Verifies lookup values'],
+            'correct': 0,
+            'explanation': 'VLOOKUP looks for a value in the first column of a table and returns a value in the same row from a specified column. It has been largely superseded by XLOOKUP in newer Excel versions.',
+            'points': 10,
+            'difficulty': 'Easy'
+        },
+        {
+            'question': 'Which function would you use to find the highest value in a range?',
+            'options': ['MAX', 'HIGH', 'TOP', 'PEAK'],
+            'correct': 0,
+            'explanation': 'The MAX function returns the largest value in a set of values. Use MAXIFS for conditional maximum values.',
+            'points': 5,
+            'difficulty': 'Easy'
+        },
+        {
+            'question': 'What is the main advantage of XLOOKUP over VLOOKUP?',
+            'options': [
+                'XLOOKUP can return arrays',
+                'XLOOKUP defaults to exact match',
+                'XLOOKUP can search in any direction',
+                'All of the above'
+            ],
+            'correct': 3,
+            'explanation': 'XLOOKUP has several advantages over VLOOKUP, including the ability to return arrays, default exact matching, search in any direction, and not requiring a separate column index number.',
+            'points': 15,
+            'difficulty': 'Medium'
+        },
+        {
+            'question': 'Which function would you use to combine text from multiple cells?',
+            'options': ['COMBINE', 'MERGE', 'CONCAT', 'JOIN'],
+            'correct': 2,
+            'explanation': 'The CONCAT function (or CONCATENATE in older versions) combines text from multiple cells into one cell. TEXTJOIN offers additional functionality with delimiters.',
+            'points': 10,
+            'difficulty': 'Easy'
+        },
+        {
+            'question': 'What does the IFERROR function do?',
+            'options': [
+                'Checks if a cell contains an error',
+                'Returns a custom result when a formula generates an error',
+                'Prevents all errors in a worksheet',
+                'Highlights cells containing errors'
+            ],
+            'correct': 1,
+            'explanation': 'IFERROR returns a custom result when a formula generates an error, and the standard result when no error is detected. It is useful for cleaning up the appearance of worksheets with potential errors.',
+            'points': 15,
+            'difficulty': 'Medium'
+        }
+    ]
+}
+
+# Practice exercises with solutions
+practice_exercises = {
+    'excel_basics': [
+        {
+            'title': 'Professional Data Entry System',
+            'description': 'Create a comprehensive data entry system with validation and formatting.',
+            'objectives': [
+                'Implement data validation rules',
+                'Create custom number formats',
+                'Use conditional formatting',
+                'Protect worksheet structure'
+            ],
+            'steps': [
+                'Create a new workbook with a structured data entry table',
+                'Add data validation for specific columns (e.g., dropdown lists, date restrictions)',
+                'Apply custom number formats for ID numbers, phone numbers, etc.',
+                'Use conditional formatting to highlight important values or outliers',
+                'Protect the worksheet to allow data entry only in specific cells',
+                'Create a user guide section with instructions'
+            ],
+            'solution_file': 'data_entry_system_solution.xlsx',
+            'difficulty': 'Intermediate',
+            'estimated_time': '45 minutes',
+            'skills': ['Data Validation', 'Formatting', 'Worksheet Protection']
+        },
+        {
+            'title': 'Advanced Formatting Workbook',
+            'description': 'Create a professionally formatted financial report with advanced Excel features.',
+            'objectives': [
+                'Apply advanced cell formatting',
+                'Create and use custom styles',
+                'Implement conditional formatting with formulas',
+                'Use sparklines for data visualization'
+            ],
+            'steps': [
+                'Import or create a dataset with financial information',
+                'Create custom cell styles for headers, totals, and important figures',
+                'Apply conditional formatting using formulas to highlight key metrics',
+                'Add sparklines to show trends within cells',
+                'Create a consistent color scheme throughout the report',
+                'Use cell protection to prevent modification of formulas'
+            ],
+            'solution_file': 'formatting_workbook_solution.xlsx',
+            'difficulty': 'Intermediate',
+            'estimated_time': '60 minutes',
+            'skills': ['Advanced Formatting', 'Conditional Formatting', 'Data Visualization']
+        }
+    ],
+    'excel_formulas': [
+        {
+            'title': 'Advanced Sales Commission Calculator',
+            'description': 'Build a sophisticated commission calculator with tiered rates and multiple conditions.',
+            'objectives': [
+                'Use nested IF statements or IFS function',
+                'Implement VLOOKUP or XLOOKUP for rate tables',
+                'Create dynamic summary reports',
+                'Use data validation for inputs'
+            ],
+            'steps': [
+                'Create a rate table with tiered commission structure',
+                'Build an input area for salesperson data and sales figures',
+                'Use appropriate lookup functions to determine commission rates',
+                'Calculate commissions with proper conditional logic',
+                'Create a summary section with totals and averages',
+                'Add data validation to ensure accurate inputs'
+            ],
+            'solution_file': 'commission_calculator_solution.xlsx',
+            'difficulty': 'Advanced',
+            'estimated_time': '75 minutes',
+            'skills': ['Lookup Functions', 'Logical Functions', 'Data Validation']
+        },
+        {
+            'title': 'Dynamic Financial Dashboard',
+            'description': 'Create an interactive financial dashboard with formulas and controls.',
+            'objectives': [
+                'Use advanced date functions',
+                'Implement dropdowns for period selection',
+                'Create dynamic charts based on formulas',
+                'Build a responsive layout'
+            ],
+            'steps': [
+                'Set up a financial dataset with date, revenue, and expense columns',
+                'Create formulas to calculate key metrics (growth rates, profit margins, etc.)',
+                'Add dropdown controls for period selection (month, quarter, year)',
+                'Build charts that update based on selection',
+                'Create a visually appealing dashboard layout',
+                'Add conditional formatting to highlight performance'
+            ],
+            'solution_file': 'financial_dashboard_solution.xlsx',
+            'difficulty': 'Advanced',
+            'estimated_time': '90 minutes',
+            'skills': ['Date Functions', 'Charting', 'Dashboard Design']
+        }
+    ]
+}
+
+# Case studies for real-world application
+case_studies = {
+    'excel_basics': [
+        {
+            'title': 'Small Business Inventory Management System',
+            'description': 'Design an inventory management solution for a small retail business.',
+            'scenario': '''
+            A small boutique needs to track inventory levels, sales, and reordering. They currently use a paper-based system 
+            but want to transition to Excel for better tracking and reporting. The system should track:
+            - Product details (SKU, name, category, supplier)
+            - Current stock levels and reorder points
+            - Sales data and trends
+            - Supplier information and lead times
+            ''',
+            'tasks': [
+                'Design an inventory tracking spreadsheet with appropriate columns',
+                'Create data validation for product categories and suppliers',
+                'Set up conditional formatting to highlight low stock items',
+                'Create a dashboard showing key inventory metrics',
+                'Protect the worksheet to prevent accidental changes to formulas',
+                'Add a reordering recommendation system'
+            ],
+            'learning_outcomes': [
+                'Designing effective spreadsheets for business use',
+                'Implementing data validation and conditional formatting',
+                'Creating basic dashboards for quick insights',
+                'Protecting worksheets to maintain data integrity',
+                'Developing automated recommendation systems'
+            ],
+            'data_provided': 'Sample product list and sales data',
+            'solution_file': 'inventory_management_solution.xlsx'
+        }
+    ],
+    'excel_formulas': [
+        {
+            'title': 'Sales Performance Analytics Platform',
+            'description': 'Build a comprehensive sales analytics platform with advanced formulas.',
+            'scenario': '''
+            A medium-sized company wants to analyze sales performance across regions, products, and salespeople.
+            They need a system that can:
+            - Calculate individual and team performance metrics
+            - Compare performance against targets
+            - Identify trends and patterns in sales data
+            - Generate commission calculations automatically
+            - Provide insights for strategic decision-making
+            ''',
+            'tasks': [
+                'Design a data structure to store sales transactions',
+                'Create a parameter table for commission rates and targets',
+                'Build formulas to calculate key performance indicators',
+                'Implement lookup functions to assign rates and targets',
+                'Create a summary dashboard with dynamic visualizations',
+                'Add scenario analysis capabilities for what-if planning'
+            ],
+            'learning_outcomes': [
+                'Designing complex data structures in Excel',
+                'Implementing advanced formula combinations',
+                'Creating dynamic reporting systems',
+                'Building what-if analysis capabilities',
+                'Developing performance measurement frameworks'
+            ],
+            'data_provided': 'Sales transaction data and target information',
+            'solution_file': 'sales_analytics_solution.xlsx'
+        }
+    ]
+}
+
+# Power BI challenges shown in the Practice Lab
+powerbi_challenges = [
+    {
+        "title": "Sales Dashboard",
+        "description": "Create an interactive sales performance dashboard",
+        "level": "Intermediate",
+        "time": "45 min",
+        "objectives": [
+            "Summarize Sales by Region, one row per region",
+            "Match the total Sales per region in the Sales Data sample (1,000 rows, seed 42)",
+            "Add slicers for Product and Date",
+            "Show a sales trend over time"
+        ],
+        "grading": {"dataset": "Sales Data", "rows": 1000, "seed": 42,
+                    "by": "Region", "value": "Sales", "agg": "sum"}
+    },
+    {
+        "title": "Customer Analytics Report",
+        "description": "Analyze customer data and create visual insights",
+        "level": "Advanced",
+        "time": "60 min",
+        "objectives": [
+            "Summarize Customer_Rating by Product, one row per product",
+            "Match the average Customer_Rating per product in the Sales Data sample (1,000 rows, seed 42)",
+            "Highlight the lowest-rated product",
+            "Add a drill-through page per product"
+        ],
+        "grading": {"dataset": "Sales Data", "rows": 1000, "seed": 42,
+                    "by": "Product", "value": "Customer_Rating", "agg": "mean"}
+    }
+]
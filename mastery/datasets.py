@@ -0,0 +1,148 @@
+"""Seeded synthetic datasets for the Practice Lab "Data Playground".
+
+Every generator is fully vectorized (one NumPy call per column), uses
+categorical dtypes for low-cardinality text and the narrowest numeric dtype
+that fits, so frames in the tens of millions of rows stay practical.
+Generated frames are memoized by ``(dataset, rows, seed)`` in a process-wide
+LRU bounded by bytes; they are shared between sessions and must be treated as
+read-only.
+"""
+
+import numpy as np
+import pandas as pd
+
+from mastery.cache import ByteLRUCache, fingerprint, frame_nbytes, set_frame_fingerprint
+
+MIN_ROWS = 1_000
+MAX_ROWS = 50_000_000
+# Sizes offered in the Practice Lab, whose engines and exports run on the script
+# thread; a million rows stays interactive and fits on one XLSX sheet
+ROW_OPTIONS = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_SEED = 42
+
+# Shared by all sessions; an entry is dropped once the total exceeds the budget
+DATASET_CACHE_BYTES = 2 << 30
+_cache = ByteLRUCache(DATASET_CACHE_BYTES, sizeof=frame_nbytes)
+
+_EPOCH = np.datetime64('2023-01-01', 'D')
+
+
+def _categorical(rng, categories, n, p=None):
+    if p is None:
+        codes = rng.integers(0, len(categories), n, dtype=np.int8)
+    else:
+        codes = rng.choice(len(categories), n, p=p).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _dates(rng, n, days=730):
+    # Sorted so the data reads like a transaction log
+    offsets = np.sort(rng.integers(0, days, n, dtype=np.int32))
+    return (_EPOCH + offsets.astype('timedelta64[D]')).astype('datetime64[ns]')
+
+
+def _sales(rng, n):
+    units = rng.integers(1, 100, n, dtype=np.int16)
+    return {
+        'Date': _dates(rng, n),
+        'Product': _categorical(rng, ['Product A', 'Product B', 'Product C', 'Product D'], n),
+        'Region': _categorical(rng, ['North', 'South', 'East', 'West'], n),
+        'Sales': rng.integers(100, 5000, n, dtype=np.int32),
+        'Units': units,
+        'Customer_Rating': rng.integers(1, 6, n, dtype=np.int8),
+    }
+
+
+def _hr(rng, n):
+    # Integer ids instead of 'Emp1000' strings keep tens of millions of rows affordable
+    return {
+        'Employee_ID': np.arange(1000, 1000 + n, dtype=np.int32),
+        'Department': _categorical(rng, ['Sales', 'Marketing', 'IT', 'HR', 'Finance'], n),
+        'Salary': rng.integers(40000, 120000, n, dtype=np.int32),
+        'Tenure': rng.integers(1, 15, n, dtype=np.int8),
+        'Performance': rng.integers(1, 11, n, dtype=np.int8),
+        'Engagement': rng.integers(1, 6, n, dtype=np.int8),
+    }
+
+
+def _financial(rng, n):
+    budget = rng.uniform(1_000, 100_000, n).astype(np.float32)
+    actual = (budget * rng.normal(1.0, 0.12, n)).astype(np.float32)
+    return {
+        'Date': _dates(rng, n),
+        'Account': _categorical(rng, ['Revenue', 'COGS', 'Operating Expense', 'Marketing', 'R&D'], n,
+                                p=[0.35, 0.25, 0.2, 0.12, 0.08]),
+        'Department': _categorical(rng, ['Sales', 'Marketing', 'IT', 'HR', 'Finance'], n),
+        'Budget': budget.round(2),
+        'Actual': actual.round(2),
+        'Variance': (actual - budget).round(2),
+    }
+
+
+def _marketing(rng, n):
+    impressions = rng.integers(1_000, 100_000, n, dtype=np.int32)
+    clicks = rng.binomial(impressions, rng.uniform(0.005, 0.06, n)).astype(np.int32)
+    conversions = rng.binomial(clicks, rng.uniform(0.01, 0.15, n)).astype(np.int32)
+    spend = (clicks * rng.uniform(0.3, 2.5, n)).astype(np.float32)
+    return {
+        'Date': _dates(rng, n),
+        'Campaign': _categorical(rng, ['Spring Launch', 'Summer Sale', 'Back to School',
+                                       'Black Friday', 'Holiday Push'], n),
+        'Channel': _categorical(rng, ['Search', 'Social', 'Email', 'Display', 'Video'], n),
+        'Impressions': impressions,
+        'Clicks': clicks,
+        'Conversions': conversions,
+        'Spend': spend.round(2),
+        'Revenue': (conversions * rng.uniform(20, 120, n)).astype(np.float32).round(2),
+    }
+
+
+def _supply_chain(rng, n):
+    lead_time = rng.gamma(4.0, 2.5, n).astype(np.float32).round(1)
+    return {
+        'Order_Date': _dates(rng, n),
+        'Supplier': _categorical(rng, ['Acme Corp', 'Globex', 'Initech', 'Umbrella', 'Stark Industries'], n),
+        'Warehouse': _categorical(rng, ['North Hub', 'South Hub', 'East Hub', 'West Hub'], n),
+        'Product': _categorical(rng, ['Product A', 'Product B', 'Product C', 'Product D'], n),
+        'Order_Qty': rng.integers(10, 1_000, n, dtype=np.int16),
+        'Unit_Cost': rng.uniform(2, 250, n).astype(np.float32).round(2),
+        'Lead_Time_Days': lead_time,
+        'On_Time': lead_time <= 12,
+    }
+
+
+GENERATORS = {
+    'Sales Data': _sales,
+    'HR Analytics': _hr,
+    'Financial Data': _financial,
+    'Marketing Campaign': _marketing,
+    'Supply Chain': _supply_chain,
+}
+DATASETS = list(GENERATORS)
+
+
+def dataset_key(name, rows, seed):
+    return fingerprint('dataset', name, int(rows), int(seed))
+
+
+def generate_dataset(name, rows=MIN_ROWS, seed=DEFAULT_SEED):
+    """Build a fresh dataset frame; prefer :func:`get_dataset`, which caches."""
+    if name not in GENERATORS:
+        raise ValueError(f"Unknown dataset {name!r}; choose one of {DATASETS}")
+    if not MIN_ROWS <= rows <= MAX_ROWS:
+        raise ValueError(f"rows must be between {MIN_ROWS:,} and {MAX_ROWS:,}, got {rows:,}")
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(GENERATORS[name](rng, int(rows)), copy=False)
+    df.attrs['dataset'] = name
+    return set_frame_fingerprint(df, dataset_key(name, rows, seed))
+
+
+def get_dataset(name, rows=MIN_ROWS, seed=DEFAULT_SEED):
+    """Return the cached dataset for ``(name, rows, seed)``, generating it on a miss."""
+    return _cache.get_or_create(
+        dataset_key(name, rows, seed), lambda: generate_dataset(name, rows, seed)
+    )
+
+
+def cache_stats():
+    return _cache.stats()
@@ -0,0 +1,830 @@
+"""A DAX subset for writing measures over playground datasets.
+
+Each dataset is a single table, so any table name is accepted in column
+references (``Sales[Units]``, ``'Sales Data'[Units]`` and ``[Units]`` all
+name the same column).  Supported:
+
+* aggregations: SUM, AVERAGE, MIN, MAX, COUNT, DISTINCTCOUNT, COUNTROWS and
+  the iterators SUMX, AVERAGEX, MINX, MAXX over a table or ``FILTER(...)``
+* CALCULATE with column predicates, FILTER and ALL; as in DAX, a predicate on
+  a column replaces the filters already on that column
+* time intelligence: SAMEPERIODLASTYEAR, DATEADD, DATESYTD and TOTALYTD
+* DIVIDE, arithmetic, comparisons, ``IN {...}``, ``&&``, ``||``, NOT, DATE,
+  YEAR, MONTH, ABS, and references to other measures
+
+Measures are parsed once into a plan (cached).  Evaluation is batched: the
+filter context of a whole matrix visual is the grid of its row and column
+fields, and every aggregation produces the values of all cells at once from
+the grid's group codes with ``bincount``.  CALCULATE filters become boolean
+row masks, cached per dataset, and filters that remove a grid field collapse
+that axis so the result broadcasts back over it.
+"""
+
+import re
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from mastery.cache import ByteLRUCache, fingerprint, frame_fingerprint, frame_nbytes
+from mastery.pivot import BLANK, DATE_PARTS, MAX_CELLS, TOTAL, field_codes
+
+MONTHS_PER = {'Year': 12, 'Quarter': 3, 'Month': 1}
+INTERVALS = {'YEAR': 12, 'QUARTER': 3, 'MONTH': 1}
+AGGREGATORS = {'SUM': 'Sum', 'AVERAGE': 'Average', 'MIN': 'Min', 'MAX': 'Max', 'COUNT': 'Count',
+               'DISTINCTCOUNT': 'Distinct'}
+ITERATORS = {'SUMX': 'Sum', 'AVERAGEX': 'Average', 'MINX': 'Min', 'MAXX': 'Max'}
+# Fewest and most arguments (None for no limit), and what they are
+SIGNATURES = {
+    **{name: (1, 1, 'one column') for name in AGGREGATORS},
+    **{name: (2, 2, 'a table and an expression') for name in ITERATORS},
+    'COUNTROWS': (0, 1, 'an optional table'),
+    'DIVIDE': (2, 3, 'a numerator, a denominator and an optional alternate result'),
+    'CALCULATE': (1, None, 'an expression and optional filters'),
+    'TOTALYTD': (2, 2, 'an expression and a date column'),
+    'FILTER': (2, 2, 'a table and a condition'),
+    'ALL': (0, None, 'an optional table or columns'),
+    'SAMEPERIODLASTYEAR': (1, 1, 'a date column'),
+    'DATESYTD': (1, 1, 'a date column'),
+    'DATEADD': (3, 3, 'a date column, a number and YEAR, QUARTER or MONTH'),
+    'DATE': (3, 3, 'a year, a month and a day'),
+    'YEAR': (1, 1, 'a date'),
+    'MONTH': (1, 1, 'a date'),
+    'ABS': (1, 1, 'one number'),
+    'BLANK': (0, 0, 'no arguments'),
+}
+
+_masks = ByteLRUCache(256 << 20, sizeof=lambda entry: sum(
+    a.nbytes for a in (entry if isinstance(entry, tuple) else (entry,)) if a is not None))
+_aggregates = ByteLRUCache(32 << 20, sizeof=lambda grid: grid.nbytes)
+_results = ByteLRUCache(32 << 20, sizeof=frame_nbytes)
+
+
+class DaxError(ValueError):
+    pass
+
+
+# Parsing
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<number>\d+\.?\d*|\.\d+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<ref>(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)?\[[^\]]+\])
+  | (?P<table>'(?:[^']|'')+')
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<op>&&|\|\||<=|>=|<>|==|[-+*/=<>(),{}])
+)""", re.VERBOSE)
+
+_COMPARISONS = {'=': 'eq', '==': 'eq', '<>': 'ne', '<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge'}
+
+
+def _tokenize(text):
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None or match.end() == pos:
+            raise DaxError(f"Unexpected character {text[pos:].lstrip()[:1]!r} at position {pos}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'ref':
+            value = value[value.index('[') + 1:-1]
+        elif kind == 'string':
+            value = value[1:-1].replace('""', '"')
+        elif kind == 'number':
+            value = float(value)
+        elif kind == 'table':
+            kind, value = 'name', value[1:-1].replace("''", "'")
+        elif kind == 'name':
+            value = value.upper()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over DAX's operator precedence; produces tuple ASTs."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self, value=None):
+        if self.i >= len(self.tokens):
+            return None
+        token = self.tokens[self.i]
+        return token if value is None or token == ('op', value) or token == ('name', value) else None
+
+    def take(self, value=None):
+        token = self.peek(value)
+        if token is None:
+            found = self.tokens[self.i][1] if self.i < len(self.tokens) else 'end of measure'
+            raise DaxError(f"Expected {value!r}, found {found!r}" if value else "Unexpected end of measure")
+        self.i += 1
+        return token
+
+    def parse(self):
+        node = self.logical_or()
+        if self.i != len(self.tokens):
+            raise DaxError(f"Unexpected {self.tokens[self.i][1]!r}")
+        return node
+
+    def logical_or(self):
+        node = self.logical_and()
+        while self.peek('||'):
+            self.take()
+            node = ('or', node, self.logical_and())
+        return node
+
+    def logical_and(self):
+        node = self.comparison()
+        while self.peek('&&'):
+            self.take()
+            node = ('and', node, self.comparison())
+        return node
+
+    def comparison(self):
+        if self.peek('NOT'):
+            self.take()
+            return ('not', self.comparison())
+        node = self.additive()
+        token = self.peek()
+        if token and token[0] == 'op' and token[1] in _COMPARISONS:
+            self.take()
+            return ('cmp', _COMPARISONS[token[1]], node, self.additive())
+        if self.peek('IN'):
+            self.take()
+            self.take('{')
+            items = [self.additive()]
+            while self.peek(','):
+                self.take()
+                items.append(self.additive())
+            self.take('}')
+            return ('in', node, tuple(items))
+        return node
+
+    def additive(self):
+        node = self.term()
+        while self.peek('+') or self.peek('-'):
+            node = ('arith', self.take()[1], node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek('*') or self.peek('/'):
+            node = ('arith', self.take()[1], node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek('-'):
+            self.take()
+            return ('neg', self.unary())
+        if self.peek('+'):
+            self.take()
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == 'number':
+            return ('num', value)
+        if kind == 'string':
+            return ('str', value)
+        if kind == 'ref':
+            return ('ref', value)
+        if kind == 'op' and value == '(':
+            node = self.logical_or()
+            self.take(')')
+            return node
+        if kind == 'name':
+            if value in ('TRUE', 'FALSE') and self.peek('('):
+                self.take('(')
+                self.take(')')
+                return ('num', float(value == 'TRUE'))
+            if self.peek('('):
+                self.take('(')
+                args = []
+                if not self.peek(')'):
+                    args.append(self.logical_or())
+                    while self.peek(','):
+                        self.take()
+                        args.append(self.logical_or())
+                self.take(')')
+                return ('call', value, tuple(args))
+            return ('table', value)
+        raise DaxError(f"Unexpected {value!r}")
+
+
+class Plan:
+    """A parsed measure."""
+
+    __slots__ = ('name', 'text', 'tree')
+
+    def __init__(self, name, text, tree):
+        self.name = name
+        self.text = text
+        self.tree = tree
+
+
+@lru_cache(maxsize=512)
+def compile_measure(text):
+    """Parse ``[Name =] expression`` into a :class:`Plan`; plans are cached by text."""
+    name = None
+    head = re.match(r"\s*(?:'([^']+)'|\[([^\]]+)\]|([A-Za-z_][\w ]*?))\s*=(?!=)", text)
+    if head and not re.match(r"\s*[A-Za-z_][\w.]*\s*\(", text):
+        name = next(g for g in head.groups() if g)
+        text = text[head.end():]
+    tokens = _tokenize(text)
+    if not tokens:
+        raise DaxError("The measure is empty")
+    tree = _Parser(tokens).parse()
+    _check_calls(tree)
+    return Plan(name, text.strip(), tree)
+
+
+def _check_calls(node):
+    """Raise a DaxError for any call with the wrong number of arguments."""
+    if not isinstance(node, tuple):
+        return
+    if node and node[0] == 'call' and node[1] in SIGNATURES:
+        fewest, most, usage = SIGNATURES[node[1]]
+        if len(node[2]) < fewest or (most is not None and len(node[2]) > most):
+            raise DaxError(f"{node[1]} takes {usage}")
+    for child in node[1:] if node and isinstance(node[0], str) else node:
+        _check_calls(child)
+
+
+# Evaluation
+
+class _Context:
+    """Filter context: grid fields per axis (None once removed), filters, date shift and YTD."""
+
+    __slots__ = ('dims', 'filters', 'shift', 'ytd')
+
+    def __init__(self, dims, filters=(), shift=0, ytd=None):
+        self.dims = dims        # per axis: (field, base column, date part) or None
+        self.filters = filters  # ((frozenset of base columns, spec), ...)
+        self.shift = shift      # months, for SAMEPERIODLASTYEAR / DATEADD
+        self.ytd = ytd          # base date column for DATESYTD, or None
+
+    def modified(self, remove=(), add=(), shift=0, ytd=None):
+        remove_all = '*' in remove
+        dims = tuple(None if dim is None or remove_all or dim[1] in remove else dim for dim in self.dims)
+        filters = tuple(f for f in self.filters if not remove_all and not (f[0] & set(remove))) + tuple(add)
+        return _Context(dims, filters, self.shift + shift, ytd or self.ytd)
+
+
+def _split_field(name):
+    base, _, part = name.rpartition(' (')
+    part = part.rstrip(')')
+    return (base, part) if base and part in DATE_PARTS else (name, None)
+
+
+def _refs(node, found=None):
+    """Base columns referenced by an expression."""
+    found = set() if found is None else found
+    if isinstance(node, tuple):
+        if node and node[0] == 'ref':
+            found.add(node[1])
+        # Nodes start with their kind; argument and item tuples are all children
+        for child in node[1:] if node and isinstance(node[0], str) else node:
+            _refs(child, found)
+    return found
+
+
+def _kind(value):
+    kind = np.asarray(value).dtype.kind
+    return 'numbers' if kind in 'iufb' else 'dates' if kind in 'Mm' else 'text'
+
+
+def _numeric(value, what):
+    """``value`` if it is a number or an array of numbers, else a DaxError for ``what``."""
+    if np.asarray(value).dtype.kind not in 'iufb':
+        raise DaxError(f"{what} needs numbers, not {_kind(value)}")
+    return value
+
+
+def _date_text(text):
+    try:
+        return np.datetime64(text, 'ns')
+    except ValueError:
+        raise DaxError(f'"{text}" is not a date') from None
+
+
+class _Evaluator:
+    def __init__(self, df, measures):
+        self.df = df
+        self.fp = frame_fingerprint(df)
+        self.measures = measures
+        self.active = set()
+        self.scans = {}  # aggregation -> [(grid fields, count, stat)] scanned in this evaluation
+
+    # Row-level data
+
+    def column(self, name):
+        if name not in self.df.columns:
+            raise DaxError(f"Unknown column [{name}]")
+        return self.df[name]
+
+    def _cached(self, *key, build):
+        return _masks.get_or_create(fingerprint('dax', self.fp, *key), build)
+
+    def months(self, base):
+        def build():
+            values = self.column(base).to_numpy()
+            if values.dtype.kind != 'M':
+                raise DaxError(f"[{base}] is not a date column")
+            months = values.astype('datetime64[M]').astype(np.int64)
+            return np.where(np.isnat(values), np.iinfo(np.int64).min, months)
+        return self._cached('months', base, build=build)
+
+    def dates(self, base, shift):
+        values = self.column(base).to_numpy()
+        if values.dtype.kind != 'M':
+            raise DaxError(f"[{base}] is not a date column")
+        if not shift:
+            return values
+        day = values - values.astype('datetime64[M]')
+        return (values.astype('datetime64[M]') + np.timedelta64(shift, 'M')).astype(values.dtype) + day
+
+    def codes(self, dim, shift):
+        """Group codes of a grid field, -1 where a shifted row falls outside the field's items."""
+        field, base, part = dim
+        codes, labels = field_codes(self.df, field)
+        if part is None or not shift:
+            return codes
+
+        def build():
+            unit = MONTHS_PER[part]
+            items = len(labels) - (labels[-1] == BLANK)
+            if shift % unit == 0:
+                keys = codes + shift // unit
+                inside = (codes < items) & (keys >= 0) & (keys < items)
+            else:
+                months = self.months(base)
+                valid = months != np.iinfo(np.int64).min
+                low = int(months[valid].min()) // unit if valid.any() else 0
+                keys = (months + shift) // unit - low
+                inside = valid & (keys >= 0) & (keys < items)
+            return np.where(inside, keys, -1).astype(np.int32)
+        return self._cached('codes', field, shift, build=build)
+
+    def row_value(self, node, shift):
+        """Vectorized value of a row expression (numbers, columns, arithmetic, predicates)."""
+        op = node[0]
+        if op == 'num':
+            return node[1]
+        if op == 'str':
+            return node[1]
+        if op == 'ref':
+            if node[1] in self.measures and node[1] not in self.df.columns:
+                raise DaxError(f"Measure [{node[1]}] cannot be used in a row expression")
+            column = self.column(node[1])
+            return self.dates(node[1], shift) if column.dtype.kind == 'M' else column.to_numpy()
+        if op == 'neg':
+            return -_numeric(self.row_value(node[1], shift), "'-'")
+        if op == 'arith':
+            left = _numeric(self.row_value(node[2], shift), repr(node[1]))
+            right = _numeric(self.row_value(node[3], shift), repr(node[1]))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.true_divide}[node[1]](left, right)
+        if op in ('and', 'or'):
+            what = '&&' if op == 'and' else '||'
+            left = _numeric(self.row_value(node[1], shift), what)
+            right = _numeric(self.row_value(node[2], shift), what)
+            return (np.logical_and if op == 'and' else np.logical_or)(left, right)
+        if op == 'not':
+            return np.logical_not(_numeric(self.row_value(node[1], shift), 'NOT'))
+        if op == 'cmp':
+            return self._compare(node[1], node[2], node[3], shift)
+        if op == 'in':
+            return self._member(node[1], node[2], shift)
+        if op == 'call':
+            return self._row_call(node[1], node[2], shift)
+        raise DaxError(f"{node[1] if op == 'table' else op} cannot be used in a row expression")
+
+    def _categorical(self, node):
+        if node[0] == 'ref' and node[1] in self.df.columns:
+            column = self.df[node[1]]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                return column
+        return None
+
+    def _compare(self, how, left, right, shift):
+        column = self._categorical(left)
+        if column is not None and right[0] == 'str' and how in ('eq', 'ne'):
+            # Compare integer codes rather than strings
+            categories = column.cat.categories
+            code = categories.get_loc(right[1]) if right[1] in categories else -2
+            result = column.cat.codes.to_numpy() == code
+            return result if how == 'eq' else ~result
+        left, right = self.row_value(left, shift), self.row_value(right, shift)
+        if np.asarray(left).dtype.kind == 'M' and isinstance(right, str):
+            right = _date_text(right)
+        elif np.asarray(right).dtype.kind == 'M' and isinstance(left, str):
+            left = _date_text(left)
+        ops = {'eq': np.equal, 'ne': np.not_equal, 'lt': np.less, 'le': np.less_equal,
+               'gt': np.greater, 'ge': np.greater_equal}
+        try:
+            return ops[how](np.asarray(left), right)
+        except TypeError:
+            raise DaxError(f"Cannot compare {_kind(left)} with {_kind(right)}") from None
+
+    def _member(self, node, items, shift):
+        column = self._categorical(node)
+        values = [self.row_value(item, shift) for item in items]
+        if column is not None:
+            keep = np.isin(np.asarray(column.cat.categories, dtype=object), values)
+            codes = column.cat.codes.to_numpy()
+            return np.where(codes >= 0, keep[codes], False)
+        return np.isin(self.row_value(node, shift), values)
+
+    def _row_call(self, name, args, shift):
+        if name == 'DATE':
+            parts = [self.row_value(a, shift) for a in args]
+            if any(np.ndim(p) or np.asarray(p).dtype.kind not in 'iuf' or not np.isfinite(p) for p in parts):
+                raise DaxError("DATE takes a year, a month and a day as numbers")
+            year, month, day = (int(p) for p in parts)
+            try:
+                if not pd.Timestamp.min.year < year < pd.Timestamp.max.year:
+                    raise ValueError
+                return np.datetime64(date(year, month, day), 'ns')
+            except ValueError:
+                raise DaxError(f"DATE({year}, {month}, {day}) is not a valid date") from None
+        if name in ('YEAR', 'MONTH'):
+            dates = np.asarray(self.row_value(args[0], shift))
+            if dates.dtype.kind != 'M':
+                raise DaxError(f"{name} needs a date, not {_kind(dates)}")
+            months = dates.astype('datetime64[M]').astype(np.int64)
+            return months // 12 + 1970 if name == 'YEAR' else months % 12 + 1
+        if name == 'ABS':
+            return np.abs(_numeric(self.row_value(args[0], shift), 'ABS'))
+        raise DaxError(f"{name} cannot be used in a row expression")
+
+    def predicate_mask(self, node, shift):
+        def build():
+            value = self.row_value(node, shift)
+            if np.asarray(value).dtype.kind not in 'iufb':
+                raise DaxError(f"A filter must be a condition such as Sales[Units] > 5, not {_kind(value)}")
+            mask = np.broadcast_to(np.asarray(value, dtype=bool), (len(self.df),))
+            return np.ascontiguousarray(mask)
+        return self._cached('predicate', node, shift, build=build)
+
+    def items_mask(self, field, allowed, shift):
+        def build():
+            base, part = _split_field(field)
+            dim = (field, base, part)
+            labels = field_codes(self.df, field)[1]
+            keep = np.append(np.isin(labels, list(allowed)), False)  # index -1 is "outside"
+            return keep[self.codes(dim, shift)]
+        return self._cached('items', field, allowed, shift, build=build)
+
+    def context_mask(self, ctx):
+        """Rows visible in ``ctx`` (before grouping), or None for all rows."""
+        specs = tuple(spec for _, spec in ctx.filters)
+        if not specs and not ctx.shift and not ctx.ytd:
+            return None
+
+        def build():
+            mask = np.ones(len(self.df), dtype=bool)
+            for spec in specs:
+                if spec[0] == 'items':
+                    mask &= self.items_mask(spec[1], spec[2], ctx.shift)
+                else:
+                    mask &= self.predicate_mask(spec[1], ctx.shift)
+            for base in self._date_columns(ctx):
+                # Shifted rows must still land inside the calendar
+                months = self.months(base)
+                valid = months != np.iinfo(np.int64).min
+                lo, hi = months[valid].min(), months[valid].max()
+                mask &= (months + ctx.shift >= lo) & (months + ctx.shift <= hi) & valid
+            if ctx.ytd and self._ytd_axis(ctx) is None:
+                # Without a date field on the grid, the year to date of the latest visible date
+                months = self.months(ctx.ytd) + ctx.shift
+                if mask.any():
+                    mask &= months // 12 == months[mask].max() // 12
+            return mask
+        return self._cached('context', specs, ctx.shift, ctx.ytd, self._ytd_axis(ctx), build=build)
+
+    def _date_columns(self, ctx):
+        if not ctx.shift:
+            return ()
+        return {dim[1] for dim in ctx.dims if dim and dim[2]} or {
+            name for name, dtype in self.df.dtypes.items() if dtype.kind == 'M'}
+
+    def _ytd_axis(self, ctx):
+        if ctx.ytd:
+            for axis, dim in enumerate(ctx.dims):
+                if dim and dim[1] == ctx.ytd and dim[2] in ('Month', 'Quarter'):
+                    return axis
+        return None
+
+    # Aggregation over the grid
+
+    def grid_cells(self, ctx):
+        """``(cell index per row, rows inside the grid or None, grid shape)`` for the context's fields."""
+        active = [(axis, dim) for axis, dim in enumerate(ctx.dims) if dim is not None]
+        sizes = [len(field_codes(self.df, dim[0])[1]) for _, dim in active]
+        shape = [1] * len(ctx.dims)
+        for (axis, _), n in zip(active, sizes):
+            shape[axis] = n
+
+        def build():
+            cells = np.zeros(len(self.df), dtype=np.int32)  # the pivot's cell limit keeps this in range
+            inside = None
+            for (_, dim), n in zip(active, sizes):
+                codes = self.codes(dim, ctx.shift)
+                if dim[2] is not None and ctx.shift:
+                    inside = codes >= 0 if inside is None else inside & (codes >= 0)
+                cells *= n
+                cells += codes
+            return cells, inside
+        key = fingerprint('dax', self.fp, 'cells', tuple(dim for _, dim in active), ctx.shift)
+        cells, inside = _masks.get_or_create(key, build)
+        return cells, inside, tuple(shape)
+
+    def aggregate(self, ctx, how, source, values=None, extra_mask=None):
+        """Values of an aggregation for every cell of the grid, as a broadcastable array.
+
+        ``source`` names what is aggregated (a column or a row expression) for the
+        cache key; ``values`` and ``extra_mask`` are callables so cache hits skip them.
+        """
+        specs = tuple(spec for _, spec in ctx.filters)
+        key = fingerprint('dax-aggregate', self.fp, ctx.dims, specs, ctx.shift, ctx.ytd, how, source)
+
+        def build():
+            count, stat = self._rollup(ctx, how, (specs, ctx.shift, ctx.ytd, how, source))
+            if count is None:
+                count, stat = self._scan(ctx, how, values and values(), extra_mask and extra_mask())
+                if how != 'Distinct':
+                    self.scans.setdefault((specs, ctx.shift, ctx.ytd, how, source), []).append(
+                        (ctx.dims, count, stat))
+            if how == 'Distinct':
+                return np.where(count > 0, stat, np.nan)
+            axis = self._ytd_axis(ctx)
+            if axis is not None:
+                count, stat = self._year_to_date(ctx, axis, how, count, stat)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = count if how == 'Count' else stat / count if how == 'Average' else stat
+            return np.where(count > 0, result, np.nan)
+        return _aggregates.get_or_create(key, build)
+
+    def _rollup(self, ctx, how, key):
+        """Per-cell ``(count, stat)`` reduced from a finer grid already scanned, else ``(None, None)``.
+
+        Totals and ALL() over an unfiltered grid field are the same rows grouped
+        by fewer fields, so they are sums (or mins/maxes) over grid axes.
+        """
+        for dims, count, stat in self.scans.get(key, ()):
+            if len(dims) != len(ctx.dims) or any(d is not None and d != f for d, f in zip(ctx.dims, dims)):
+                continue
+            if ctx.ytd and self._ytd_axis(ctx) is None and any(f and f[1] == ctx.ytd for f in dims):
+                continue  # the context mask depends on whether the date field is on the grid
+            axes = tuple(i for i, (d, f) in enumerate(zip(ctx.dims, dims)) if d is None and f is not None)
+            reduce = {'Min': np.min, 'Max': np.max}.get(how, np.sum)
+            return (count.sum(axis=axes, keepdims=True),
+                    None if stat is None else reduce(stat, axis=axes, keepdims=True))
+        return None, None
+
+    def _scan(self, ctx, how, values, extra_mask):
+        """Per-cell ``(count, stat)`` from one pass over the rows visible in ``ctx``."""
+        cells, inside, shape = self.grid_cells(ctx)
+        size = int(np.prod(shape, dtype=np.int64))
+        mask = self.context_mask(ctx)
+        for other in (inside, extra_mask):
+            if other is not None:
+                mask = other if mask is None else mask & other
+        if values is not None and np.ndim(values) == 0:
+            values = np.full(len(self.df), float(values))
+        if values is not None and values.dtype.kind == 'f':
+            valid = ~np.isnan(values)
+            mask = valid if mask is None else mask & valid
+        if mask is not None:
+            cells = cells[mask]
+            values = None if values is None else values[mask]
+
+        count = np.bincount(cells, minlength=size).astype(np.float64).reshape(shape)
+        if how == 'Distinct':
+            if self._ytd_axis(ctx) is not None:
+                raise DaxError("DISTINCTCOUNT cannot be combined with year-to-date filters")
+            # Distinct (cell, value) pairs, counted per cell
+            radix = int(values.max()) + 1 if len(values) else 1
+            pairs = np.unique(cells.astype(np.int64) * radix + values)
+            return count, np.bincount(pairs // radix, minlength=size).reshape(shape)
+        if how in ('Sum', 'Average'):
+            stat = np.bincount(cells, weights=values, minlength=size)
+        elif how in ('Min', 'Max'):
+            stat = np.full(size, np.inf if how == 'Min' else -np.inf)
+            (np.minimum if how == 'Min' else np.maximum).at(stat, cells, values.astype(np.float64))
+        else:
+            return count, None
+        return count, stat.reshape(shape)
+
+    def _year_to_date(self, ctx, axis, how, count, stat):
+        dim = ctx.dims[axis]
+        unit = MONTHS_PER[dim[2]]
+        months = self.months(dim[1])
+        low = int(months[months != np.iinfo(np.int64).min].min()) // unit
+        years = (low + np.arange(count.shape[axis])) * unit // 12
+        accumulate = {'Min': np.minimum.accumulate, 'Max': np.maximum.accumulate}.get(how, np.cumsum)
+        count, stat = count.copy(), None if stat is None else stat.copy()
+        for year in np.unique(years):
+            section = [slice(None)] * count.ndim
+            section[axis] = np.flatnonzero(years == year)
+            section = tuple(section)
+            count[section] = np.cumsum(count[section], axis=axis)
+            if stat is not None:
+                stat[section] = accumulate(stat[section], axis=axis)
+        return count, stat
+
+    # Measure expressions
+
+    def evaluate(self, node, ctx):
+        op = node[0]
+        if op == 'num':
+            return np.float64(node[1])
+        if op == 'neg':
+            return -self.evaluate(node[1], ctx)
+        if op == 'arith':
+            left, right = self.evaluate(node[2], ctx), self.evaluate(node[3], ctx)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if node[1] in '+-':
+                    # BLANK acts as zero in addition and subtraction unless both sides are blank
+                    both_blank = np.isnan(left) & np.isnan(right)
+                    left, right = np.nan_to_num(left, nan=0.0), np.nan_to_num(right, nan=0.0)
+                    result = left + right if node[1] == '+' else left - right
+                    return np.where(both_blank, np.nan, result)
+                result = left * right if node[1] == '*' else left / right
+                return np.where(np.isfinite(result), result, np.nan)
+        if op == 'ref':
+            return self._measure(node[1], ctx)
+        if op == 'call':
+            return self._call(node[1], node[2], ctx)
+        if op == 'str':
+            raise DaxError(f'Text "{node[1]}" cannot be the value of a measure')
+        raise DaxError("Column comparisons belong inside CALCULATE or FILTER")
+
+    def _measure(self, name, ctx):
+        if name not in self.measures:
+            if name in self.df.columns:
+                raise DaxError(f"[{name}] is a column; aggregate it, e.g. SUM([{name}])")
+            raise DaxError(f"Unknown measure [{name}]")
+        if name in self.active:
+            raise DaxError(f"Measure [{name}] refers to itself")
+        self.active.add(name)
+        try:
+            return self.evaluate(compile_measure(self.measures[name]).tree, ctx)
+        finally:
+            self.active.discard(name)
+
+    def _column_arg(self, node, function):
+        if node[0] != 'ref' or node[1] not in self.df.columns:
+            raise DaxError(f"{function} expects a column, e.g. {function}(Sales[Units])")
+        return node[1]
+
+    def _call(self, name, args, ctx):
+        if name in AGGREGATORS:
+            column = self._column_arg(args[0], name)
+            values = self.df[column]
+            if name == 'DISTINCTCOUNT':
+                codes = self._cached('distinct', column, build=lambda: pd.factorize(values)[0].astype(np.int64))
+                return self.aggregate(ctx, 'Distinct', column, lambda: codes, lambda: codes >= 0)
+            if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype.kind not in 'iufb':
+                if name != 'COUNT':
+                    raise DaxError(f"{name} needs a numeric column; [{column}] is {values.dtype}")
+                return self.aggregate(ctx, 'Count', column, extra_mask=lambda: values.notna().to_numpy())
+            return self.aggregate(ctx, AGGREGATORS[name], column, values.to_numpy)
+        if name == 'COUNTROWS':
+            remove, add = self._table(args[0] if args else ('table', ''), ctx)
+            return self.aggregate(ctx.modified(remove, add), 'Count', None)
+        if name in ITERATORS:
+            remove, add = self._table(args[0], ctx)
+            inner = ctx.modified(remove, add)
+            return self.aggregate(inner, ITERATORS[name], args[1], lambda: np.asarray(
+                _numeric(self.row_value(args[1], inner.shift), name), dtype=np.float64))
+        if name == 'DIVIDE':
+            numerator, denominator = self.evaluate(args[0], ctx), self.evaluate(args[1], ctx)
+            alternate = self.evaluate(args[2], ctx) if len(args) == 3 else np.nan
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = numerator / denominator
+            return np.where((denominator == 0) | np.isnan(denominator), alternate, result)
+        if name == 'CALCULATE':
+            return self.evaluate(args[0], self._apply_filters(args[1:], ctx))
+        if name == 'TOTALYTD':
+            return self.evaluate(args[0], self._apply_filters((('call', 'DATESYTD', (args[1],)),), ctx))
+        if name == 'ABS':
+            return np.abs(self.evaluate(args[0], ctx))
+        if name == 'BLANK':
+            return np.float64(np.nan)
+        raise DaxError(f"Unsupported function {name}")
+
+    def _apply_filters(self, filters, ctx):
+        remove, add, shift, ytd = set(), [], 0, None
+        for node in filters:
+            if node[0] == 'call' and node[1] in ('FILTER', 'ALL'):
+                r, a = self._table(node, ctx)
+                remove |= r
+                add.extend(a)
+            elif node[0] == 'call' and node[1] in ('SAMEPERIODLASTYEAR', 'DATEADD', 'DATESYTD'):
+                column = self._column_arg(node[2][0] if node[2] else ('num', 0), node[1])
+                self.months(column)  # validates the column type
+                if node[1] == 'SAMEPERIODLASTYEAR':
+                    shift += 12
+                elif node[1] == 'DATEADD':
+                    if len(node[2]) != 3 or node[2][2][0] != 'table' or node[2][2][1] not in INTERVALS:
+                        raise DaxError("DATEADD takes a date column, a number and YEAR, QUARTER or MONTH")
+                    # Rows are moved forward onto the periods they are compared with
+                    shift -= int(self.evaluate(node[2][1], ctx)) * INTERVALS[node[2][2][1]]
+                else:
+                    ytd = column
+            else:
+                # A boolean predicate replaces the existing filters on its columns
+                columns = frozenset(_refs(node))
+                if not columns:
+                    raise DaxError("CALCULATE filters must refer to a column")
+                remove |= columns
+                add.append((columns, ('predicate', node)))
+        return ctx.modified(remove, add, shift, ytd)
+
+    def _table(self, node, ctx):
+        """``(columns whose filters are removed, filters added)`` for a table expression."""
+        if node[0] == 'table':
+            return set(), []
+        if node[0] == 'call' and node[1] == 'ALL':
+            if not node[2] or node[2][0][0] == 'table':
+                return {'*'}, []
+            return {self._column_arg(arg, 'ALL') for arg in node[2]}, []
+        if node[0] == 'call' and node[1] == 'FILTER':
+            remove, add = self._table(node[2][0], ctx)
+            condition = node[2][1]
+            return remove, add + [(frozenset(_refs(condition)), ('predicate', condition))]
+        raise DaxError("Expected a table, FILTER(...) or ALL(...)")
+
+
+def evaluate_matrix(df, measure, rows=(), columns=(), filters=(), measures=None):
+    """Evaluate ``measure`` for every cell of a matrix visual, with row and column totals.
+
+    ``rows`` and ``columns`` are pivot fields (see :func:`mastery.pivot.pivot_fields`),
+    ``filters`` ``(field, allowed items)`` pairs and ``measures`` a dict of
+    named measures the expression may reference.  Totals are the measure
+    evaluated in the total's own filter context, as in Power BI.
+    """
+    measures = dict(measures or {})
+    filters = tuple((field, tuple(sorted(allowed))) for field, allowed in filters)
+    key = fingerprint('dax-matrix', frame_fingerprint(df), measure, sorted(measures.items()),
+                      tuple(rows), tuple(columns), filters)
+    cached = _results.get(key)
+    if cached is not None:
+        return cached
+
+    plan = compile_measure(measure)
+    fields = list(rows) + list(columns)
+    if len(set(fields)) != len(fields):
+        raise DaxError("A field can be used only once across rows and columns")
+    dims = tuple((field, *_split_field(field)) for field in fields)
+    size = int(np.prod([len(field_codes(df, field)[1]) for field in fields], dtype=np.int64))
+    if size > MAX_CELLS:
+        raise DaxError(f"This matrix has {size:,} cells; remove a field or use fewer items")
+    base_filters = tuple((frozenset([_split_field(field)[0]]), ('items', field, allowed))
+                         for field, allowed in filters)
+    evaluator = _Evaluator(df, measures)
+    n_rows = len(rows)
+
+    def grid(keep_rows, keep_columns):
+        kept = tuple(dim if (axis < n_rows and keep_rows) or (axis >= n_rows and keep_columns) else None
+                     for axis, dim in enumerate(dims))
+        shape = tuple(len(field_codes(df, dim[0])[1]) if dim else 1 for dim in kept)
+        return np.broadcast_to(evaluator.evaluate(plan.tree, _Context(kept, base_filters)), shape)
+
+    cells = grid(True, True)
+    row_totals = grid(True, False)
+    column_totals = grid(False, True)
+    grand_total = grid(False, False)
+
+    # Keep the row and column items that have a value anywhere
+    labels = [field_codes(df, field)[1] for field in fields]
+    row_shape, col_shape = cells.shape[:n_rows], cells.shape[n_rows:]
+    flat = cells.reshape(int(np.prod(row_shape, dtype=np.int64)), int(np.prod(col_shape, dtype=np.int64)))
+    row_totals = row_totals.reshape(flat.shape[0])
+    column_totals = column_totals.reshape(flat.shape[1])
+    row_keep = np.flatnonzero(~np.isnan(flat).all(axis=1) | ~np.isnan(row_totals)) if rows else np.empty(0, int)
+    col_keep = np.flatnonzero(~np.isnan(flat).all(axis=0) | ~np.isnan(column_totals)) if columns else np.empty(0, int)
+
+    # Detail cells with a total column on the right and a total row at the bottom
+    values = np.empty((len(row_keep) + 1, len(col_keep) + 1))
+    values[:-1, :-1] = flat[np.ix_(row_keep, col_keep)]
+    values[:-1, -1] = row_totals[row_keep]
+    values[-1, :-1] = column_totals[col_keep]
+    values[-1, -1] = grand_total.reshape(-1)[0]
+
+    header = [' | '.join(labels[n_rows + i][k] for i, k in enumerate(np.unravel_index(c, col_shape)))
+              for c in col_keep]
+    header.append(TOTAL if columns else plan.name or 'Value')
+    index = [tuple(labels[i][k] for i, k in enumerate(np.unravel_index(r, row_shape))) for r in row_keep]
+    index.append((TOTAL,) + ('',) * (n_rows - 1) if rows else (TOTAL,))
+    result = pd.DataFrame(values, columns=header)
+    result.index = pd.MultiIndex.from_tuples(index, names=list(rows)) if n_rows > 1 else pd.Index(
+        [i[0] for i in index], name=rows[0] if rows else None)
+    if columns:
+        result.columns.name = ' | '.join(columns)
+    return _results.put(key, result)
@@ -0,0 +1,124 @@
+"""Server-side downsampling of line-chart series.
+
+A line chart cannot show more than a couple of points per horizontal pixel,
+so a long series is reduced to the chart's width before it is sent to the
+browser.  LTTB (largest-triangle-three-buckets) keeps, per bucket, the point
+that forms the largest triangle with its neighbours, which preserves the
+visual shape; min/max bucketing keeps each bucket's extremes, so no spike is
+ever hidden.  Zooming into a window re-runs the reduction on that window
+only, and once a window has fewer points than pixels every raw point is
+shown.
+
+Sorted, NaN-free series are cached per (frame, x, y) and reduced points per
+(series, method, width, window).
+"""
+
+import numpy as np
+
+from mastery.cache import ByteLRUCache, fingerprint, frame_fingerprint
+
+METHODS = ('LTTB', 'Min/Max')
+WIDTHS = (800, 1600, 3200)  # chart resolutions in pixels; Streamlit does not report the rendered width
+DEFAULT_WIDTH = 1600
+
+
+def _nbytes(entry):
+    return sum(getattr(part, 'nbytes', 64) for part in entry)
+
+
+_series = ByteLRUCache(512 << 20, sizeof=_nbytes)
+_points = ByteLRUCache(64 << 20, sizeof=_nbytes)
+
+
+def lttb(x, y, points):
+    """Indices of the ``points`` samples LTTB keeps from the series ``(x, y)``."""
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    # The first and last points are always kept; the rest is split into points - 2 buckets
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1, dtype=np.float64) / sizes
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1, dtype=np.float64) / sizes
+    mean_x = np.append(mean_x[1:], float(x[-1]))  # the next bucket's average, per bucket
+    mean_y = np.append(mean_y[1:], float(y[-1]))
+
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    ax, ay = float(x[0]), float(y[0])
+    for i in range(points - 2):
+        start, stop = edges[i], edges[i + 1]
+        bx = x[start:stop].astype(np.float64)
+        by = y[start:stop].astype(np.float64)
+        # Twice the triangle area (a, b, c); the constant factor does not change the argmax
+        area = np.abs((ax - mean_x[i]) * (by - ay) - (ax - bx) * (mean_y[i] - ay))
+        best = start + int(np.argmax(area))
+        keep[i + 1] = best
+        ax, ay = float(x[best]), float(y[best])
+    return keep
+
+
+def minmax(y, buckets):
+    """Indices of the minimum and maximum of ``y`` in each of ``buckets`` equal runs of points."""
+    n = len(y)
+    if 2 * buckets >= n:
+        return np.arange(n)
+    size = -(-n // buckets)
+    rows = -(-n // size)
+    padded = np.empty(rows * size, dtype=np.float64)
+    padded[:n] = y
+    padded[n:] = np.inf
+    low = padded.reshape(rows, size).argmin(axis=1)
+    padded[n:] = -np.inf
+    high = padded.reshape(rows, size).argmax(axis=1)
+    offsets = np.arange(rows) * size
+    return np.unique(np.concatenate([[0, n - 1], offsets + low, offsets + high]))
+
+
+def series(df, x, y):
+    """``(x values, y values)`` of two columns, sorted by x with null points dropped, cached."""
+    def build():
+        xs, ys = df[x].to_numpy(), df[y].to_numpy()
+        valid = None
+        if xs.dtype.kind == 'M':
+            valid = ~np.isnat(xs)
+        if ys.dtype.kind == 'f':
+            valid = ~np.isnan(ys) if valid is None else valid & ~np.isnan(ys)
+        if valid is not None and not valid.all():
+            xs, ys = xs[valid], ys[valid]
+        if len(xs) > 1 and (xs[1:] < xs[:-1]).any():
+            order = np.argsort(xs, kind='stable')
+            xs, ys = xs[order], ys[order]
+        return xs, ys
+    return _series.get_or_create(fingerprint('series', frame_fingerprint(df), x, y), build)
+
+
+def downsample(df, x, y, method='LTTB', width=DEFAULT_WIDTH, x_range=None):
+    """The points of ``df[y]`` over ``df[x]`` to draw at ``width`` pixels, and the raw count in view.
+
+    ``x_range`` is an optional inclusive ``(low, high)`` window of x values;
+    the points just outside it are kept so the line runs to the chart's edges.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}; choose one of {METHODS}")
+
+    def build():
+        xs, ys = series(df, x, y)
+        if x_range is not None:
+            low, high = np.asarray(x_range, dtype=xs.dtype)
+            start = max(int(np.searchsorted(xs, low, 'left')) - 1, 0)
+            stop = min(int(np.searchsorted(xs, high, 'right')) + 1, len(xs))
+            xs, ys = xs[start:stop], ys[start:stop]
+        # Datetimes are reduced on their integer ticks
+        ticks = xs.view(np.int64) if xs.dtype.kind == 'M' else xs
+        # Min/max keeps two points per bucket, so both methods send about ``width`` points
+        keep = lttb(ticks, ys, width) if method == 'LTTB' else minmax(ys, width // 2)
+        return xs[keep], ys[keep], np.int64(len(xs))
+
+    key = fingerprint('downsample', frame_fingerprint(df), x, y, method, width, x_range)
+    xs, ys, total = _points.get_or_create(key, build)
+    return xs, ys, int(total)
+
+
+def cache_stats():
+    return {'series': _series.stats(), 'points': _points.stats()}
@@ -0,0 +1,121 @@
+"""Append-only, columnar log of learning events.
+
+Each column is a preallocated NumPy array that doubles in capacity when full,
+so appends are amortized O(1) and never rebuild a DataFrame.  Reads hand out
+views of the filled prefix (``to_frame`` builds a DataFrame over them without
+copying), which is what the analytics tab consumes.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+EVENT_KINDS = ('lesson_completed', 'quiz_answer', 'exercise_started', 'time_on_page',
+               'exercise_graded')
+KIND_CODES = {kind: code for code, kind in enumerate(EVENT_KINDS)}
+NO_MODULE = -1
+
+_SCHEMA = (
+    ('timestamp', np.int64),  # ns since the epoch
+    ('kind', np.int8),        # index into EVENT_KINDS
+    ('module', np.int16),     # index into EventLog.modules, NO_MODULE if none
+    ('item', np.int32),       # lesson / question / exercise index, -1 if none
+    ('value', np.float32),    # seconds for time_on_page, 1.0/0.0 for quiz answers, score for grades
+)
+
+
+class EventLog:
+    """Growable column store for learning events."""
+
+    __slots__ = ('_columns', '_size', 'modules', '_module_codes')
+
+    # Starts small: every session holds a log, and most sessions log few events
+    def __init__(self, capacity=32):
+        self._columns = {name: np.empty(capacity, dtype) for name, dtype in _SCHEMA}
+        self._size = 0
+        self.modules = []
+        self._module_codes = {}
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._columns['timestamp'])
+
+    @property
+    def nbytes(self):
+        return sum(col.nbytes for col in self._columns.values())
+
+    def module_code(self, module):
+        if module is None:
+            return NO_MODULE
+        code = self._module_codes.get(module)
+        if code is None:
+            code = self._module_codes[module] = len(self.modules)
+            self.modules.append(module)
+        return code
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, 2 * self.capacity)
+        for name, col in self._columns.items():
+            grown = np.empty(capacity, col.dtype)
+            grown[:self._size] = col[:self._size]
+            self._columns[name] = grown
+
+    def append(self, kind, module=None, item=-1, value=0.0, timestamp=None):
+        self._reserve(1)
+        i = self._size
+        cols = self._columns
+        cols['timestamp'][i] = time.time_ns() if timestamp is None else timestamp
+        cols['kind'][i] = KIND_CODES[kind]
+        cols['module'][i] = self.module_code(module)
+        cols['item'][i] = item
+        cols['value'][i] = value
+        self._size = i + 1
+
+    def extend(self, kind, modules, items=None, values=None, timestamps=None):
+        """Append a batch of events of one kind in a single copy per column."""
+        n = len(modules)
+        self._reserve(n)
+        start, stop = self._size, self._size + n
+        cols = self._columns
+        cols['timestamp'][start:stop] = time.time_ns() if timestamps is None else timestamps
+        cols['kind'][start:stop] = KIND_CODES[kind]
+        cols['module'][start:stop] = [self.module_code(m) for m in modules]
+        cols['item'][start:stop] = -1 if items is None else items
+        cols['value'][start:stop] = 0.0 if values is None else values
+        self._size = stop
+
+    def column(self, name, start=0):
+        """View (not a copy) of one column from ``start`` to the end of the log."""
+        return self._columns[name][start:self._size]
+
+    def columns(self, start=0):
+        return {name: self.column(name, start) for name, _ in _SCHEMA}
+
+    def total(self, kind, since=None):
+        """Sum of ``value`` over events of ``kind``, optionally from ``since`` (ns) on."""
+        mask = self.column('kind') == KIND_CODES[kind]
+        if since is not None:
+            mask &= self.column('timestamp') >= since
+        return float(self.column('value')[mask].sum(dtype=np.float64))
+
+    def to_frame(self, start=0):
+        """DataFrame over the log without copying the numeric columns.
+
+        Appends only write past the current end, so the frame is a stable
+        snapshot even as the log keeps growing.
+        """
+        cols = self.columns(start)
+        return pd.DataFrame({
+            'timestamp': cols['timestamp'].view('datetime64[ns]'),
+            'kind': pd.Categorical.from_codes(cols['kind'], categories=EVENT_KINDS),
+            'module': pd.Categorical.from_codes(cols['module'], categories=self.modules or ['']),
+            'item': cols['item'],
+            'value': cols['value'],
+        }, copy=False)
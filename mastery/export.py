@@ -0,0 +1,129 @@
+"""On-demand, chunked export of playground datasets.
+
+Exports are written to temporary files one chunk of rows at a time, so peak
+memory is bounded by the chunk size rather than by the size of the frame.
+Finished files are cached per (dataset fingerprint, format) and reused by
+every session until they are evicted, which also deletes the file.
+"""
+
+import gzip
+import os
+import tempfile
+
+from mastery.cache import ByteLRUCache, frame_fingerprint
+from mastery.lazy import lazy_import
+
+# Only loaded when a learner asks for that format
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+openpyxl = lazy_import('openpyxl')
+
+CHUNK_ROWS = 200_000
+EXCEL_MAX_ROWS = 1_048_575  # one row per sheet is taken by the header
+
+FORMATS = {
+    'CSV (gzip)': {'suffix': '.csv.gz', 'mime': 'application/gzip'},
+    'Parquet': {'suffix': '.parquet', 'mime': 'application/vnd.apache.parquet'},
+    'Excel (XLSX)': {
+        'suffix': '.xlsx',
+        'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    },
+}
+
+EXPORT_CACHE_BYTES = 4 << 30
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'mastery-exports')
+
+
+def _remove(_key, path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_cache = ByteLRUCache(EXPORT_CACHE_BYTES, sizeof=os.path.getsize, on_evict=_remove)
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _write_csv_gz(df, path, chunk_rows):
+    # One encoded block per chunk; many tiny text-mode writes into gzip are far slower
+    with gzip.open(path, 'wb', compresslevel=5) as f:
+        for i, chunk in enumerate(_chunks(df, chunk_rows)):
+            f.write(chunk.to_csv(header=(i == 0), index=False).encode('utf-8'))
+
+
+def _write_parquet(df, path, chunk_rows):
+    writer = None
+    try:
+        for chunk in _chunks(df, chunk_rows):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_xlsx(df, path, chunk_rows):
+    # write_only streams rows to disk instead of building the sheet in memory
+    workbook = openpyxl.Workbook(write_only=True)
+    header = [str(c) for c in df.columns]
+    for sheet_no, start in enumerate(range(0, max(len(df), 1), EXCEL_MAX_ROWS)):
+        sheet = workbook.create_sheet(f"Data {sheet_no + 1}" if sheet_no else "Data")
+        sheet.append(header)
+        part = df.iloc[start:start + EXCEL_MAX_ROWS]
+        for chunk in _chunks(part, chunk_rows):
+            for row in chunk.itertuples(index=False, name=None):
+                sheet.append(row)
+    workbook.save(path)
+
+
+_WRITERS = {
+    'CSV (gzip)': _write_csv_gz,
+    'Parquet': _write_parquet,
+    'Excel (XLSX)': _write_xlsx,
+}
+
+
+def export_key(df, fmt):
+    return (frame_fingerprint(df), fmt)
+
+
+def cached_export(df, fmt):
+    """Path of an already finished export, or None without doing any work."""
+    path = _cache.get(export_key(df, fmt))
+    if path is not None and not os.path.exists(path):
+        return None
+    return path
+
+
+def export_dataset(df, fmt, chunk_rows=CHUNK_ROWS):
+    """Write ``df`` in ``fmt`` (a key of FORMATS) and return the file path."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose one of {list(FORMATS)}")
+    path = cached_export(df, fmt)
+    if path is not None:
+        return path
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    fingerprint, _ = export_key(df, fmt)
+    path = os.path.join(EXPORT_DIR, fingerprint + FORMATS[fmt]['suffix'])
+    # Write to a temp name so a concurrent reader never sees a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=EXPORT_DIR, suffix=FORMATS[fmt]['suffix'])
+    os.close(fd)
+    try:
+        _WRITERS[fmt](df, tmp_path, chunk_rows)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove(None, tmp_path)
+        raise
+    return _cache.put(export_key(df, fmt), path)
+
+
+def file_name(dataset_name, fmt):
+    return dataset_name.replace(' ', '_') + FORMATS[fmt]['suffix']
@@ -0,0 +1,76 @@
+"""Quiz grading compiled to arrays.
+
+Each module's questions are compiled once into an array of correct option
+indices and an array of point weights.  A submission is an array of chosen
+option indices (``UNANSWERED`` for blanks), so grading one learner is a single
+comparison and dot product, and grading a whole cohort is the same operation
+over a ``(submissions, questions)`` matrix.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from mastery.catalog import get_catalog
+
+UNANSWERED = -1
+
+
+class QuizKey:
+    """Answer key for one module's quiz."""
+
+    __slots__ = ('module', 'correct', 'points', 'total_points', '_option_index')
+
+    def __init__(self, module, questions):
+        self.module = module
+        self.correct = np.array([q['correct'] for q in questions], dtype=np.int8)
+        self.points = np.array([q['points'] for q in questions], dtype=np.int32)
+        self.total_points = int(self.points.sum())
+        self._option_index = [{opt: i for i, opt in enumerate(q['options'])} for q in questions]
+
+    def __len__(self):
+        return len(self.correct)
+
+    def encode(self, answers):
+        """Option strings (or None) per question to an index array."""
+        return np.array(
+            [UNANSWERED if a is None else self._option_index[i].get(a, UNANSWERED)
+             for i, a in enumerate(answers)],
+            dtype=np.int8,
+        )
+
+    def is_correct(self, question, answer):
+        return self._option_index[question].get(answer, UNANSWERED) == self.correct[question]
+
+    def grade(self, answer_idx):
+        """Return ``(score, correct_mask)`` for one submission."""
+        correct = np.asarray(answer_idx) == self.correct
+        return int(self.points @ correct), correct
+
+    def grade_batch(self, answer_matrix):
+        """Scores for many submissions, one row per submission."""
+        return (np.asarray(answer_matrix) == self.correct) @ self.points
+
+
+class GradingEngine:
+    """Compiled answer keys for every quiz in the catalog."""
+
+    def __init__(self, quizzes):
+        self.keys = {module: QuizKey(module, questions) for module, questions in quizzes.items()}
+
+    def __contains__(self, module):
+        return module in self.keys
+
+    def __getitem__(self, module):
+        return self.keys[module]
+
+    def grade(self, module, answer_idx):
+        return self.keys[module].grade(answer_idx)
+
+    def grade_batch(self, module, answer_matrix):
+        return self.keys[module].grade_batch(answer_matrix)
+
+
+@lru_cache(maxsize=None)
+def get_grading_engine():
+    return GradingEngine(get_catalog().quizzes)
@@ -0,0 +1,372 @@
+"""Ingest of learner-uploaded CSV and Excel files for the Data Playground.
+
+An upload is parsed once per distinct content.  Rows are read in chunks,
+twice: the first pass infers a type per column (the narrowest integer, a
+float32 when every value's text survives the round trip, booleans, dates with
+one guessed format, categoricals for text with few distinct values), the second
+converts each chunk to that type and appends it to an uncompressed Arrow IPC
+file, so peak memory is one chunk plus the finished frame.  Workbooks are
+streamed from a read-only sheet; their rows are spilled to a scratch Arrow
+file during the first pass so the slow XLSX parse happens only once.
+
+Converted files are named by a hash of the upload's bytes and kept under a
+byte budget on disk.  Loading the same content again, from any session or
+after a restart, memory-maps that file instead of parsing it.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import date, datetime, time
+
+import numpy as np
+import pandas as pd
+
+from mastery.cache import ByteLRUCache, fingerprint, frame_nbytes, set_frame_fingerprint
+from mastery.lazy import lazy_import
+
+pa = lazy_import('pyarrow')
+pc = lazy_import('pyarrow.compute')
+openpyxl = lazy_import('openpyxl')
+
+UPLOAD_TYPES = ('csv', 'xlsx')
+CHUNK_ROWS = 200_000
+HASH_BLOCK = 8 << 20
+CATEGORY_MAX_ITEMS = 1_000  # text columns with at most this many distinct values become categoricals
+
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'mastery-uploads')
+UPLOAD_DISK_BYTES = 8 << 30
+UPLOAD_CACHE_BYTES = 2 << 30
+
+
+class UploadError(ValueError):
+    pass
+
+
+def _remove(_key, path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Converted files by content hash; evicting an entry deletes its file
+_files = ByteLRUCache(UPLOAD_DISK_BYTES, sizeof=os.path.getsize, on_evict=_remove)
+# Opened frames by content hash, shared by all sessions and read-only
+_frames = ByteLRUCache(UPLOAD_CACHE_BYTES, sizeof=frame_nbytes)
+# Content hash by upload id, so a rerun does not hash the same bytes again
+_hashes = ByteLRUCache(4096, sizeof=lambda _: 1)
+
+
+def _adopt_existing_files():
+    # Files converted before a restart count against the budget, oldest first
+    try:
+        names = os.listdir(UPLOAD_DIR)
+    except OSError:
+        return
+    paths = [os.path.join(UPLOAD_DIR, n) for n in names if n.endswith('.arrow') and len(n) == 38]
+    for path in sorted(paths, key=os.path.getmtime):
+        _files.put(os.path.basename(path)[:-6], path)
+
+
+_adopt_existing_files()
+
+
+def content_hash(file):
+    """Hex digest of a binary file object's bytes, read in blocks."""
+    file_id = getattr(file, 'file_id', None)
+    if file_id is not None:
+        digest = _hashes.get(file_id)
+        if digest is not None:
+            return digest
+    hasher = hashlib.blake2b(digest_size=16)
+    file.seek(0)
+    for block in iter(lambda: file.read(HASH_BLOCK), b''):
+        hasher.update(block)
+    file.seek(0)
+    digest = hasher.hexdigest()
+    if file_id is not None:
+        _hashes.put(file_id, digest)
+    return digest
+
+
+class _ColumnType:
+    """What the first pass has learned about one column; every guess can only be ruled out."""
+
+    __slots__ = ('nulls', 'valid', 'numeric', 'integral', 'exact32', 'lo', 'hi',
+                 'boolean', 'date_format', 'items')
+
+    def __init__(self):
+        self.nulls = 0
+        self.valid = 0
+        self.numeric = self.integral = self.exact32 = self.boolean = True
+        self.lo = self.hi = None
+        self.date_format = None  # None until guessed, False once ruled out
+        self.items = set()  # None once there are too many to make a categorical
+
+    def add(self, column):
+        values = column[column.notna()]
+        self.nulls += len(column) - len(values)
+        if not len(values):
+            return
+        self.valid += len(values)
+        if self.numeric:
+            numbers = _numbers(values)
+            if numbers is None or not np.isfinite(numbers).all():
+                # Not a number, or out of float64 range like 1e400: keep the text
+                self.numeric = False
+            else:
+                if self.integral:
+                    integers = _integers(values)
+                    if integers is None and bool(np.all(numbers == np.trunc(numbers))) \
+                            and np.abs(numbers).max() < 2 ** 53:
+                        integers = numbers.astype(np.int64)  # whole numbers written as 1.0 or +5
+                    if integers is None:
+                        self.integral = False
+                        # Digit strings too long for an int64 are IDs, not measurements
+                        digits = pc.match_substring_regex(pa.array(values, type=pa.string()), r'^[+-]?\d+$')
+                        self.numeric = not bool((np.abs(numbers[digits.to_numpy(zero_copy_only=False)])
+                                                 >= 2 ** 63).any())
+                    else:
+                        lo, hi = integers.min(), integers.max()
+                        self.lo = lo if self.lo is None else min(self.lo, lo)
+                        self.hi = hi if self.hi is None else max(self.hi, hi)
+                self.exact32 = self.exact32 and _exact32(numbers)
+        if self.boolean:
+            self.boolean = bool(values.str.lower().isin(('true', 'false')).all())
+        if not self.numeric and self.date_format is not False:
+            if self.date_format is None:
+                self.date_format = pd.tseries.api.guess_datetime_format(values.iloc[0]) or False
+            if self.date_format and pd.to_datetime(values, format=self.date_format, errors='coerce').isna().any():
+                self.date_format = False
+        if self.items is not None:
+            self.items.update(values.unique())
+            if len(self.items) > CATEGORY_MAX_ITEMS:
+                self.items = None
+
+    def conversion(self):
+        """``(kind, argument)`` for :func:`_convert`."""
+        if not self.valid:
+            return 'text', None
+        if self.boolean and not self.nulls:
+            return 'bool', None
+        if self.numeric:
+            if self.integral and not self.nulls:
+                for dtype in (np.int8, np.int16, np.int32, np.int64):
+                    info = np.iinfo(dtype)
+                    if info.min <= self.lo and self.hi <= info.max:
+                        return 'integer', np.dtype(dtype)
+            if self.integral and max(abs(int(self.lo)), abs(int(self.hi))) >= 2 ** 53:
+                return 'text', None  # a float column with nulls would round these integers
+            return 'number', np.dtype(np.float32 if self.exact32 else np.float64)
+        if self.date_format:
+            return 'date', self.date_format
+        if self.items is not None:
+            return 'category', sorted(self.items)
+        return 'text', None
+
+
+def _numbers(column):
+    """float64 values of a text column (NaN for nulls), or None if any value is not a number."""
+    # Arrow parses strings to numbers in C; pd.to_numeric goes through Python objects
+    try:
+        numbers = pc.cast(pa.array(column, type=pa.string(), from_pandas=True), pa.float64())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    return numbers.to_numpy(zero_copy_only=False)
+
+
+def _integers(column):
+    """int64 values of a text column without nulls, or None unless every value is an integer literal."""
+    try:
+        integers = pc.cast(pa.array(column, type=pa.string(), from_pandas=True), pa.int64())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    return integers.to_numpy(zero_copy_only=False)
+
+
+def _exact32(numbers):
+    """Whether every float64 in ``numbers`` prints back the same after a trip through float32."""
+    # Arrow prints the shortest text that round-trips, so 0.1 survives and 16777217 does not
+    with np.errstate(over='ignore'):
+        text = pc.cast(pa.array(numbers.astype(np.float32)), pa.string())
+    return bool(np.array_equal(pc.cast(text, pa.float64()).to_numpy(zero_copy_only=False), numbers))
+
+
+def _convert(column, kind, argument):
+    if kind == 'integer':
+        integers = _integers(column)
+        if integers is None:
+            integers = _numbers(column)  # whole numbers written as 1.0 or +5
+        return integers.astype(argument)
+    if kind == 'number':
+        return _numbers(column).astype(argument)
+    if kind == 'bool':
+        return column.str.lower().eq('true').to_numpy(dtype=bool)
+    if kind == 'date':
+        return pd.to_datetime(column, format=argument, errors='coerce').to_numpy().astype('datetime64[ns]')
+    if kind == 'category':
+        return pd.Categorical(column, categories=argument)
+    return column
+
+
+def _csv_chunks(file, chunk_rows):
+    file.seek(0)
+    try:
+        # Everything is read as text; the passes decide the types
+        with pd.read_csv(file, dtype=str, chunksize=chunk_rows, encoding='utf-8-sig',
+                         encoding_errors='replace', skipinitialspace=True) as reader:
+            yield from reader
+    except (pd.errors.EmptyDataError, pd.errors.ParserError) as exc:
+        raise UploadError(f"Could not read the CSV file: {exc}") from exc
+
+
+def _cell_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return repr(value)
+
+
+def _column_names(header):
+    names, seen = [], set()
+    for i, value in enumerate(header):
+        name = str(value).strip() if value is not None and str(value).strip() else f"Column {i + 1}"
+        base, n = name, 1
+        while name in seen:
+            n += 1
+            name = f"{base} ({n})"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _xlsx_chunks(file, chunk_rows):
+    file.seek(0)
+    try:
+        # read_only streams rows from the sheet XML instead of loading the workbook
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as exc:  # openpyxl raises zipfile, XML and its own errors
+        raise UploadError(f"Could not read the Excel file: {exc}") from exc
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise UploadError("The first sheet of the workbook is empty")
+        names = _column_names(header)
+        width = len(names)
+        batch, chunks = [], 0
+        for row in rows:
+            batch.append([_cell_text(v) for v in row[:width]] + [None] * (width - len(row)))
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=names, dtype='str')
+                batch, chunks = [], chunks + 1
+        if batch or not chunks:
+            yield pd.DataFrame(batch, columns=names, dtype='str')
+    finally:
+        workbook.close()
+
+
+def _spilled(chunks, path):
+    """Pass ``chunks`` through while appending them to a scratch Arrow file at ``path``."""
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pa.ipc.new_file(path, table.schema)
+            writer.write_table(table)
+            yield chunk
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _read_spilled(path):
+    source = pa.memory_map(path)
+    reader = pa.ipc.open_file(source)
+    for i in range(reader.num_record_batches):
+        yield reader.get_batch(i).to_pandas()
+
+
+def _write_arrow(first_pass, second_pass, path):
+    types = None
+    for chunk in first_pass:
+        if types is None:
+            types = {name: _ColumnType() for name in chunk.columns}
+        for name, column_type in types.items():
+            column_type.add(chunk[name])
+    if types is None:
+        raise UploadError("The file has no columns")
+    conversions = {name: column_type.conversion() for name, column_type in types.items()}
+
+    writer = schema = None
+    try:
+        for chunk in second_pass():
+            frame = pd.DataFrame({name: _convert(chunk[name], *conversions[name]) for name in conversions})
+            if writer is None:
+                schema = pa.Schema.from_pandas(frame, preserve_index=False)
+                writer = pa.ipc.new_file(path, schema)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _convert_upload(file, name, digest, chunk_rows):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, digest + '.arrow')
+    # Write to a temp name so a concurrent reader never sees a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix='.tmp')
+    os.close(fd)
+    spill_path = None
+    try:
+        if name.lower().endswith('.xlsx'):
+            fd, spill_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix='.spill')
+            os.close(fd)
+            first_pass = _spilled(_xlsx_chunks(file, chunk_rows), spill_path)
+            _write_arrow(first_pass, lambda: _read_spilled(spill_path), tmp_path)
+        else:
+            _write_arrow(_csv_chunks(file, chunk_rows), lambda: _csv_chunks(file, chunk_rows), tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove(None, tmp_path)
+        raise
+    finally:
+        if spill_path is not None:
+            _remove(None, spill_path)
+    return _files.put(digest, path)
+
+
+def _open(path, digest):
+    # Columns without nulls map straight onto the file's pages, so opening is
+    # near-instant and untouched columns are never read from disk
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return set_frame_fingerprint(table.to_pandas(split_blocks=True), fingerprint('upload', digest))
+
+
+def load_upload(file, name=None, chunk_rows=CHUNK_ROWS):
+    """DataFrame for an uploaded CSV or XLSX file object, and where it came from.
+
+    The second value is ``'memory'`` (already open in this process), ``'disk'``
+    (a converted file was memory-mapped) or ``'parsed'`` (converted just now).
+    Frames are shared between sessions and must be treated as read-only.
+    """
+    name = name or getattr(file, 'name', '') or 'upload.csv'
+    digest = content_hash(file)
+    df = _frames.get(digest)
+    if df is not None:
+        return df, 'memory'
+    source = 'disk'
+    path = _files.get(digest)
+    if path is None or not os.path.exists(path):
+        path = _convert_upload(file, name, digest, chunk_rows)
+        source = 'parsed'
+    return _frames.put(digest, _open(path, digest)), source
+
+
+def cache_stats():
+    return {'frames': _frames.stats(), 'files': _files.stats()}
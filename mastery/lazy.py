@@ -0,0 +1,143 @@
+"""Deferred imports and a cold-start profile.
+
+``lazy_import('plotly.express')`` returns a stand-in that imports the real
+module on first attribute access, so a worker only pays for heavy libraries
+when a view actually uses them.  Every deferred import is timed into
+:data:`startup_profile`, which also records how long the process took to
+finish its first script run (time to first render).
+
+Run ``python -m mastery.lazy`` for an import-time breakdown of the app's
+heavy dependencies, each measured cold in a fresh interpreter.
+"""
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Heavy libraries the app and its features may import
+HEAVY_MODULES = (
+    'streamlit', 'pandas', 'numpy', 'plotly.express', 'plotly.graph_objects',
+    'pyarrow.parquet', 'openpyxl',
+)
+
+
+def _process_start():
+    """Wall-clock time the process started, falling back to now."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.time()
+
+
+class StartupProfile:
+    """Timings collected while a worker warms up."""
+
+    def __init__(self):
+        self.process_start = _process_start()
+        self.imports = {}
+        self.first_render = None
+        self.first_run_seconds = None
+        self._lock = threading.Lock()
+
+    def record_import(self, name, seconds):
+        with self._lock:
+            self.imports[name] = seconds
+
+    def mark_first_render(self, run_started):
+        """Call at the end of a script run; only the first call per process counts."""
+        with self._lock:
+            if self.first_render is None:
+                self.first_render = time.time()
+                self.first_run_seconds = time.perf_counter() - run_started
+
+    def report(self):
+        return {
+            'time_to_first_render_s': None if self.first_render is None
+            else round(self.first_render - self.process_start, 3),
+            'first_script_run_s': None if self.first_run_seconds is None
+            else round(self.first_run_seconds, 3),
+            'deferred_imports_s': {name: round(s, 4) for name, s in sorted(
+                self.imports.items(), key=lambda item: -item[1])},
+        }
+
+
+startup_profile = StartupProfile()
+
+
+class LazyModule:
+    """Module stand-in that imports ``name`` on first attribute access."""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            name = self.__dict__['_name']
+            already_loaded = name in sys.modules
+            started = time.perf_counter()
+            module = importlib.import_module(name)
+            if not already_loaded:
+                startup_profile.record_import(name, time.perf_counter() - started)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+def import_breakdown(modules=HEAVY_MODULES, python=sys.executable):
+    """Cold import time of each module, from ``python -X importtime`` in a fresh interpreter.
+
+    Returns ``{module: {'cumulative_s': ..., 'self_by_package_s': {...}}}``;
+    modules that are not installed are reported as ``None``.
+    """
+    breakdown = {}
+    for name in modules:
+        result = subprocess.run(
+            [python, '-X', 'importtime', '-c', f'import {name}'],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            breakdown[name] = None
+            continue
+        by_package = {}
+        cumulative = 0
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, imported = (part.strip() for part in line[12:].split('|'))
+            package = imported.strip().split('.')[0]
+            by_package[package] = by_package.get(package, 0) + int(self_us)
+            if imported.strip() == name:
+                cumulative = int(cumulative_us)
+        top = sorted(by_package.items(), key=lambda item: -item[1])[:10]
+        breakdown[name] = {
+            'cumulative_s': round(cumulative / 1e6, 3),
+            'self_by_package_s': {package: round(us / 1e6, 3) for package, us in top},
+        }
+    return breakdown
+
+
+if __name__ == '__main__':
+    print(json.dumps(import_breakdown(sys.argv[1:] or HEAVY_MODULES), indent=2))
@@ -0,0 +1,216 @@
+"""Per-section timing spans for script reruns.
+
+Sections of a rerun are wrapped in ``with metrics.span('name'):``.  Whether a
+rerun is timed is decided once, in :meth:`Metrics.begin_run`, from the sample
+rate; for runs that are not sampled ``span()`` hands back a shared no-op
+context manager, so instrumentation costs next to nothing while sampling is
+off (the default).
+
+Sampled durations go into log-bucketed histograms (about 9% resolution) from
+which p50/p95/p99 are read, and are exported in the Prometheus text format to
+a file and/or a local HTTP endpoint.  Configuration comes from the
+environment:
+
+    MASTERY_METRICS_SAMPLE   fraction of reruns to time, 0.0-1.0 (default 0)
+    MASTERY_METRICS_FILE     path rewritten with the Prometheus text
+    MASTERY_METRICS_PORT     serve /metrics on 127.0.0.1:<port>
+"""
+
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Bucket upper bounds grow by 2**(1/8) from 10µs to ~170s
+BUCKET_BASE = 1e-5
+BUCKET_GROWTH = 2 ** 0.125
+N_BUCKETS = 192
+WRITE_INTERVAL_SECONDS = 10.0
+METRIC_NAME = 'mastery_section_seconds'
+
+_NULL_SPAN = nullcontext()
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Log-bucketed duration histogram."""
+
+    __slots__ = ('counts', 'count', 'total')
+
+    def __init__(self):
+        self.counts = np.zeros(N_BUCKETS + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+
+    @staticmethod
+    def bucket(seconds):
+        if seconds <= BUCKET_BASE:
+            return 0
+        return min(N_BUCKETS, math.ceil(math.log(seconds / BUCKET_BASE, BUCKET_GROWTH)))
+
+    @staticmethod
+    def upper_bound(bucket):
+        return BUCKET_BASE * BUCKET_GROWTH ** bucket
+
+    def observe(self, seconds):
+        self.counts[self.bucket(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile, or None when empty."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        return self.upper_bound(int(np.searchsorted(np.cumsum(self.counts), rank)))
+
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """Section histograms shared by every session in the process."""
+
+    def __init__(self, sample_rate=0.0, path=None, write_interval=WRITE_INTERVAL_SECONDS):
+        self.sample_rate = sample_rate
+        self.path = path
+        self.write_interval = write_interval
+        self._histograms = {}
+        self._lock = threading.Lock()
+        # Streamlit runs each session's script on its own thread
+        self._local = threading.local()
+        self._last_write = 0.0
+        self._server = None
+
+    def begin_run(self, force=False):
+        """Decide whether this thread's current rerun is timed; returns the decision."""
+        sampled = force or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        self._local.sampled = sampled
+        return sampled
+
+    @property
+    def sampled(self):
+        return getattr(self._local, 'sampled', False)
+
+    def span(self, name):
+        if not getattr(self._local, 'sampled', False):
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def end_run(self, run_seconds=None):
+        """Record the whole rerun and rewrite the export file when it is due."""
+        if not self.sampled:
+            return
+        if run_seconds is not None:
+            self.observe('rerun', run_seconds)
+        self._local.sampled = False
+        if self.path and time.monotonic() - self._last_write >= self.write_interval:
+            self._last_write = time.monotonic()
+            self.write(self.path)
+
+    def snapshot(self):
+        """``{section: {'count', 'sum_s', 'p50_s', 'p95_s', 'p99_s'}}``, slowest p95 first."""
+        with self._lock:
+            rows = {
+                name: {
+                    'count': h.count,
+                    'sum_s': round(h.total, 6),
+                    **{f"p{round(q * 100)}_s": round(h.quantile(q), 6) for q in QUANTILES},
+                }
+                for name, h in self._histograms.items()
+            }
+        return dict(sorted(rows.items(), key=lambda item: -item[1]['p95_s']))
+
+    def to_prometheus(self):
+        lines = [
+            f"# HELP {METRIC_NAME} Wall time of app sections per sampled rerun.",
+            f"# TYPE {METRIC_NAME} summary",
+        ]
+        with self._lock:
+            for name, h in sorted(self._histograms.items()):
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                for q in QUANTILES:
+                    lines.append(f'{METRIC_NAME}{{section="{label}",quantile="{q}"}} {h.quantile(q):.6g}')
+                lines.append(f'{METRIC_NAME}_sum{{section="{label}"}} {h.total:.6g}')
+                lines.append(f'{METRIC_NAME}_count{{section="{label}"}} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Atomically replace ``path`` with the current Prometheus text."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve ``GET /metrics`` from a daemon thread; returns the server."""
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-exporter', daemon=True).start()
+        return self._server
+
+
+@lru_cache(maxsize=None)
+def get_metrics():
+    metrics = Metrics(
+        sample_rate=float(os.environ.get('MASTERY_METRICS_SAMPLE', 0) or 0),
+        path=os.environ.get('MASTERY_METRICS_FILE') or None,
+    )
+    port = os.environ.get('MASTERY_METRICS_PORT')
+    if port:
+        # With several workers on one host only the first binds the port; the
+        # others keep timing and can still export to a file
+        try:
+            metrics.serve(int(port))
+        except (OSError, ValueError) as exc:
+            logger.warning("Metrics exporter not started on port %s: %s", port, exc)
+    return metrics
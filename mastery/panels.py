@@ -0,0 +1,99 @@
+"""Concurrent computation of a page's panels.
+
+The Dashboard and Progress Analytics are made of panels (a figure, the badge
+list, the due reviews, ...) that do not depend on each other.  A
+:class:`PanelBatch` submits each panel's computation to one process-wide
+thread pool as soon as the page starts, then collects the results in order
+before anything is drawn.  A panel that has not finished within its timeout
+yields its fallback instead, so one slow panel never holds back the rest of
+the page.  A late panel that has not started yet is cancelled; one that has
+keeps running in the background, and anything it caches is ready for the
+next rerun.
+
+Panel functions run off the script thread and must not call Streamlit or
+touch ``st.session_state``: they receive plain snapshots (a late panel may
+still be running during the next rerun, so never pass an object the script
+mutates) and return plain values, and all rendering happens on the script
+thread afterwards.  Keep cheap reads on the script thread; the pool is shared
+by every session, and the deadline runs from submission.
+Exceptions are not swallowed; they are re-raised by :meth:`PanelBatch.collect`.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 5.0  # seconds from submission; generous enough for a cold Plotly import
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """The shared pool, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix='mastery-panel')
+        return _executor
+
+
+def _timed(fn, args, kwargs):
+    started = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return value, time.perf_counter() - started
+
+
+class _Panel:
+    __slots__ = ('name', 'future', 'fallback', 'deadline')
+
+    def __init__(self, name, future, fallback, deadline):
+        self.name = name
+        self.future = future
+        self.fallback = fallback
+        self.deadline = deadline
+
+
+class PanelBatch:
+    """Independent panel computations for one page::
+
+        panels = PanelBatch(metrics, 'dashboard')
+        panels.submit('badges', earned_badges, progress, fallback=())
+        results = panels.collect()  # {'badges': [...]}
+
+    With a sampled :class:`~mastery.metrics.Metrics`, each finished panel's
+    run time is recorded as ``<prefix>.panel.<name>``.
+    """
+
+    def __init__(self, metrics=None, prefix='panels', timeout=DEFAULT_TIMEOUT):
+        self.metrics = metrics
+        self.prefix = prefix
+        self.timeout = timeout
+        self.timed_out = []
+        self._panels = []
+
+    def submit(self, name, fn, *args, fallback=None, timeout=None, **kwargs):
+        """Start ``fn(*args, **kwargs)``; ``fallback`` stands in if it misses ``timeout``."""
+        deadline = time.perf_counter() + (self.timeout if timeout is None else timeout)
+        future = executor().submit(_timed, fn, args, kwargs)
+        self._panels.append(_Panel(name, future, fallback, deadline))
+
+    def collect(self):
+        """``{name: result or fallback}`` in submission order; panels past their deadline are listed in ``timed_out``."""
+        sampled = self.metrics is not None and self.metrics.sampled
+        results = {}
+        for panel in self._panels:
+            try:
+                value, seconds = panel.future.result(timeout=max(panel.deadline - time.perf_counter(), 0))
+            except FutureTimeout:
+                # Still queued behind other sessions' panels: drop it rather than run it late
+                panel.future.cancel()
+                results[panel.name] = panel.fallback
+                self.timed_out.append(panel.name)
+                continue
+            results[panel.name] = value
+            if sampled:
+                self.metrics.observe(f"{self.prefix}.panel.{panel.name}", seconds)
+        self._panels = []
+        return results
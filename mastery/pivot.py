@@ -0,0 +1,276 @@
+"""PivotTables over playground datasets.
+
+Every row or column field is turned into integer group codes once per dataset
+(categoricals already are; date fields can also be grouped by year, quarter
+or month) and cached.  A pivot then combines the codes of its fields into a
+single cell index and reduces each value field with ``bincount`` (sum, count)
+or ``ufunc.at`` (min, max) into a dense grid.  Subtotals and grand totals are
+reductions of that grid along its axes, so they cost nothing per row.  Filters
+are a boolean lookup table indexed by codes.  Finished tables are cached per
+dataset and layout.
+"""
+
+import numpy as np
+import pandas as pd
+
+from mastery.cache import ByteLRUCache, fingerprint, frame_fingerprint, frame_nbytes
+
+AGGREGATIONS = ('Sum', 'Count', 'Average', 'Min', 'Max')
+DATE_PARTS = ('Year', 'Quarter', 'Month')
+BLANK = '(blank)'
+TOTAL = 'Grand Total'
+MAX_FIELD_ITEMS = 1_000   # distinct values a row/column field may have
+MAX_CELLS = 4_000_000     # dense grid size across all row and column fields
+
+_codes = ByteLRUCache(512 << 20, sizeof=lambda entry: entry[0].nbytes)
+_tables = ByteLRUCache(64 << 20, sizeof=frame_nbytes)
+
+
+class PivotError(ValueError):
+    pass
+
+
+def _date_part(name):
+    base, _, part = name.rpartition(' (')
+    part = part.rstrip(')')
+    return (base, part) if base and part in DATE_PARTS else (name, None)
+
+
+def pivot_fields(df):
+    """Fields usable as rows, columns or filters: low-cardinality columns and date parts."""
+    fields = []
+    for name, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and len(dtype.categories) <= MAX_FIELD_ITEMS:
+            fields.append(name)
+        elif dtype == bool or (dtype.kind in 'iu' and dtype.itemsize <= 2):
+            fields.append(name)
+        elif dtype.kind == 'M':
+            fields.extend(f"{name} ({part})" for part in DATE_PARTS)
+    return fields
+
+
+def value_fields(df):
+    return [name for name, dtype in df.dtypes.items() if dtype.kind in 'iuf' and dtype != bool]
+
+
+def _encode(df, name):
+    """``(codes, labels)`` for a field: int32 codes into the ``labels`` array."""
+    base, part = _date_part(name)
+    if base not in df.columns:
+        raise PivotError(f"Unknown field {name!r}")
+    column = df[base]
+    if part is not None:
+        values = column.to_numpy()
+        blank = np.isnat(values)
+        months = values.astype('datetime64[M]').astype(np.int64)
+        if part == 'Year':
+            keys = months // 12
+        elif part == 'Quarter':
+            keys = months // 3
+        else:
+            keys = months
+        present = keys[~blank]
+        low = int(present.min()) if len(present) else 0
+        high = int(present.max()) if len(present) else -1
+        codes = (keys - low).astype(np.int32)
+        span = np.arange(low, high + 1)
+        if part == 'Year':
+            labels = [str(1970 + k) for k in span]
+        elif part == 'Quarter':
+            labels = [f"{1970 + k // 4} Q{k % 4 + 1}" for k in span]
+        else:
+            labels = [f"{1970 + k // 12}-{k % 12 + 1:02d}" for k in span]
+        codes[blank] = -1
+    elif isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy().astype(np.int32)
+        labels = [str(c) for c in column.cat.categories]
+    elif column.dtype == bool:
+        codes = column.to_numpy().astype(np.int32)
+        labels = ['False', 'True']
+    elif column.dtype.kind in 'iu' and column.dtype.itemsize <= 2:
+        values = column.to_numpy()
+        low, high = int(values.min()), int(values.max())
+        codes = (values.astype(np.int32) - low)
+        labels = [str(v) for v in range(low, high + 1)]
+    else:
+        codes, uniques = pd.factorize(column, sort=True)
+        codes = codes.astype(np.int32)
+        labels = [str(v) for v in uniques]
+    if len(labels) > MAX_FIELD_ITEMS:
+        raise PivotError(f"{name} has {len(labels):,} items; pivot fields are limited to {MAX_FIELD_ITEMS:,}")
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(labels), codes).astype(np.int32)
+        labels = [*labels, BLANK]
+    return codes, np.asarray(labels, dtype=object)
+
+
+def field_codes(df, name):
+    """Cached :func:`_encode`, shared by every pivot over the same dataset."""
+    key = fingerprint('pivot-codes', frame_fingerprint(df), name)
+    return _codes.get_or_create(key, lambda: _encode(df, name))
+
+
+def field_items(df, name):
+    return list(field_codes(df, name)[1])
+
+
+def _cells(df, fields, encoded):
+    # Mixed-radix cell index over the fields, cached so changing only the values,
+    # aggregation or filters of a layout does not recompute it
+    def build():
+        cells = np.zeros(len(df), dtype=np.int32)  # MAX_CELLS fits comfortably
+        for codes, labels in encoded:
+            cells *= len(labels)
+            cells += codes
+        return cells, None
+    return _codes.get_or_create(fingerprint('pivot-cells', frame_fingerprint(df), fields), build)[0]
+
+
+def _mask(df, filters):
+    mask = None
+    for name, allowed in filters:
+        codes, labels = field_codes(df, name)
+        keep = np.isin(labels, list(allowed))
+        selected = keep[codes]
+        mask = selected if mask is None else mask & selected
+    return mask
+
+
+def _reduce(grid, agg, axes):
+    if not axes:
+        return grid
+    if agg == 'Min':
+        return grid.min(axis=axes)
+    if agg == 'Max':
+        return grid.max(axis=axes)
+    return grid.sum(axis=axes)
+
+
+def _cell_stats(cells, size, values, agg):
+    """Per-cell ``(count, stat)`` where stat is the sum, min or max of ``values``."""
+    if values is None:
+        return np.bincount(cells, minlength=size), None
+    if values.dtype.kind == 'f':
+        valid = ~np.isnan(values)
+        if not valid.all():
+            cells, values = cells[valid], values[valid]
+    count = np.bincount(cells, minlength=size)
+    if agg in ('Sum', 'Average'):
+        return count, np.bincount(cells, weights=values, minlength=size)
+    if agg == 'Count':
+        return count, None
+    stat = np.full(size, np.inf if agg == 'Min' else -np.inf)
+    (np.minimum if agg == 'Min' else np.maximum).at(stat, cells, values.astype(np.float64))
+    return count, stat
+
+
+def _finish(count, stat, agg):
+    if agg == 'Count':
+        return count.astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if agg == 'Average':
+            result = stat / count
+        else:
+            result = stat.astype(np.float64)
+    return np.where(count > 0, result, np.nan)
+
+
+def compute_pivot(df, rows=(), columns=(), values=(), filters=(), subtotals=True):
+    """Build a pivot table; prefer :func:`pivot_table`, which caches.
+
+    ``values`` is a sequence of ``(field, aggregation)`` pairs (an empty
+    sequence counts rows) and ``filters`` of ``(field, allowed items)`` pairs.
+    """
+    rows, columns = list(rows), list(columns)
+    values = list(values) or [(None, 'Count')]
+    if len(set(rows + columns)) != len(rows + columns):
+        raise PivotError("A field can be used only once across rows and columns")
+    for _, agg in values:
+        if agg not in AGGREGATIONS:
+            raise PivotError(f"Unknown aggregation {agg!r}; choose one of {AGGREGATIONS}")
+
+    encoded = [field_codes(df, name) for name in rows + columns]
+    shape = tuple(len(labels) for _, labels in encoded)
+    size = int(np.prod(shape, dtype=np.int64)) if shape else 1
+    if size > MAX_CELLS:
+        raise PivotError(f"This layout has {size:,} cells; remove a field or use fewer items")
+
+    cells = _cells(df, rows + columns, encoded)
+    mask = _mask(df, filters)
+    if mask is not None:
+        cells = cells[mask]
+
+    n_rows = len(rows)
+    row_axes = tuple(range(n_rows))
+    col_axes = tuple(range(n_rows, n_rows + len(columns)))
+    rows_present = np.bincount(cells, minlength=size).reshape(shape)
+    row_totals = _reduce(rows_present, 'Sum', col_axes)
+    col_totals = _reduce(rows_present, 'Sum', row_axes)
+
+    # Output rows: detail combinations in field order, each group followed by its subtotal
+    row_labels = [labels for _, labels in encoded[:n_rows]]
+    row_keys = []  # (level, index tuple); level n_rows is a detail row, 0 the grand total
+    previous = None
+    for combo in map(tuple, np.argwhere(row_totals > 0)) if n_rows else []:
+        if previous is not None and subtotals:
+            for level in range(n_rows - 1, 0, -1):
+                if previous[:level] != combo[:level]:
+                    row_keys.append((level, previous[:level]))
+        row_keys.append((n_rows, combo))
+        previous = combo
+    if previous is not None and subtotals:
+        row_keys.extend((level, previous[:level]) for level in range(n_rows - 1, 0, -1))
+    row_keys.append((0, ()))
+
+    col_shape = shape[n_rows:]
+    col_present = np.flatnonzero(col_totals.reshape(-1) > 0) if columns else np.empty(0, dtype=np.int64)
+    col_labels = [labels for _, labels in encoded[n_rows:]]
+
+    blocks = {}
+    for field, agg in values:
+        column_values = None if field is None else df[field].to_numpy()
+        if column_values is not None and mask is not None:
+            column_values = column_values[mask]
+        count, stat = _cell_stats(cells, size, column_values, agg)
+        count = count.reshape(shape)
+        stat = None if stat is None else stat.reshape(shape)
+        # The grid rolled up over the row fields below each level; level 0 is the grand total
+        counts = [_reduce(count, 'Sum', tuple(range(level, n_rows))) for level in range(n_rows + 1)]
+        stats = None if stat is None else [_reduce(stat, agg, tuple(range(level, n_rows)))
+                                           for level in range(n_rows + 1)]
+        table = np.empty((len(row_keys), len(col_present) + 1))
+        for r, (level, index) in enumerate(row_keys):
+            c = counts[level][index].reshape(-1)
+            s = None if stats is None else stats[level][index].reshape(-1)
+            table[r, :-1] = _finish(c[col_present], None if s is None else s[col_present], agg)
+            table[r, -1] = _finish(c.sum(keepdims=True), None if s is None else _reduce(s, agg, (0,)).reshape(1), agg)[0]
+        title = f"{agg} of {field}" if field is not None else 'Count of rows'
+        blocks[title] = table
+
+    index = [_row_label(level, key, n_rows, row_labels) for level, key in row_keys]
+    col_combos = zip(*np.unravel_index(col_present, col_shape)) if columns else ()
+    header = [' | '.join(labels[i] for labels, i in zip(col_labels, combo)) for combo in col_combos] + [TOTAL]
+    frames = [pd.DataFrame(table, columns=header) for table in blocks.values()]
+    result = pd.concat(frames, axis=1, keys=list(blocks)) if len(frames) > 1 else frames[0]
+    result.index = pd.MultiIndex.from_tuples(index, names=rows) if n_rows > 1 else pd.Index(
+        [i[0] for i in index], name=rows[0] if rows else None)
+    if len(frames) == 1:
+        result.columns.name = ' | '.join(columns) if columns else next(iter(blocks))
+    return result
+
+
+def _row_label(level, key, n_rows, labels):
+    if level == 0:
+        return (TOTAL,) + ('',) * (n_rows - 1) if n_rows else (TOTAL,)
+    names = [labels[i][k] for i, k in enumerate(key)]
+    if level < n_rows:
+        names[-1] = f"{names[-1]} Total"
+    return tuple(names + [''] * (n_rows - len(names)))
+
+
+def pivot_table(df, rows=(), columns=(), values=(), filters=(), subtotals=True):
+    """Cached :func:`compute_pivot`, keyed by dataset fingerprint and layout."""
+    filters = tuple((name, tuple(sorted(allowed))) for name, allowed in filters)
+    layout = (tuple(rows), tuple(columns), tuple(values), filters, bool(subtotals))
+    key = fingerprint('pivot', frame_fingerprint(df), layout)
+    return _tables.get_or_create(key, lambda: compute_pivot(df, rows, columns, values, filters, subtotals))
@@ -0,0 +1,147 @@
+"""Prerequisite-aware learning path planning.
+
+The catalog's ``prerequisites`` lists are compiled once per process into a DAG
+with a topological order and, for every module, the set of all its
+(transitive) prerequisites as an integer bitset.  Each learner then gets a
+:class:`LearningPath` that tracks how many direct prerequisites of every module
+are still unmet, so completing a module only touches its direct dependents,
+and the unlocked modules are kept in a heap ordered by topological rank.
+"""
+
+import heapq
+from functools import lru_cache
+
+from mastery.catalog import get_catalog
+
+
+class PrerequisiteGraph:
+    """Compiled prerequisite DAG over module keys."""
+
+    def __init__(self, prerequisites):
+        keys = list(prerequisites)
+        # Prerequisites without content of their own still take part in ordering
+        for required in prerequisites.values():
+            keys.extend(p for p in required if p not in prerequisites)
+        keys = list(dict.fromkeys(keys))
+        self.ids = {key: i for i, key in enumerate(keys)}
+        self.keys = keys
+        self.requires = [[self.ids[p] for p in prerequisites.get(key, ())] for key in keys]
+        self.dependents = [[] for _ in keys]
+        for node, required in enumerate(self.requires):
+            for p in required:
+                self.dependents[p].append(node)
+
+        # Kahn's algorithm; ties keep catalog order so paths read naturally
+        indegree = [len(r) for r in self.requires]
+        ready = [i for i, d in enumerate(indegree) if d == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            node = heapq.heappop(ready)
+            order.append(node)
+            for dependent in self.dependents[node]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        if len(order) != len(keys):
+            cyclic = [keys[i] for i, d in enumerate(indegree) if d > 0]
+            raise ValueError(f"Prerequisite cycle between modules: {', '.join(cyclic)}")
+        self.order = order
+        self.rank = [0] * len(keys)
+        for position, node in enumerate(order):
+            self.rank[node] = position
+
+        # Transitive prerequisites as bitsets, filled in topological order
+        self.ancestors = [0] * len(keys)
+        for node in order:
+            bits = 0
+            for p in self.requires[node]:
+                bits |= self.ancestors[p] | (1 << p)
+            self.ancestors[node] = bits
+
+    def __contains__(self, key):
+        return key in self.ids
+
+    def depends_on(self, module, prerequisite):
+        """True if ``prerequisite`` must be completed, directly or not, before ``module``."""
+        return bool(self.ancestors[self.ids[module]] >> self.ids[prerequisite] & 1)
+
+    def bits(self, modules):
+        bits = 0
+        for key in modules:
+            if key in self.ids:
+                bits |= 1 << self.ids[key]
+        return bits
+
+    def missing_prerequisites(self, module, completed_bits):
+        """All not-yet-completed prerequisites of ``module``, in topological order."""
+        missing = self.ancestors[self.ids[module]] & ~completed_bits
+        nodes = [i for i in range(missing.bit_length()) if missing >> i & 1]
+        return [self.keys[i] for i in sorted(nodes, key=self.rank.__getitem__)]
+
+    def path(self, completed=()):
+        return LearningPath(self, completed)
+
+
+class LearningPath:
+    """One learner's position in the graph, updated per completed module."""
+
+    __slots__ = ('graph', 'completed_bits', '_unmet', '_frontier')
+
+    def __init__(self, graph, completed=()):
+        self.graph = graph
+        self.completed_bits = 0
+        self._unmet = [len(r) for r in graph.requires]
+        self._frontier = [(graph.rank[i], i) for i, n in enumerate(self._unmet) if n == 0]
+        heapq.heapify(self._frontier)
+        for key in completed:
+            self.complete(key)
+
+    def is_completed(self, key):
+        return bool(self.completed_bits >> self.graph.ids[key] & 1)
+
+    def is_unlocked(self, key):
+        return self._unmet[self.graph.ids[key]] == 0
+
+    def complete(self, key):
+        node = self.graph.ids.get(key)
+        if node is None or self.completed_bits >> node & 1:
+            return
+        self.completed_bits |= 1 << node
+        for dependent in self.graph.dependents[node]:
+            self._unmet[dependent] -= 1
+            if self._unmet[dependent] == 0:
+                heapq.heappush(self._frontier, (self.graph.rank[dependent], dependent))
+
+    def next_modules(self, limit=None, where=None):
+        """Unlocked, incomplete modules in topological order, optionally filtered by ``where``.
+
+        Costs O(k log n) for the k frontier entries inspected.
+        """
+        frontier = self._frontier
+        taken = []
+        result = []
+        while frontier and (limit is None or len(result) < limit):
+            entry = heapq.heappop(frontier)
+            # Completed modules leave the frontier lazily, here
+            if self.completed_bits >> entry[1] & 1:
+                continue
+            taken.append(entry)
+            key = self.graph.keys[entry[1]]
+            if where is None or where(key):
+                result.append(key)
+        for entry in taken:
+            heapq.heappush(frontier, entry)
+        return result
+
+    def missing_prerequisites(self, key):
+        return self.graph.missing_prerequisites(key, self.completed_bits)
+
+
+@lru_cache(maxsize=None)
+def get_prerequisite_graph():
+    catalog = get_catalog()
+    # A prerequisite with no lessons yet cannot be completed, so it would lock
+    # its dependents forever; it counts as satisfied until its content exists
+    return PrerequisiteGraph({key: [p for p in module['prerequisites'] if p in catalog.modules]
+                              for key, module in catalog.modules.items()})
@@ -0,0 +1,126 @@
+"""Full-text search over lessons, exercises, quiz questions and case studies.
+
+All searchable text is tokenized once per process into an inverted index whose
+postings are NumPy arrays, and queries are ranked with BM25 by adding each
+query term's weights into a score vector.  The last query term also matches as
+a prefix (found by bisecting the sorted vocabulary) so results update while
+the learner is still typing.
+"""
+
+import bisect
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from mastery.catalog import get_catalog
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+K1 = 1.2
+B = 0.75
+MAX_PREFIX_EXPANSION = 50
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+class SearchHit:
+    __slots__ = ('doc_id', 'kind', 'module', 'title', 'snippet', 'score')
+
+    def __init__(self, doc, score):
+        self.doc_id, self.kind, self.module, self.title, self.snippet = doc
+        self.score = score
+
+
+def _documents(catalog):
+    """Yield ``(doc_id, kind, module, title, text)`` for everything searchable."""
+    for lesson_id, lesson in catalog.lessons.items():
+        module = lesson_id.split('/')[0]
+        yield lesson_id, 'Lesson', module, lesson['title'], ' '.join(
+            [lesson['title'], lesson['content'], lesson.get('exercise', '')])
+    for exercise_id, exercise in catalog.exercises.items():
+        module = exercise_id.split('/')[0]
+        yield exercise_id, 'Exercise', module, exercise['title'], ' '.join(
+            [exercise['title'], exercise['description'], *exercise['objectives'],
+             *exercise['skills'], *exercise['steps']])
+    for module, questions in catalog.quizzes.items():
+        for i, question in enumerate(questions):
+            yield f"{module}/q{i}", 'Quiz', module, question['question'], ' '.join(
+                [question['question'], *question['options'], question['explanation']])
+    for module, cases in catalog.case_studies.items():
+        for i, case in enumerate(cases):
+            yield f"{module}/case{i}", 'Case Study', module, case['title'], ' '.join(
+                [case['title'], case['description'], case['scenario'], *case['tasks'],
+                 *case['learning_outcomes']])
+
+
+def _snippet(text, limit=160):
+    text = ' '.join(text.replace('- ', ' ').split())
+    return text if len(text) <= limit else text[:limit].rsplit(' ', 1)[0] + '…'
+
+
+class SearchIndex:
+    """BM25-ranked inverted index; build once, query many times."""
+
+    def __init__(self, documents):
+        self.docs = []
+        postings = {}
+        lengths = []
+        for doc_id, kind, module, title, text in documents:
+            n = len(self.docs)
+            self.docs.append((doc_id, kind, module, title, _snippet(text)))
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                postings.setdefault(token, ([], []))
+                postings[token][0].append(n)
+                postings[token][1].append(count)
+
+        n_docs = len(self.docs)
+        lengths = np.asarray(lengths, dtype=np.float32)
+        norm = K1 * (1 - B + B * lengths / max(lengths.mean(), 1.0)) if n_docs else lengths
+        self.vocabulary = sorted(postings)
+        # Precompute the full BM25 weight of every posting; queries only add them up
+        self.postings = {}
+        for token, (doc_ids, counts) in postings.items():
+            doc_ids = np.asarray(doc_ids, dtype=np.int32)
+            tf = np.asarray(counts, dtype=np.float32)
+            idf = np.log(1 + (n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            self.postings[token] = (doc_ids, (idf * tf * (K1 + 1) / (tf + norm[doc_ids])).astype(np.float32))
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _expand(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        stop = bisect.bisect_left(self.vocabulary, prefix + '\uffff', start)
+        return self.vocabulary[start:min(stop, start + MAX_PREFIX_EXPANSION)]
+
+    def search(self, query, limit=10, prefix=True):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for i, term in enumerate(terms):
+            last = i == len(terms) - 1
+            # A posting list holds each document at most once, so fancy-index += is safe
+            for token in (self._expand(term) if prefix and last else (term,)):
+                posting = self.postings.get(token)
+                if posting is not None:
+                    scores[posting[0]] += posting[1]
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        matched = matched[np.argsort(-scores[matched], kind='stable')]
+        return [SearchHit(self.docs[i], float(scores[i])) for i in matched]
+
+
+@lru_cache(maxsize=None)
+def get_search_index():
+    return SearchIndex(_documents(get_catalog()))
@@ -0,0 +1,158 @@
+"""Compact per-session learner state.
+
+A worker holds one copy of this state per connected learner, so it is kept
+small: module keys map to integer ids shared by the whole process, progress is
+a single float64 array indexed by those ids instead of a dict, and the small
+records a session keeps (the page being timed, the lesson being noted) are
+slotted objects rather than dicts.  Anything derivable from other state, such
+as the completed-module list or the serialized review schedule, is computed
+when needed instead of stored.
+
+:func:`memory_report` measures what a session actually holds, excluding the
+objects shared by every session in the process.
+"""
+
+import sys
+from functools import lru_cache
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+
+import numpy as np
+
+from mastery.catalog import get_catalog
+from mastery.planner import get_prerequisite_graph
+
+# Every module progress is tracked for, in dashboard order; catalog modules added later follow
+TRACKED_MODULES = (
+    'excel_basics', 'excel_formulas', 'excel_charts', 'excel_pivottables', 'excel_advanced',
+    'powerbi_basics', 'powerbi_dax', 'powerbi_visuals', 'powerbi_dashboards', 'powerbi_service',
+    'data_analysis', 'data_modeling', 'business_intelligence',
+)
+MODULE_KEYS = tuple(dict.fromkeys((*TRACKED_MODULES, *get_catalog().module_keys)))
+MODULE_IDS = {key: i for i, key in enumerate(MODULE_KEYS)}
+
+
+class ProgressVector:
+    """Percent complete per module, indexed by module id; reads like the dict it replaces."""
+
+    __slots__ = ('values',)
+
+    def __init__(self, progress=None):
+        self.values = np.zeros(len(MODULE_KEYS))
+        for key, value in (progress or {}).items():
+            # Saved progress for modules that have since been removed is dropped
+            if key in MODULE_IDS:
+                self.values[MODULE_IDS[key]] = value
+
+    def __getitem__(self, key):
+        return self._number(self.values[MODULE_IDS[key]])
+
+    def __setitem__(self, key, value):
+        self.values[MODULE_IDS[key]] = value
+
+    def __contains__(self, key):
+        return key in MODULE_IDS
+
+    def __iter__(self):
+        return iter(MODULE_KEYS)
+
+    def __len__(self):
+        return len(MODULE_KEYS)
+
+    def get(self, key, default=None):
+        module = MODULE_IDS.get(key)
+        return default if module is None else self._number(self.values[module])
+
+    def items(self):
+        return zip(MODULE_KEYS, map(self._number, self.values.tolist()))
+
+    @staticmethod
+    def _number(value):
+        # Whole percentages read back as ints, as they were stored in the old dict
+        value = float(value)
+        return int(value) if value.is_integer() else value
+
+    @property
+    def completed_count(self):
+        return int(np.count_nonzero(self.values >= 100))
+
+    def completed(self):
+        return [MODULE_KEYS[i] for i in np.flatnonzero(self.values >= 100)]
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+class PageVisit:
+    """The page shown on the previous rerun, for time-on-page accounting."""
+
+    __slots__ = ('at', 'view', 'module')
+
+    def __init__(self, at, view, module=None):
+        self.at = at
+        self.view = view
+        self.module = module
+
+
+class LessonRef:
+    """A lesson the learner is taking notes on."""
+
+    __slots__ = ('module', 'lesson')
+
+    def __init__(self, module, lesson):
+        self.module = module
+        self.lesson = lesson
+
+
+@lru_cache(maxsize=None)
+def _shared_ids():
+    # Process-wide objects a session may point at but does not own
+    shared = (get_catalog(), get_prerequisite_graph(), MODULE_KEYS, MODULE_IDS, *MODULE_KEYS)
+    return frozenset(map(id, shared))
+
+
+_NOT_OWNED = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+
+
+def deep_sizeof(obj, seen=None):
+    """Bytes reachable from ``obj``, counting each object once and skipping shared ones."""
+    seen = set(_shared_ids()) if seen is None else seen
+    stack = [obj]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _NOT_OWNED):
+            continue
+        seen.add(id(obj))
+        # For arrays that own their data getsizeof includes the buffer
+        total += sys.getsizeof(obj)
+        if isinstance(obj, np.ndarray):
+            if obj.base is not None:
+                stack.append(obj.base)
+            continue
+        if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                value = getattr(obj, slot, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+
+def memory_report(state):
+    """Bytes held per session-state field, largest first, with the total.
+
+    ``state`` is ``st.session_state`` or any mapping; objects shared between
+    fields are charged to the first field that reaches them.
+    """
+    seen = set(_shared_ids())
+    fields = {key: deep_sizeof(state[key], seen) for key in sorted(state.keys(), key=str)}
+    fields = dict(sorted(fields.items(), key=lambda item: -item[1]))
+    return {'total_bytes': sum(fields.values()), 'fields': fields}
@@ -0,0 +1,1211 @@
+"""Spreadsheet calculation engine for the Practice Lab formula sandbox.
+
+A :class:`Sheet` holds one worksheet.  Cell values live in per-column NumPy
+arrays (a float64 array of numbers next to an object array of every value), so
+range functions such as SUM or SUMIFS are array operations.  Formulas are
+compiled to closures; formulas that differ only in their relative references
+(``=A2*2``, ``=A3*2``, ...) share one compiled template, as Excel's shared
+formulas do.
+
+Every formula registers its precedents in a dependency graph: single cells
+in a dict, ranges in per-column interval arrays.  Editing cells marks only
+the formulas reachable from them as dirty and recomputes those in
+topological order; cycles evaluate to ``#CYCLE!``.  Exact-match lookups
+(VLOOKUP, XLOOKUP, MATCH) and text criteria in the *IFS functions use hash
+indexes over the looked-up column, built on first use and updated in place as
+cells change.
+"""
+
+import re
+import time
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Context, Decimal, InvalidOperation
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MAX_ROWS = 1_048_576
+MAX_COLUMNS = 16_384
+MAX_INDEXES_PER_COLUMN = 8
+
+
+class FormulaError(ValueError):
+    pass
+
+
+class ExcelError:
+    """An error value such as ``#N/A``; formulas that read one return it."""
+
+    __slots__ = ('code',)
+
+    def __init__(self, code):
+        self.code = code
+
+    def __repr__(self):
+        return self.code
+
+    __str__ = __repr__
+
+    def __eq__(self, other):
+        return isinstance(other, ExcelError) and other.code == self.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+
+NA = ExcelError('#N/A')
+DIV0 = ExcelError('#DIV/0!')
+VALUE = ExcelError('#VALUE!')
+REF = ExcelError('#REF!')
+NAME = ExcelError('#NAME?')
+NUM = ExcelError('#NUM!')
+CYCLE = ExcelError('#CYCLE!')
+
+
+class _Raise(Exception):
+    """Carries an error value out of a formula."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+# Addresses
+
+def column_letter(col):
+    letters = ''
+    col += 1
+    while col:
+        col, rest = divmod(col - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def column_index(letters):
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def parse_address(address):
+    """``'B12'`` -> ``(11, 1)``, zero-based ``(row, col)``."""
+    match = re.fullmatch(r'\s*\$?([A-Za-z]{1,3})\$?(\d+)\s*', address)
+    if not match or int(match.group(2)) < 1:
+        raise FormulaError(f"Invalid cell address {address!r}")
+    row, col = int(match.group(2)) - 1, column_index(match.group(1))
+    if row >= MAX_ROWS or col >= MAX_COLUMNS:
+        raise FormulaError(f"{address} is outside the sheet")
+    return row, col
+
+
+def address(row, col):
+    return f"{column_letter(col)}{row + 1}"
+
+
+# Parsing
+
+# References are cut out of the formula text first, so formulas that differ only
+# in relative references reduce to the same text and share cached tokens
+_REFERENCE = re.compile(r"""
+    "(?:[^"]|"")*"
+  | (?<![\w.$])(\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?|\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3})(?![\w(])
+""", re.VERBOSE)
+_REF = re.compile(r'(\$?)([A-Za-z]{1,3})(\$?)(\d*)')
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<string>"(?:[^"]|"")*")
+  | (?P<ref>\#)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<op><>|<=|>=|[-+*/^&=<>(),%])
+)""", re.VERBOSE)
+
+
+@lru_cache(maxsize=1 << 16)
+def _parse_ref(text, whole_row):
+    """``(row, row_absolute, col, col_absolute)`` of a reference such as ``$B12``."""
+    col_abs, letters, row_abs, digits = _REF.fullmatch(text).groups()
+    col = column_index(letters)
+    # Whole-column ranges are absolute in the row
+    row, row_abs = (int(digits) - 1, row_abs == '$') if digits else (whole_row, True)
+    if row < 0 or row >= MAX_ROWS or col >= MAX_COLUMNS:
+        raise FormulaError(f"Invalid reference {text}")
+    return row, row_abs, col, col_abs == '$'
+
+
+def _ref_spec(text, anchor_row, anchor_col, whole_row=None):
+    """A reference relative to the anchor cell; relative parts become offsets."""
+    row, row_abs, col, col_abs = _parse_ref(text, whole_row)
+    return (row if row_abs else row - anchor_row, row_abs,
+            col if col_abs else col - anchor_col, col_abs)
+
+
+def _template(text, row, col):
+    """``(text with references as #, reference specs relative to (row, col))``; equal for shared formulas."""
+    pieces, specs, pos = [], [], 0
+    for match in _REFERENCE.finditer(text):
+        ref = match.group(1)
+        if ref is None:
+            continue  # a string literal
+        pieces.append(text[pos:match.start()])
+        pieces.append('#')
+        pos = match.end()
+        if ':' in ref:
+            start, end = ref.split(':')
+            specs.append((_ref_spec(start, row, col, whole_row=0), _ref_spec(end, row, col, whole_row=MAX_ROWS - 1)))
+        else:
+            specs.append(_ref_spec(ref, row, col))
+    pieces.append(text[pos:])
+    return ''.join(pieces), tuple(specs)
+
+
+@lru_cache(maxsize=4096)
+def _tokenize(text):
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise FormulaError(f"Unexpected {text[pos:].strip()[:10]!r} in formula")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = value[1:-1].replace('""', '"')
+        elif kind == 'number':
+            value = float(value)
+        elif kind == 'name':
+            value = value.upper()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tuple(tokens)
+
+
+class _Parser:
+    """Excel operator precedence: comparison < & < +- < */ < ^ < unary minus < %."""
+
+    def __init__(self, tokens, specs):
+        self.tokens = tokens
+        self.specs = iter(specs)
+        self.i = 0
+
+    def peek(self, *ops):
+        if self.i < len(self.tokens):
+            kind, value = self.tokens[self.i]
+            if kind == 'op' and value in ops:
+                return value
+        return None
+
+    def take(self, op=None):
+        if self.i >= len(self.tokens):
+            raise FormulaError("The formula ends too early")
+        token = self.tokens[self.i]
+        if op is not None and token != ('op', op):
+            raise FormulaError(f"Expected {op!r}")
+        self.i += 1
+        return token
+
+    def parse(self):
+        node = self.comparison()
+        if self.i != len(self.tokens):
+            raise FormulaError(f"Unexpected {self.tokens[self.i][1]!r} in formula")
+        return node
+
+    def comparison(self):
+        node = self.concat()
+        while (op := self.peek('=', '<>', '<', '<=', '>', '>=')):
+            self.take()
+            node = ('compare', op, node, self.concat())
+        return node
+
+    def concat(self):
+        node = self.additive()
+        while self.peek('&'):
+            self.take()
+            node = ('concat', node, self.additive())
+        return node
+
+    def additive(self):
+        node = self.term()
+        while (op := self.peek('+', '-')):
+            self.take()
+            node = ('arith', op, node, self.term())
+        return node
+
+    def term(self):
+        node = self.power()
+        while (op := self.peek('*', '/')):
+            self.take()
+            node = ('arith', op, node, self.power())
+        return node
+
+    def power(self):
+        node = self.unary()
+        while self.peek('^'):
+            self.take()
+            node = ('arith', '^', node, self.unary())
+        return node
+
+    def unary(self):
+        if (op := self.peek('-', '+')):
+            self.take()
+            node = self.unary()
+            return ('neg', node) if op == '-' else node
+        node = self.primary()
+        while self.peek('%'):
+            self.take()
+            node = ('arith', '/', node, ('value', 100.0))
+        return node
+
+    def primary(self):
+        kind, value = self.take()
+        if kind in ('number', 'string'):
+            return ('value', value)
+        if kind == 'ref':
+            spec = next(self.specs, None)
+            if spec is None:
+                raise FormulaError("Unexpected '#' in formula")
+            return ('range', spec) if isinstance(spec[0], tuple) else ('cell', spec)
+        if kind == 'op' and value == '(':
+            node = self.comparison()
+            self.take(')')
+            return node
+        if kind == 'name':
+            if self.peek('('):
+                self.take('(')
+                args = []
+                if not self.peek(')'):
+                    args.append(self.comparison())
+                    while self.peek(','):
+                        self.take()
+                        args.append(self.comparison())
+                self.take(')')
+                if value not in _FUNCTIONS:
+                    raise FormulaError(f"Unknown function {value}")
+                return ('call', value, tuple(args))
+            if value in ('TRUE', 'FALSE'):
+                return ('value', value == 'TRUE')
+            raise FormulaError(f"Unknown name {value}")
+        raise FormulaError(f"Unexpected {value!r} in formula")
+
+
+# Values
+
+class Range:
+    """A rectangular block of cells, passed to functions unevaluated."""
+
+    __slots__ = ('sheet', 'r0', 'c0', 'r1', 'c1')
+
+    def __init__(self, sheet, r0, c0, r1, c1):
+        if r0 > r1:
+            r0, r1 = r1, r0
+        if c0 > c1:
+            c0, c1 = c1, c0
+        self.sheet = sheet
+        self.r0, self.c0, self.r1, self.c1 = r0, c0, r1, c1
+        if r1 == MAX_ROWS - 1:
+            # Whole-column ranges stop at the last used row
+            self.r1 = max(sheet.rows - 1, self.r0)
+
+    @property
+    def shape(self):
+        return self.r1 - self.r0 + 1, self.c1 - self.c0 + 1
+
+    def numbers(self):
+        """Numeric cells as float64 (NaN elsewhere), column after column."""
+        parts = [self.sheet.column(c).numbers(self.r0, self.r1) for c in range(self.c0, self.c1 + 1)]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def values(self):
+        parts = [self.sheet.column(c).objects(self.r0, self.r1) for c in range(self.c0, self.c1 + 1)]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def error(self):
+        """The first error value in the range, or None."""
+        for c in range(self.c0, self.c1 + 1):
+            column = self.sheet.column(c)
+            for row in column.errors:
+                if self.r0 <= row <= self.r1:
+                    return column.obj[row]
+        return None
+
+    def cell(self, i, j=0):
+        return self.sheet.get(self.r0 + i, self.c0 + j)
+
+    def vector(self):
+        """``(column, first row, last row)`` of a single-column range, or None."""
+        return (self.c0, self.r0, self.r1) if self.c0 == self.c1 else None
+
+
+def _scalar(value):
+    if isinstance(value, Range):
+        if value.shape != (1, 1):
+            raise _Raise(VALUE)
+        value = value.cell(0)
+    if isinstance(value, ExcelError):
+        raise _Raise(value)
+    return value
+
+
+def _number(value):
+    value = _scalar(value)
+    if value is None:
+        return 0.0
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        raise _Raise(VALUE) from None
+
+
+def _text(value):
+    value = _scalar(value)
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float):
+        return f"{value:g}" if value != int(value) else str(int(value))
+    return str(value)
+
+
+def _truth(value):
+    value = _scalar(value)
+    if isinstance(value, str):
+        if value.upper() in ('TRUE', 'FALSE'):
+            return value.upper() == 'TRUE'
+        raise _Raise(VALUE)
+    return bool(value)
+
+
+def _key(value):
+    """Lookup key: text matches case-insensitively, numbers by value, booleans only booleans."""
+    if isinstance(value, str):
+        return value.casefold()
+    if isinstance(value, bool):
+        return ('bool', value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def _compare(op, left, right):
+    left, right = _scalar(left), _scalar(right)
+    # Blank compares as 0 or "" depending on the other side; text ranks above numbers
+    if left is None:
+        left = '' if isinstance(right, str) else 0.0
+    if right is None:
+        right = '' if isinstance(left, str) else 0.0
+    rank = lambda v: 2 if isinstance(v, bool) else 1 if isinstance(v, str) else 0
+    a, b = (rank(left), _key(left)), (rank(right), _key(right))
+    if a[0] == 2:
+        a = (2, left)
+    if b[0] == 2:
+        b = (2, right)
+    return {'=': a == b, '<>': a != b, '<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b}[op]
+
+
+def _arith(op, left, right):
+    a, b = _number(left), _number(right)
+    if op == '+':
+        return a + b
+    if op == '-':
+        return a - b
+    if op == '*':
+        return a * b
+    if op == '/':
+        if b == 0:
+            raise _Raise(DIV0)
+        return a / b
+    try:
+        return float(a ** b)
+    except (OverflowError, ZeroDivisionError, TypeError):
+        raise _Raise(NUM) from None
+
+
+# Compilation to closures over (sheet, row, col)
+
+def _cell_getter(spec):
+    row, row_abs, col, col_abs = spec
+    if row_abs and col_abs:
+        return lambda s, r, c: s.get(row, col)
+    if row_abs:
+        return lambda s, r, c: s.get(row, c + col)
+    if col_abs:
+        return lambda s, r, c: s.get(r + row, col)
+    return lambda s, r, c: s.get(r + row, c + col)
+
+
+def _resolve(spec, r, c):
+    row, row_abs, col, col_abs = spec
+    return (row if row_abs else r + row), (col if col_abs else c + col)
+
+
+def _range_getter(start, end):
+    # compile_formula has already checked that the range is on the sheet
+    (sr, sr_abs, sc, sc_abs), (er, er_abs, ec, ec_abs) = start, end
+    if sr_abs and sc_abs and er_abs and ec_abs:
+        return lambda s, r, c: Range(s, sr, sc, er, ec)
+    return lambda s, r, c: Range(s, sr if sr_abs else r + sr, sc if sc_abs else c + sc,
+                                 er if er_abs else r + er, ec if ec_abs else c + ec)
+
+
+def _compile(node, as_range=False):
+    kind = node[0]
+    if kind == 'value':
+        value = node[1]
+        return lambda s, r, c: value
+    if kind == 'cell':
+        if as_range:
+            return _range_getter(node[1], node[1])
+        return _cell_getter(node[1])
+    if kind == 'range':
+        return _range_getter(*node[1])
+    if kind == 'neg':
+        inner = _compile(node[1])
+        return lambda s, r, c: -_number(inner(s, r, c))
+    if kind == 'arith':
+        op, left, right = node[1], _compile(node[2]), _compile(node[3])
+        return lambda s, r, c: _arith(op, left(s, r, c), right(s, r, c))
+    if kind == 'compare':
+        op, left, right = node[1], _compile(node[2]), _compile(node[3])
+        return lambda s, r, c: _compare(op, left(s, r, c), right(s, r, c))
+    if kind == 'concat':
+        left, right = _compile(node[1]), _compile(node[2])
+        return lambda s, r, c: _text(left(s, r, c)) + _text(right(s, r, c))
+    if kind == 'call':
+        function, lazy = _FUNCTIONS[node[1]]
+        # Cell references are passed as 1x1 ranges so range functions can take them
+        args = [_compile(arg, as_range=True) for arg in node[2]]
+        if lazy:
+            return lambda s, r, c: function(s, r, c, args)
+        return lambda s, r, c: function(*[arg(s, r, c) for arg in args])
+    raise FormulaError(f"Cannot compile {kind}")
+
+
+def _references(node, found):
+    if node[0] == 'cell':
+        found.append((node[1], node[1]))
+    elif node[0] == 'range':
+        found.append(node[1])
+    elif node[0] in ('neg',):
+        _references(node[1], found)
+    elif node[0] in ('arith', 'compare'):
+        _references(node[2], found)
+        _references(node[3], found)
+    elif node[0] == 'concat':
+        _references(node[1], found)
+        _references(node[2], found)
+    elif node[0] == 'call':
+        for arg in node[2]:
+            _references(arg, found)
+    return found
+
+
+@lru_cache(maxsize=4096)
+def _compile_template(text, specs):
+    tree = _Parser(_tokenize(text), specs).parse()
+    return _compile(tree), tuple(_references(tree, []))
+
+
+class Formula:
+    __slots__ = ('text', 'fn', 'refs')
+
+    def __init__(self, text, fn, refs):
+        self.text = text
+        self.fn = fn
+        self.refs = refs  # ((r0, c0, r1, c1), ...) precedents of this instance
+
+
+def compile_formula(text, row, col):
+    """Compile ``=...`` entered at ``(row, col)``; the compiled template is shared."""
+    fn, refs = _compile_template(*_template(text.lstrip()[1:], row, col))
+    resolved = []
+    for start, end in refs:
+        (r0, c0), (r1, c1) = _resolve(start, row, col), _resolve(end, row, col)
+        if min(r0, c0, r1, c1) < 0:
+            raise FormulaError(f"{text} refers outside the sheet when entered in {address(row, col)}")
+        resolved.append((min(r0, r1), min(c0, c1), max(r0, r1), max(c0, c1)))
+    return Formula(text, fn, tuple(resolved))
+
+
+# Functions
+
+def _aggregate_args(args):
+    """Numbers from range and scalar arguments, as one array."""
+    parts = []
+    for arg in args:
+        if isinstance(arg, Range):
+            error = arg.error()
+            if error is not None:
+                raise _Raise(error)
+            numbers = arg.numbers()
+            parts.append(numbers[~np.isnan(numbers)])
+        else:
+            parts.append(np.array([_number(arg)]))
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def _sum(*args):
+    return float(_aggregate_args(args).sum())
+
+
+def _average(*args):
+    numbers = _aggregate_args(args)
+    if not len(numbers):
+        raise _Raise(DIV0)
+    return float(numbers.mean())
+
+
+def _min(*args):
+    numbers = _aggregate_args(args)
+    return float(numbers.min()) if len(numbers) else 0.0
+
+
+def _max(*args):
+    numbers = _aggregate_args(args)
+    return float(numbers.max()) if len(numbers) else 0.0
+
+
+def _count(*args):
+    return float(len(_aggregate_args(args)))
+
+
+def _counta(*args):
+    total = 0
+    for arg in args:
+        if isinstance(arg, Range):
+            total += int(np.count_nonzero(pd.notna(arg.values())))
+        else:
+            total += 1
+    return float(total)
+
+
+_CRITERION = re.compile(r'^(<=|>=|<>|<|>|=)?(.*)$', re.DOTALL)
+
+
+def _criteria_mask(rng, criterion):
+    """Cells of ``rng`` meeting an Excel criterion such as ``"North"``, ``">5"`` or ``"<>x"``."""
+    criterion = _scalar(criterion)
+    op, operand = '=', criterion
+    if isinstance(criterion, str):
+        op, operand = _CRITERION.match(criterion).groups()
+        op = op or '='
+        try:
+            operand = float(operand)
+        except ValueError:
+            if operand.upper() in ('TRUE', 'FALSE'):
+                operand = operand.upper() == 'TRUE'
+    size = rng.shape[0] * rng.shape[1]
+    if isinstance(operand, (int, float)) and not isinstance(operand, bool):
+        numbers = rng.numbers()
+        with np.errstate(invalid='ignore'):
+            mask = {'=': numbers == operand, '<>': numbers != operand, '<': numbers < operand,
+                    '<=': numbers <= operand, '>': numbers > operand, '>=': numbers >= operand}[op]
+        return mask
+    if op in ('=', '<>') and isinstance(operand, str) and not any(ch in operand for ch in '*?~'):
+        if operand == '':
+            mask = np.fromiter((v is None or v == '' for v in rng.values()), bool, size)
+        else:
+            vector = rng.vector()
+            if vector is not None:
+                mask = np.zeros(size, dtype=bool)
+                mask[rng.sheet.index(*vector).rows(_key(operand))] = True
+            else:
+                key = _key(operand)
+                mask = np.fromiter((_key(v) == key for v in rng.values()), bool, size)
+        return ~mask if op == '<>' else mask
+    if op in ('=', '<>') and isinstance(operand, str):
+        pattern = re.compile(
+            ''.join('.*' if ch == '*' else '.' if ch == '?' else re.escape(ch) for ch in operand),
+            re.IGNORECASE | re.DOTALL)
+        mask = np.fromiter((isinstance(v, str) and pattern.fullmatch(v) is not None for v in rng.values()),
+                           bool, size)
+        return ~mask if op == '<>' else mask
+    # Ordered comparison against text or booleans
+    return np.fromiter((v is not None and not isinstance(v, ExcelError) and _compare(op, v, operand)
+                        for v in rng.values()), bool, size)
+
+
+def _ifs_mask(pairs):
+    mask = None
+    shape = None
+    for rng, criterion in pairs:
+        if not isinstance(rng, Range):
+            raise _Raise(VALUE)
+        if shape is not None and rng.shape != shape:
+            raise _Raise(VALUE)
+        shape = rng.shape
+        selected = _criteria_mask(rng, criterion)
+        mask = selected if mask is None else mask & selected
+    return mask
+
+
+def _conditional(values, pairs):
+    if len(pairs) % 2 or not pairs:
+        raise _Raise(VALUE)
+    mask = _ifs_mask(list(zip(pairs[::2], pairs[1::2])))
+    if values is None:
+        return mask, None
+    if not isinstance(values, Range) or values.shape != pairs[0].shape:
+        raise _Raise(VALUE)
+    numbers = values.numbers()[mask]
+    return mask, numbers[~np.isnan(numbers)]
+
+
+def _sumifs(values, *pairs):
+    return float(_conditional(values, pairs)[1].sum())
+
+
+def _countifs(*pairs):
+    return float(np.count_nonzero(_conditional(None, pairs)[0]))
+
+
+def _averageifs(values, *pairs):
+    numbers = _conditional(values, pairs)[1]
+    if not len(numbers):
+        raise _Raise(DIV0)
+    return float(numbers.mean())
+
+
+def _sumif(rng, criterion, values=None):
+    return _sumifs(values if values is not None else rng, rng, criterion)
+
+
+def _averageif(rng, criterion, values=None):
+    return _averageifs(values if values is not None else rng, rng, criterion)
+
+
+def _exact_position(rng, key):
+    """Offset of the first cell equal to ``key`` in a one-dimensional range, or None."""
+    key = _key(_scalar(key))
+    if key is None:
+        return None
+    vector = rng.vector()
+    if vector is not None:
+        return rng.sheet.index(*vector).first(key)
+    for i, value in enumerate(rng.values()):
+        if _key(value) == key:
+            return i
+    return None
+
+
+def _sorted_position(rng, key, descending=False):
+    """Approximate match: the last position whose value is <= ``key`` (>= when descending)."""
+    key = _number(key)
+    numbers = rng.numbers()
+    valid = np.flatnonzero(~np.isnan(numbers))
+    if descending:
+        position = int(np.searchsorted(-numbers[valid], -key, side='right')) - 1
+    else:
+        position = int(np.searchsorted(numbers[valid], key, side='right')) - 1
+    return int(valid[position]) if position >= 0 else None
+
+
+def _vlookup(key, table, index, approximate=True):
+    if not isinstance(table, Range):
+        raise _Raise(VALUE)
+    index = int(_number(index))
+    if not 1 <= index <= table.shape[1]:
+        raise _Raise(REF)
+    first = Range(table.sheet, table.r0, table.c0, table.r1, table.c0)
+    if _truth(approximate) and not isinstance(_scalar(key), str):
+        row = _sorted_position(first, key)
+    else:
+        row = _exact_position(first, key)
+    if row is None:
+        raise _Raise(NA)
+    return table.cell(row, index - 1)
+
+
+def _xlookup(key, lookup, result, if_not_found=None):
+    if not isinstance(lookup, Range) or not isinstance(result, Range):
+        raise _Raise(VALUE)
+    position = _exact_position(lookup, key)
+    if position is None:
+        if if_not_found is not None:
+            return _scalar(if_not_found)
+        raise _Raise(NA)
+    if lookup.shape[1] == 1:
+        return result.cell(position, 0) if position < result.shape[0] else NA
+    return result.cell(0, position) if position < result.shape[1] else NA
+
+
+def _match(key, lookup, match_type=1.0):
+    if not isinstance(lookup, Range) or 1 not in lookup.shape:
+        raise _Raise(NA)
+    match_type = _number(match_type)
+    if match_type == 0:
+        position = _exact_position(lookup, key)
+    else:
+        position = _sorted_position(lookup, key, descending=match_type < 0)
+    if position is None:
+        raise _Raise(NA)
+    return float(position + 1)
+
+
+def _index(table, row, col=None):
+    if not isinstance(table, Range):
+        raise _Raise(VALUE)
+    row = int(_number(row))
+    col = int(_number(col)) if col is not None else 1
+    if table.shape[0] == 1 and col == 1 and row > 1:
+        row, col = 1, row  # INDEX(row_vector, n)
+    if not (1 <= row <= table.shape[0] and 1 <= col <= table.shape[1]):
+        raise _Raise(REF)
+    return table.cell(row - 1, col - 1)
+
+
+def _if(s, r, c, args):
+    if len(args) not in (2, 3):
+        raise _Raise(VALUE)
+    if _truth(args[0](s, r, c)):
+        return args[1](s, r, c)
+    return args[2](s, r, c) if len(args) == 3 else False
+
+
+def _iferror(s, r, c, args):
+    if len(args) != 2:
+        raise _Raise(VALUE)
+    try:
+        value = _scalar(args[0](s, r, c))
+    except _Raise:
+        return args[1](s, r, c)
+    return value
+
+
+def _ifna(s, r, c, args):
+    if len(args) != 2:
+        raise _Raise(VALUE)
+    try:
+        value = _scalar(args[0](s, r, c))
+    except _Raise as error:
+        if error.error != NA:
+            raise
+        return args[1](s, r, c)
+    return value
+
+
+def _and(*args):
+    return all(_truth(a) for a in args)
+
+
+def _or(*args):
+    return any(_truth(a) for a in args)
+
+
+_DECIMALS = Context(prec=1000)  # enough digits for any float64 at any useful precision
+
+
+def _round(value, digits=0.0):
+    # Excel rounds halves away from zero, and rounds the decimal shown (2.675 -> 2.68)
+    value, digits = _number(value), int(_number(digits))
+    try:
+        rounded = Decimal(repr(value)).quantize(Decimal(1).scaleb(-digits), ROUND_HALF_UP, _DECIMALS)
+    except InvalidOperation:
+        raise _Raise(NUM) from None
+    return float(rounded) + 0.0  # no -0
+
+
+_FUNCTIONS = {
+    # name: (function, lazy); lazy functions get the compiled arguments unevaluated
+    'SUM': (_sum, False),
+    'AVERAGE': (_average, False),
+    'MIN': (_min, False),
+    'MAX': (_max, False),
+    'COUNT': (_count, False),
+    'COUNTA': (_counta, False),
+    'SUMIF': (_sumif, False),
+    'SUMIFS': (_sumifs, False),
+    'COUNTIF': (_countifs, False),
+    'COUNTIFS': (_countifs, False),
+    'AVERAGEIF': (_averageif, False),
+    'AVERAGEIFS': (_averageifs, False),
+    'VLOOKUP': (_vlookup, False),
+    'XLOOKUP': (_xlookup, False),
+    'MATCH': (_match, False),
+    'INDEX': (_index, False),
+    'IF': (_if, True),
+    'IFERROR': (_iferror, True),
+    'IFNA': (_ifna, True),
+    'AND': (_and, False),
+    'OR': (_or, False),
+    'NOT': (lambda value: not _truth(value), False),
+    'ROUND': (_round, False),
+    'ABS': (lambda value: abs(_number(value)), False),
+    'LEN': (lambda value: float(len(_text(value))), False),
+    'UPPER': (lambda value: _text(value).upper(), False),
+    'LOWER': (lambda value: _text(value).lower(), False),
+    'CONCAT': (lambda *values: ''.join(_text(v) for v in values), False),
+}
+FUNCTIONS = tuple(sorted(_FUNCTIONS))
+
+
+# Storage
+
+class _Column:
+    """Values of one column: numbers as float64 (NaN elsewhere) next to all values as objects."""
+
+    __slots__ = ('num', 'obj', 'errors')
+
+    def __init__(self, capacity=16):
+        self.num = np.full(capacity, np.nan)
+        self.obj = np.full(capacity, None, dtype=object)
+        self.errors = set()
+
+    def put(self, row, value):
+        if row >= len(self.num):
+            capacity = max(row + 1, 2 * len(self.num))
+            self.num = np.concatenate([self.num, np.full(capacity - len(self.num), np.nan)])
+            self.obj = np.concatenate([self.obj, np.full(capacity - len(self.obj), None, dtype=object)])
+        self.obj[row] = value
+        self.num[row] = value if isinstance(value, float) else np.nan
+        if isinstance(value, ExcelError):
+            self.errors.add(row)
+        else:
+            self.errors.discard(row)
+
+    def numbers(self, r0, r1):
+        if r1 < len(self.num):
+            return self.num[r0:r1 + 1]
+        return np.concatenate([self.num[r0:], np.full(r1 + 1 - max(r0, len(self.num)), np.nan)])
+
+    def objects(self, r0, r1):
+        if r1 < len(self.obj):
+            return self.obj[r0:r1 + 1]
+        return np.concatenate([self.obj[r0:], np.full(r1 + 1 - max(r0, len(self.obj)), None, dtype=object)])
+
+
+class _LookupIndex:
+    """Hash index of one column range: key -> sorted offsets of the cells holding it."""
+
+    __slots__ = ('positions',)
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(pd.Series([_key(v) for v in values], dtype=object))
+        order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        order = order[len(codes) - int(counts.sum()):]  # blank cells (code -1) sort first
+        self.positions = dict(zip(uniques, np.split(order, np.cumsum(counts)[:-1])))
+
+    def first(self, key):
+        offsets = self.positions.get(key)
+        return int(offsets[0]) if offsets is not None and len(offsets) else None
+
+    def rows(self, key):
+        return self.positions.get(key, np.empty(0, dtype=np.int64))
+
+    def replace(self, offset, old, new):
+        """Move one cell from key ``old`` to key ``new`` (None for blank)."""
+        if old is not None and old in self.positions:
+            offsets = self.positions[old]
+            self.positions[old] = offsets[offsets != offset]
+        if new is not None:
+            offsets = self.positions.get(new, np.empty(0, dtype=np.int64))
+            self.positions[new] = np.insert(offsets, np.searchsorted(offsets, offset), offset)
+
+
+class _RangeDependents:
+    """Formulas depending on ranges that span rows of one column, as interval arrays."""
+
+    __slots__ = ('entries', 'arrays')
+
+    def __init__(self):
+        self.entries = {}  # (formula cell, r0, r1) -> None, kept in insertion order
+        self.arrays = None
+
+    def add(self, cell, r0, r1):
+        self.entries[(cell, r0, r1)] = None
+        self.arrays = None
+
+    def remove(self, cell, r0, r1):
+        self.entries.pop((cell, r0, r1), None)
+        self.arrays = None
+
+    def covering(self, row):
+        if len(self.entries) <= 16:
+            return [cell for cell, r0, r1 in self.entries if r0 <= row <= r1]
+        if self.arrays is None:
+            keys = list(self.entries)
+            self.arrays = (np.fromiter((k[1] for k in keys), np.int64, len(keys)),
+                           np.fromiter((k[2] for k in keys), np.int64, len(keys)),
+                           [k[0] for k in keys])
+        starts, ends, cells = self.arrays
+        return [cells[i] for i in np.flatnonzero((starts <= row) & (ends >= row))]
+
+
+class Sheet:
+    """One worksheet with automatic, incremental recalculation."""
+
+    def __init__(self):
+        self._columns = {}
+        self._formulas = {}                      # (row, col) -> Formula
+        self._dependents = defaultdict(set)      # (row, col) -> formula cells reading it
+        self._range_dependents = defaultdict(_RangeDependents)  # col -> ranges over it
+        self._indexes = defaultdict(dict)        # col -> {(r0, r1): _LookupIndex}
+        self.rows = 0
+        self.columns = 0
+        self.last_recalc = (0, 0.0)  # (formulas computed, seconds)
+
+    # Reading
+
+    def column(self, col):
+        column = self._columns.get(col)
+        if column is None:
+            column = self._columns[col] = _Column()
+        return column
+
+    def get(self, row, col):
+        column = self._columns.get(col)
+        if column is None or row >= len(column.obj):
+            return None
+        return column.obj[row]
+
+    def value(self, ref):
+        return self.get(*parse_address(ref))
+
+    def formula(self, ref):
+        formula = self._formulas.get(parse_address(ref))
+        return None if formula is None else formula.text
+
+    def index(self, col, r0, r1):
+        """Hash index over ``col`` rows ``r0..r1``, kept up to date as cells change."""
+        indexes = self._indexes[col]
+        index = indexes.get((r0, r1))
+        if index is None:
+            if len(indexes) >= MAX_INDEXES_PER_COLUMN:
+                del indexes[next(iter(indexes))]
+            index = indexes[(r0, r1)] = _LookupIndex(self.column(col).objects(r0, r1))
+        return index
+
+    # Editing
+
+    def set(self, ref, content):
+        """Enter ``content`` in one cell; returns the number of formulas recomputed."""
+        return self.set_many({ref: content})
+
+    def set_many(self, contents):
+        """Enter several cells, then recalculate what depends on them once.
+
+        ``contents`` maps addresses (``'B2'`` or ``(row, col)``) to a number,
+        text, a formula starting with ``=``, or None/'' to clear the cell.
+        Raises :class:`FormulaError` for a formula that cannot be parsed,
+        leaving the sheet unchanged.
+        """
+        parsed = {}
+        for ref, content in contents.items():
+            row, col = parse_address(ref) if isinstance(ref, str) else ref
+            parsed[(row, col)] = self._parse(content, row, col)
+        for cell, content in parsed.items():
+            self._unlink(cell)
+            if isinstance(content, Formula):
+                self._formulas[cell] = content
+                self._link(cell, content)
+            else:
+                self._store(cell, content)
+        return self._recalculate(parsed)
+
+    def _parse(self, content, row, col):
+        if isinstance(content, str):
+            text = content.strip()
+            if text.startswith('=') and len(text) > 1:
+                return compile_formula(text, row, col)
+            if text == '':
+                return None
+            if text.upper() in ('TRUE', 'FALSE'):
+                return text.upper() == 'TRUE'
+            try:
+                return float(text.replace(',', ''))
+            except ValueError:
+                return content
+        if isinstance(content, bool) or content is None:
+            return content
+        if isinstance(content, (int, float, np.number)):
+            return float(content)
+        raise FormulaError(f"Cannot store {type(content).__name__} in a cell")
+
+    def _store(self, cell, value):
+        row, col = cell
+        column = self.column(col)
+        indexes = self._indexes.get(col)
+        if indexes:
+            old, new = _key(self.get(row, col)), _key(value)
+            if old != new:
+                for (r0, r1), index in indexes.items():
+                    if r0 <= row <= r1:
+                        index.replace(row - r0, old, new)
+        column.put(row, value)
+        if value is not None:
+            self.rows = max(self.rows, row + 1)
+            self.columns = max(self.columns, col + 1)
+
+    def _link(self, cell, formula):
+        for r0, c0, r1, c1 in formula.refs:
+            if r0 == r1 and c0 == c1:
+                self._dependents[(r0, c0)].add(cell)
+            else:
+                for c in range(c0, c1 + 1):
+                    self._range_dependents[c].add(cell, r0, r1)
+
+    def _unlink(self, cell):
+        formula = self._formulas.pop(cell, None)
+        if formula is None:
+            return
+        for r0, c0, r1, c1 in formula.refs:
+            if r0 == r1 and c0 == c1:
+                self._dependents[(r0, c0)].discard(cell)
+            else:
+                for c in range(c0, c1 + 1):
+                    self._range_dependents[c].remove(cell, r0, r1)
+
+    def _readers(self, cell):
+        readers = list(self._dependents.get(cell, ()))
+        ranges = self._range_dependents.get(cell[1])
+        if ranges is not None and ranges.entries:
+            readers.extend(ranges.covering(cell[0]))
+        return readers
+
+    def _recalculate(self, changed):
+        """Recompute the formulas reachable from ``changed``, precedents first."""
+        started = time.perf_counter()
+        # Dirty subgraph: every formula reachable from the edited cells
+        dirty = {cell for cell in changed if cell in self._formulas}
+        stack = list(changed)
+        edges = {}
+        while stack:
+            cell = stack.pop()
+            readers = edges[cell] = self._readers(cell)
+            for reader in readers:
+                if reader not in dirty:
+                    dirty.add(reader)
+                    stack.append(reader)
+
+        # Kahn's algorithm over the dirty formulas; edges from edited values don't count
+        waiting = dict.fromkeys(dirty, 0)
+        for cell in dirty:
+            for reader in edges[cell]:
+                waiting[reader] += 1
+        ready = [cell for cell, n in waiting.items() if n == 0]
+        computed = 0
+        while ready:
+            cell = ready.pop()
+            del waiting[cell]
+            self._evaluate(cell)
+            computed += 1
+            for reader in edges.get(cell, ()):
+                if reader in waiting:
+                    waiting[reader] -= 1
+                    if waiting[reader] == 0:
+                        ready.append(reader)
+        for cell in waiting:
+            # Whatever never became ready is on or behind a cycle
+            self._store(cell, CYCLE)
+        self.last_recalc = (computed + len(waiting), time.perf_counter() - started)
+        return self.last_recalc[0]
+
+    def _evaluate(self, cell):
+        row, col = cell
+        try:
+            value = self._formulas[cell].fn(self, row, col)
+            if isinstance(value, Range):
+                value = _scalar(value)
+        except _Raise as error:
+            value = error.error
+        except (RecursionError, OverflowError):
+            value = NUM
+        if value is None:
+            value = 0.0
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+            if not np.isfinite(value):
+                value = NUM
+        self._store(cell, value)
+
+    # Display
+
+    def to_frame(self, rows=None, columns=None, formulas=False):
+        """The sheet as a DataFrame with Excel row numbers and column letters.
+
+        ``formulas=True`` shows formula text in formula cells, as the grid is edited.
+        """
+        rows = max(rows or 0, self.rows)
+        columns = max(columns or 0, self.columns)
+        data = {}
+        for col in range(columns):
+            column = self._columns.get(col)
+            values = list(column.objects(0, rows - 1)) if column is not None and rows else [None] * rows
+            if formulas:
+                for (row, c), formula in self._formulas.items():
+                    if c == col and row < rows:
+                        values[row] = formula.text
+            data[column_letter(col)] = [_display(v, formulas) for v in values]
+        return pd.DataFrame(data, index=pd.RangeIndex(1, rows + 1))
+
+
+def _display(value, as_input):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float):
+        if as_input:
+            return f"{value:g}" if value != int(value) else str(int(value))
+        return f"{value:,.10g}" if value != int(value) else f"{int(value):,}"
+    return str(value)
+
+
+EXAMPLE = {
+    'A1': 'Product', 'B1': 'Region', 'C1': 'Units', 'D1': 'Price',
+    'A2': 'Laptop', 'B2': 'North', 'C2': 12, 'D2': 950,
+    'A3': 'Monitor', 'B3': 'South', 'C3': 30, 'D3': 210,
+    'A4': 'Laptop', 'B4': 'South', 'C4': 8, 'D4': 990,
+    'A5': 'Keyboard', 'B5': 'North', 'C5': 45, 'D5': 35,
+    'A6': 'Monitor', 'B6': 'North', 'C6': 18, 'D6': 205,
+    'E1': 'Revenue', 'E2': '=C2*D2', 'E3': '=C3*D3', 'E4': '=C4*D4', 'E5': '=C5*D5', 'E6': '=C6*D6',
+    'G1': 'North revenue', 'H1': '=SUMIFS(E2:E6, B2:B6, "North")',
+    'G2': 'Laptop units', 'H2': '=SUMIFS(C:C, A:A, "Laptop")',
+    'G3': 'Monitor price', 'H3': '=VLOOKUP("Monitor", A2:D6, 4, FALSE)',
+    'G4': 'Keyboard region', 'H4': '=XLOOKUP("Keyboard", A2:A6, B2:B6, "not found")',
+    'G5': 'Best seller', 'H5': '=INDEX(A2:A6, MATCH(MAX(E2:E6), E2:E6, 0))',
+}
+
+
+def example_sheet():
+    """A small sales table with SUMIFS, VLOOKUP, XLOOKUP and INDEX/MATCH to edit."""
+    sheet = Sheet()
+    sheet.set_many(EXAMPLE)
+    return sheet
+
+
+def benchmark_recalc(formulas=100_000, edits=20, seed=0):
+    """Build a sheet with ``formulas`` formulas, then time single-cell edits.
+
+    Column B holds ``=A{n}*2+1`` for every input in column A, and a few
+    aggregates (SUM, SUMIFS, XLOOKUP) read whole columns, so each edit dirties
+    one row formula plus the aggregates.
+    """
+    rng = np.random.default_rng(seed)
+    rows = formulas - 3
+    regions = ('North', 'South', 'East', 'West')
+    sheet = Sheet()
+    started = time.perf_counter()
+    cells = {}
+    for row, (value, region) in enumerate(zip(rng.integers(1, 100, rows).tolist(), rng.integers(0, 4, rows).tolist())):
+        cells[(row, 0)] = value
+        cells[(row, 2)] = regions[region]
+        cells[(row, 1)] = f"=A{row + 1}*2+1"
+    cells.update({'E1': '=SUM(B:B)', 'E2': '=SUMIFS(B:B, C:C, "North")', 'E3': f'=XLOOKUP(42, A1:A{rows}, B1:B{rows}, 0)'})
+    sheet.set_many(cells)
+    build_seconds = time.perf_counter() - started
+    times, recomputed = [], []
+    for row in rng.integers(0, rows, edits).tolist():
+        started = time.perf_counter()
+        recomputed.append(sheet.set((row, 0), int(rng.integers(1, 100))))
+        times.append(time.perf_counter() - started)
+    return {
+        'formulas': len(sheet._formulas),
+        'build_seconds': build_seconds,
+        'edit_ms_p50': float(np.median(times)) * 1000,
+        'edit_ms_max': float(np.max(times)) * 1000,
+        'recomputed_per_edit': float(np.mean(recomputed)),
+    }
@@ -0,0 +1,142 @@
+"""SM-2 spaced-repetition scheduling for lessons and quiz questions.
+
+Card state lives in parallel NumPy arrays indexed by an integer card id, and a
+min-heap of ``(due, card)`` pairs answers "what is due now" in O(log n) per
+returned card.  Rescheduling pushes a new heap entry instead of searching for
+the old one; stale entries are recognised by comparing against the ``due``
+array and dropped lazily.  The schedule is a pure function of the review
+history, so the review list is stable across reruns.
+"""
+
+import heapq
+import time
+
+import numpy as np
+
+DAY = 24 * 3600
+MIN_EASE = 1.3
+START_EASE = 2.5
+
+
+def lesson_card(module, lesson_index):
+    return f"{module}/{lesson_index}"
+
+
+def quiz_card(module, question_index):
+    return f"{module}/q{question_index}"
+
+
+class ReviewScheduler:
+    """Per-learner SM-2 scheduler over string card keys."""
+
+    __slots__ = ('keys', '_ids', 'ease', 'interval', 'due', 'reps', '_heap')
+
+    def __init__(self, capacity=16):
+        self.keys = []
+        self._ids = {}
+        self.ease = np.empty(capacity, np.float32)
+        self.interval = np.empty(capacity, np.float32)  # days
+        self.due = np.empty(capacity, np.int64)         # epoch seconds
+        self.reps = np.empty(capacity, np.int16)
+        self._heap = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._ids
+
+    def _grow(self):
+        capacity = 2 * len(self.ease)
+        for name in ('ease', 'interval', 'due', 'reps'):
+            old = getattr(self, name)
+            new = np.empty(capacity, old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _card(self, key, now):
+        card = self._ids.get(key)
+        if card is None:
+            card = len(self.keys)
+            if card == len(self.ease):
+                self._grow()
+            self.keys.append(key)
+            self._ids[key] = card
+            self.ease[card] = START_EASE
+            self.interval[card] = 0
+            self.reps[card] = 0
+            self.due[card] = now
+        return card
+
+    def _push(self, card):
+        heapq.heappush(self._heap, (int(self.due[card]), card))
+        # Rebuild once stale entries dominate so the heap stays O(n)
+        if len(self._heap) > 4 * len(self.keys) + 64:
+            self._heap = [(int(self.due[c]), c) for c in range(len(self.keys))]
+            heapq.heapify(self._heap)
+
+    def review(self, key, grade, now=None):
+        """Record a review graded 0 (blackout) to 5 (perfect) and reschedule the card."""
+        now = int(time.time() if now is None else now)
+        card = self._card(key, now)
+        if grade < 3:
+            self.reps[card] = 0
+            interval = 1.0
+        else:
+            reps = int(self.reps[card])
+            if reps == 0:
+                interval = 1.0
+            elif reps == 1:
+                interval = 6.0
+            else:
+                interval = float(np.ceil(self.interval[card] * self.ease[card]))
+            self.reps[card] = reps + 1
+        q = 5 - grade
+        self.ease[card] = max(MIN_EASE, float(self.ease[card]) + 0.1 - q * (0.08 + q * 0.02))
+        self.interval[card] = interval
+        self.due[card] = now + int(interval * DAY)
+        self._push(card)
+        return int(self.due[card])
+
+    def due_now(self, now=None, limit=None):
+        """Keys of due cards, most overdue first."""
+        now = int(time.time() if now is None else now)
+        heap = self._heap
+        found = []
+        seen = set()
+        while heap and heap[0][0] <= now and (limit is None or len(found) < limit):
+            due, card = heapq.heappop(heap)
+            # Entries left behind by a reschedule (or duplicates of one) are dropped here
+            if due == self.due[card] and card not in seen:
+                seen.add(card)
+                found.append((due, card))
+        for entry in found:
+            heapq.heappush(heap, entry)
+        return [self.keys[card] for _, card in found]
+
+    def due_count(self, now=None):
+        now = int(time.time() if now is None else now)
+        return int(np.count_nonzero(self.due[:len(self.keys)] <= now))
+
+    def to_dict(self):
+        n = len(self.keys)
+        return {
+            'keys': list(self.keys),
+            'ease': self.ease[:n].tolist(),
+            'interval': self.interval[:n].tolist(),
+            'due': self.due[:n].tolist(),
+            'reps': self.reps[:n].tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        keys = data.get('keys', [])
+        scheduler = cls(capacity=max(16, len(keys)))
+        n = len(keys)
+        scheduler.keys = list(keys)
+        scheduler._ids = {key: i for i, key in enumerate(keys)}
+        for name in ('ease', 'interval', 'due', 'reps'):
+            getattr(scheduler, name)[:n] = data.get(name, [])
+        scheduler._heap = [(int(due), card) for card, due in enumerate(scheduler.due[:n])]
+        heapq.heapify(scheduler._heap)
+        return scheduler
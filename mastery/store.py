@@ -0,0 +1,167 @@
+"""Durable learner progress in a local SQLite database.
+
+The database runs in WAL mode with ``synchronous=NORMAL`` so readers never
+block the writer and commits do not fsync individually.  Saves are not written
+immediately: they are coalesced per ``(learner, field)`` in memory and a single
+background thread flushes them in one transaction every ``flush_interval``
+seconds, so a burst of clicks from thousands of sessions costs one commit.
+Reads go through a small pool of connections shared by all sessions.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+DB_PATH = os.environ.get('MASTERY_DB_PATH', 'mastery_progress.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS learner_state (
+    learner    TEXT NOT NULL,
+    field      TEXT NOT NULL,
+    value      TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (learner, field)
+) WITHOUT ROWID
+"""
+
+_UPSERT = """
+INSERT INTO learner_state (learner, field, value, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT (learner, field) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+"""
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    return conn
+
+
+class ProgressStore:
+    """Coalescing, pooled key/value store of per-learner session fields."""
+
+    def __init__(self, path=DB_PATH, pool_size=4, flush_interval=0.5, max_batch=5000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.writes_requested = 0
+        self.writes_flushed = 0
+        self.flushes = 0
+
+        self._writer = _connect(path)
+        self._writer.execute(_SCHEMA)
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(_connect(path))
+
+        self._pending = {}
+        self._inflight = {}  # batch being committed, still visible to load()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='progress-store-writer', daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def _reader(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def save(self, learner, field, value):
+        """Queue ``value`` (JSON-serializable) for ``learner``; later saves of the same field win."""
+        payload = json.dumps(value, separators=(',', ':'))
+        with self._pending_lock:
+            self._pending[(learner, field)] = payload
+            self.writes_requested += 1
+            backlog = len(self._pending)
+        if backlog >= self.max_batch:
+            self._wake.set()
+
+    def load(self, learner):
+        """All stored fields of ``learner``, including saves not flushed yet."""
+        with self._reader() as conn:
+            rows = conn.execute(
+                'SELECT field, value FROM learner_state WHERE learner = ?', (learner,)
+            ).fetchall()
+        state = {field: json.loads(value) for field, value in rows}
+        with self._pending_lock:
+            unflushed = {**self._inflight, **self._pending}
+        state.update(
+            (field, json.loads(value)) for (owner, field), value in unflushed.items() if owner == learner
+        )
+        return state
+
+    def flush(self):
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            now = time.time()
+            rows = [(learner, field, value, now) for (learner, field), value in batch.items()]
+            self._writer.execute('BEGIN IMMEDIATE')
+            try:
+                self._writer.executemany(_UPSERT, rows)
+                self._writer.execute('COMMIT')
+            except BaseException:
+                self._writer.execute('ROLLBACK')
+                # Put the batch back unless a newer value arrived meanwhile
+                with self._pending_lock:
+                    for key, value in batch.items():
+                        self._pending.setdefault(key, value)
+                    self._inflight = {}
+                raise
+            with self._pending_lock:
+                self._inflight = {}
+            self.writes_flushed += len(rows)
+            self.flushes += 1
+            return len(rows)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Keep the writer alive; the batch was re-queued and is retried next tick
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self._writer.close()
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def stats(self):
+        return {
+            'pending': len(self._pending),
+            'writes_requested': self.writes_requested,
+            'writes_flushed': self.writes_flushed,
+            'flushes': self.flushes,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    """Process-wide store shared by every session; flushed on interpreter exit."""
+    store = ProgressStore()
+    atexit.register(store.close)
+    return store
@@ -0,0 +1,176 @@
+"""Playground visuals that stay small on the wire.
+
+Plotly serializes every mark into the page, so a chart over millions of rows
+is slow twice: once to encode it and once to draw it.  Scatter plots switch
+to WebGL (``scattergl``) above WEBGL_ROWS and plot a uniform sample of at most
+MAX_POINTS rows.  Bars, histograms and heatmaps are reduced server-side with
+``bincount`` over group codes or fixed-width bins, so only the bins are sent.
+Numbers go out as float32.  Figures are cached like every other chart, and
+:func:`visual` reports the serialized payload next to what shipping the raw
+rows would have cost.
+"""
+
+import numpy as np
+
+from mastery.figures import cached_figure, payload_bytes
+from mastery.lazy import lazy_import
+from mastery.pivot import field_codes, pivot_fields, value_fields
+
+go = lazy_import('plotly.graph_objects')
+
+KINDS = ('Scatter', 'Bar', 'Histogram', 'Heatmap')
+AGGREGATIONS = ('Sum', 'Average', 'Count')
+WEBGL_ROWS = 10_000
+MAX_POINTS = 100_000
+BINS = 50
+HEATMAP_BINS = 40
+
+
+class VisualError(ValueError):
+    pass
+
+
+def axis_options(df, kind):
+    """``(x choices, y choices)`` for a visual kind; y is empty when the kind has no y axis."""
+    numeric = value_fields(df)
+    if kind == 'Scatter':
+        return numeric, numeric
+    if kind == 'Bar':
+        return pivot_fields(df), numeric
+    if kind == 'Histogram':
+        return numeric, []
+    axes = numeric + [f for f in pivot_fields(df) if f not in numeric]
+    return axes, axes
+
+
+def _bins(df, name, bins):
+    """``(codes, centers, width)``: fixed-width bin of each row (-1 for missing values)."""
+    values = df[name].to_numpy()
+    if values.dtype.kind == 'f':
+        valid = np.isfinite(values)
+        present = values[valid]
+    else:
+        valid, present = None, values
+    if not len(present):
+        return np.full(len(values), -1, dtype=np.int32), np.empty(0, dtype=np.float32), 1.0
+    lo, hi = present.min(), present.max()
+    if values.dtype.kind in 'iub' and int(hi) - int(lo) < bins:
+        # Few distinct integers: one bin per value
+        codes = values.astype(np.int32) - np.int32(lo)
+        return codes, np.arange(int(lo), int(hi) + 1, dtype=np.float32), 1.0
+    width = (float(hi) - float(lo)) / bins or 1.0
+    codes = ((values.astype(np.float64) - float(lo)) * (1 / width)).astype(np.int32)
+    np.minimum(codes, bins - 1, out=codes)  # the maximum belongs to the last bin
+    if valid is not None:
+        codes[~valid] = -1
+    centers = (float(lo) + (np.arange(bins) + 0.5) * width).astype(np.float32)
+    return codes, centers, width
+
+
+def _axis(df, name, bins):
+    """``(codes, coordinates)`` for a heatmap axis: binned numbers or a pivot field's items."""
+    if name in value_fields(df):
+        codes, centers, _ = _bins(df, name, bins)
+        return codes, centers
+    codes, labels = field_codes(df, name)
+    return codes, list(labels)
+
+
+def _scatter(df, x, y):
+    n = len(df)
+    rows = slice(None)
+    if n > MAX_POINTS:
+        rows = np.sort(np.random.default_rng(0).choice(n, MAX_POINTS, replace=False))
+    xs = df[x].to_numpy()[rows].astype(np.float32)
+    ys = df[y].to_numpy()[rows].astype(np.float32)
+    trace = go.Scattergl if n > WEBGL_ROWS else go.Scatter
+    figure = go.Figure(trace(x=xs, y=ys, mode='markers', marker=dict(size=3, opacity=0.5)))
+    figure.update_layout(xaxis_title=x, yaxis_title=y)
+    return figure
+
+
+def _bar(df, x, y, agg):
+    codes, labels = field_codes(df, x)
+    if agg == 'Count' or y is None:
+        heights = np.bincount(codes, minlength=len(labels)).astype(np.float32)
+        title = 'Count of rows'
+    else:
+        values = df[y].to_numpy()
+        if values.dtype.kind == 'f':
+            valid = ~np.isnan(values)
+            codes, values = codes[valid], values[valid]
+        heights = np.bincount(codes, weights=values, minlength=len(labels))
+        if agg == 'Average':
+            with np.errstate(invalid='ignore'):
+                heights = heights / np.bincount(codes, minlength=len(labels))
+        heights = heights.astype(np.float32)
+        title = f"{agg} of {y}"
+    figure = go.Figure(go.Bar(x=list(labels), y=heights))
+    figure.update_layout(xaxis_title=x, yaxis_title=title)
+    return figure
+
+
+def _histogram(df, x):
+    codes, centers, width = _bins(df, x, BINS)
+    counts = np.bincount(codes[codes >= 0], minlength=len(centers)).astype(np.float32)
+    figure = go.Figure(go.Bar(x=centers, y=counts, width=width))
+    figure.update_layout(xaxis_title=x, yaxis_title='Rows', bargap=0)
+    return figure
+
+
+def _heatmap(df, x, y):
+    if x == y:
+        raise VisualError("Choose two different fields for a heatmap")
+    x_codes, x_coords = _axis(df, x, HEATMAP_BINS)
+    y_codes, y_coords = _axis(df, y, HEATMAP_BINS)
+    valid = (x_codes >= 0) & (y_codes >= 0)
+    cells = y_codes[valid].astype(np.int64) * len(x_coords) + x_codes[valid]
+    counts = np.bincount(cells, minlength=len(x_coords) * len(y_coords)).astype(np.float32)
+    counts[counts == 0] = np.nan  # empty cells stay blank
+    figure = go.Figure(go.Heatmap(x=x_coords, y=y_coords, z=counts.reshape(len(y_coords), len(x_coords)),
+                                  colorscale='Blues', colorbar=dict(title='Rows')))
+    figure.update_layout(xaxis_title=x, yaxis_title=y)
+    return figure
+
+
+def build_visual(df, kind, x, y=None, agg='Sum'):
+    """A Plotly figure for ``kind`` over ``df``; prefer :func:`visual`, which caches."""
+    if kind == 'Scatter':
+        return _scatter(df, x, y)
+    if kind == 'Bar':
+        return _bar(df, x, y, agg)
+    if kind == 'Histogram':
+        return _histogram(df, x)
+    if kind == 'Heatmap':
+        return _heatmap(df, x, y)
+    raise VisualError(f"Unknown visual {kind!r}; choose one of {KINDS}")
+
+
+def visual(df, kind, x, y=None, agg='Sum', layout=None):
+    """Cached ``(figure, report)``; the report describes what is sent to the browser.
+
+    ``report`` has the trace ``renderer`` ('WebGL' or 'SVG'), the number of
+    ``marks`` drawn, the serialized ``payload_bytes`` and ``raw_bytes``, an
+    estimate of the same chart built from every row.
+    """
+    figure = cached_figure(build_visual, df, kind, x, y, agg, layout=layout)
+    payload = payload_bytes(build_visual, df, kind, x, y, agg, layout=layout)
+    trace = figure.data[0]
+    if trace.type == 'heatmap':
+        marks = int(np.count_nonzero(~np.isnan(np.asarray(trace.z, dtype=np.float32))))
+    else:
+        marks = len(trace.x)
+    columns = 1 if kind == 'Histogram' or (kind == 'Bar' and agg == 'Count') else 2
+    return figure, {
+        'renderer': 'WebGL' if trace.type.endswith('gl') else 'SVG',
+        'marks': marks,
+        'payload_bytes': payload,
+        # Plotly base64-encodes float64 arrays: 8 bytes per value, 4/3 for the encoding
+        'raw_bytes': len(df) * columns * 8 * 4 // 3,
+    }
+
+
+def format_bytes(n):
+    if n < 1 << 20:
+        return f"{n / 1024:,.0f} KB" if n >= 1024 else f"{n:,} B"
+    return f"{n / (1 << 20):,.1f} MB"
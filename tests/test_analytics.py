@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from mastery.analytics import NS_PER_SECOND, SESSION_GAP_SECONDS, LearningAnalytics
+from mastery.events import EventLog
+
+T0 = 1_700_000_000  # epoch seconds
+
+
+def log_pages(pages):
+    """Log ``(start, seconds, module)`` page visits the way the app stamps them, at their end."""
+    log = EventLog()
+    for start, seconds, module in pages:
+        log.append('time_on_page', module, value=seconds, timestamp=(start + seconds) * NS_PER_SECOND)
+    return log
+
+
+def test_sessions_split_on_real_gaps():
+    gap = SESSION_GAP_SECONDS
+    pages = [
+        (T0, 60, 'excel_basics'),
+        (T0 + 60 + gap - 60, 60, 'excel_basics'),   # 29 min away: same session
+        (T0 + 2 * gap + 120, 120, 'excel_formulas'),  # 31 min away: new session
+        (T0 + 5 * gap, 30, None),                    # long idle, never logged: new session
+    ]
+    analytics = LearningAnalytics().update(log_pages(pages))
+    assert analytics.sessions == 3
+    assert analytics.total_seconds == 270
+    assert analytics.average_session_minutes == 270 / 3 / 60
+
+
+def test_incremental_updates_match_a_single_pass():
+    rng = np.random.default_rng(0)
+    starts = T0 + np.cumsum(rng.integers(10, 3 * SESSION_GAP_SECONDS, 200))
+    seconds = rng.integers(5, SESSION_GAP_SECONDS, 200)
+    modules = rng.choice(['excel_basics', 'excel_formulas', None], 200)
+    pages = list(zip(starts.tolist(), seconds.tolist(), modules.tolist()))
+
+    whole = LearningAnalytics().update(log_pages(pages))
+    log = EventLog()
+    incremental = LearningAnalytics()
+    for start, length, module in pages:
+        log.append('time_on_page', module, value=length, timestamp=(start + length) * NS_PER_SECOND)
+        if rng.random() < 0.3:
+            incremental.update(log)
+    incremental.update(log)
+    assert incremental.sessions == whole.sessions
+    assert incremental.daily_seconds == whole.daily_seconds
+    assert incremental.module_seconds == whole.module_seconds
+
+
+def test_aggregates_match_pandas():
+    rng = np.random.default_rng(1)
+    starts = T0 + np.cumsum(rng.integers(10, 20_000, 300))
+    seconds = rng.integers(5, 1_000, 300)
+    modules = rng.choice(['excel_basics', 'excel_formulas', 'data_analysis'], 300)
+    analytics = LearningAnalytics().update(log_pages(zip(starts.tolist(), seconds.tolist(), modules.tolist())))
+
+    frame = pd.DataFrame({'start': pd.to_datetime(starts, unit='s'), 'seconds': seconds, 'module': modules})
+    by_module = frame.groupby('module')['seconds'].sum()
+    assert analytics.module_seconds == {k: float(v) for k, v in by_module.items()}
+    by_hour = frame.groupby(frame['start'].dt.hour)['seconds'].sum()
+    np.testing.assert_allclose(analytics.hour_seconds[by_hour.index], by_hour.to_numpy())
+    by_day = frame.groupby(frame['start'].dt.normalize())['seconds'].sum()
+    assert sorted(analytics.daily_seconds.values()) == sorted(by_day.astype(float).tolist())
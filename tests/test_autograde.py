@@ -0,0 +1,165 @@
+import io
+import time
+import zipfile
+
+import openpyxl
+import pytest
+from openpyxl.chart import BarChart, Reference
+from openpyxl.formatting.rule import CellIsRule, FormulaRule
+from openpyxl.styles import Font, NamedStyle, PatternFill
+from openpyxl.worksheet.datavalidation import DataValidation
+
+from mastery import autograde
+from mastery.autograde import GradingError, GradingQueue, grade_submission
+
+# openpyxl warns that it drops the sparklines; the grader reads them from the sheet XML
+pytestmark = pytest.mark.filterwarnings('ignore:Sparkline Group extension')
+
+WORKBOOK_EXERCISES = [e for e in autograde.exercise_ids() if not e.startswith(autograde.POWERBI_PREFIX)]
+POWERBI_EXERCISES = [e for e in autograde.exercise_ids() if e.startswith(autograde.POWERBI_PREFIX)]
+
+PIVOT_TABLE = b"""<pivotTableDefinition xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    name="PivotTable1" cacheId="1" dataCaption="Values"><location ref="E1:F5" firstHeaderRow="1"
+    firstDataRow="1" firstDataCol="1"/><pivotFields count="2"><pivotField axis="axisRow" showAll="0"/>
+    <pivotField dataField="1" showAll="0"/></pivotFields><rowFields count="1"><field x="0"/></rowFields>
+    <dataFields count="1"><dataField name="Sum of Price" fld="1"/></dataFields></pivotTableDefinition>"""
+SPARKLINES = (b'<extLst><ext uri="{05C60535-1F16-4fd2-B633-F4F36F0B64E0}" '
+              b'xmlns:x14="http://schemas.microsoft.com/office/spreadsheetml/2009/9/main">'
+              b'<x14:sparklineGroups xmlns:xm="http://schemas.microsoft.com/office/excel/2006/main">'
+              b'<x14:sparklineGroup><x14:sparklines><x14:sparkline><xm:f>Sheet!B2:B6</xm:f>'
+              b'<xm:sqref>D2</xm:sqref></x14:sparkline></x14:sparklines></x14:sparklineGroup>'
+              b'</x14:sparklineGroups></ext></extLst>')
+
+
+def save(wb):
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def with_parts(data, pivot=False, sparklines=False):
+    """Add the parts openpyxl cannot write: a pivot table and a sparkline group."""
+    source, buffer = zipfile.ZipFile(io.BytesIO(data)), io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if sparklines and item.filename == 'xl/worksheets/sheet1.xml':
+                content = content.replace(b'</worksheet>', SPARKLINES + b'</worksheet>')
+            target.writestr(item, content)
+        if pivot:
+            target.writestr('xl/pivotTables/pivotTable1.xml', PIVOT_TABLE)
+    return buffer.getvalue()
+
+
+def complete_workbook():
+    """A workbook that meets every objective with an automatic check."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['Item', 'Price', 'Rate', 'Due'])
+    for i in range(1, 6):
+        ws.append([f'Item {i}', i * 10, f'=VLOOKUP(A{i + 1},A:B,2,FALSE)', f'=EOMONTH(TODAY(),{i})'])
+    ws['E2'] = '=IF(B2>20,"High",IF(B2>10,"Mid","Low"))'
+    ws['E3'] = '=SUMIFS(B:B,A:A,"Item 1")'
+    for validation, cells in ((DataValidation(type='list', formula1='"Q1,Q2,Q3,Q4"'), 'F2'),
+                              (DataValidation(type='whole', operator='between', formula1='0', formula2='100'),
+                               'B2:B6')):
+        ws.add_data_validation(validation)
+        validation.add(cells)
+    fill = PatternFill('solid', start_color='FFFF00')
+    ws.conditional_formatting.add('B2:B6', CellIsRule(operator='greaterThan', formula=['20'], fill=fill))
+    ws.conditional_formatting.add('A2:A6', FormulaRule(formula=['$B2>30'], fill=fill))
+    wb.add_named_style(NamedStyle(name='Highlight', font=Font(bold=True)))
+    for cell in ws['B'][1:]:
+        cell.number_format = '#,##0.00 "USD"'
+        cell.font = Font(bold=True)
+    ws.protection.sheet = True
+    ws.freeze_panes = 'A2'
+    chart = BarChart()
+    chart.add_data(Reference(ws, min_col=2, min_row=1, max_row=6), titles_from_data=True)
+    ws.add_chart(chart, 'H2')
+    return with_parts(save(wb), pivot=True, sparklines=True)
+
+
+def summary_csv(spec, change=None):
+    expected = autograde._expected(spec)
+    table = expected.rename_axis(spec['by']).reset_index()
+    if change is not None:
+        table = change(table)
+    return table.to_csv(index=False).encode()
+
+
+def verdicts(result):
+    return {objective: verdict for objective, verdict, _ in result['checks']}
+
+
+@pytest.mark.parametrize('exercise_id', WORKBOOK_EXERCISES)
+def test_complete_workbook_passes_every_check(exercise_id):
+    result = grade_submission(autograde._spec(exercise_id), complete_workbook(), 'solution.xlsx')
+    assert result['error'] is None
+    assert result['gradable'] == 4
+    assert result['passed'] == result['gradable'], result['checks']
+
+
+@pytest.mark.parametrize('exercise_id', WORKBOOK_EXERCISES)
+def test_blank_workbook_fails_every_check(exercise_id):
+    result = grade_submission(autograde._spec(exercise_id), save(openpyxl.Workbook()), 'blank.xlsx')
+    assert result['passed'] == 0 and result['gradable'] == 4
+
+
+def test_charts_and_pivot_tables_are_read_from_the_package():
+    wb = openpyxl.Workbook()
+    wb.active.append(['Item', 1])
+    plain = save(wb)
+    assert autograde._Workbook(plain).charts == 0 and autograde._Workbook(plain).pivots == []
+    found = autograde._Workbook(complete_workbook())
+    assert found.charts == 1
+    assert found.pivots == [(1, 0, 1)]
+    passed, detail = autograde._check_summary(autograde._Workbook(with_parts(plain, pivot=True)), None)
+    assert passed and detail == "1 pivot table(s)"
+
+
+def test_csv_is_not_a_workbook():
+    result = grade_submission(autograde._spec(WORKBOOK_EXERCISES[0]), b'a,b\n1,2\n', 'solution.csv')
+    assert result['error'] and result['checks'] == []
+
+
+@pytest.mark.parametrize('exercise_id', POWERBI_EXERCISES)
+def test_summary_table_verdicts(exercise_id):
+    spec = autograde._spec(exercise_id)
+    shape, values = [o for o, check in autograde.checks_for(spec['objectives'], table=True) if check]
+
+    result = grade_submission(spec, summary_csv(spec['grading']), 'summary.csv')
+    assert verdicts(result)[shape] == verdicts(result)[values] == 'pass'
+    assert result['passed'] == result['gradable'] == 2
+
+    def off_by_100(table):
+        table.iloc[0, 1] += 100
+        return table
+    result = grade_submission(spec, summary_csv(spec['grading'], off_by_100), 'summary.csv')
+    assert verdicts(result)[shape] == 'pass' and verdicts(result)[values] == 'fail'
+
+    total = grade_submission(spec, summary_csv(spec['grading'], lambda t: t.iloc[1:]), 'summary.csv')
+    assert verdicts(total)[shape] == 'fail'
+
+
+def test_queue_reuses_jobs_by_file_hash():
+    spec = autograde._spec(POWERBI_EXERCISES[0])
+    data = summary_csv(spec['grading'])
+    queue = GradingQueue(workers=1)
+    try:
+        job_id = queue.submit(POWERBI_EXERCISES[0], data, 'a.csv')
+        assert queue.submit(POWERBI_EXERCISES[0], data, 'renamed.csv') == job_id
+        assert queue.pending == 1 or queue.job(job_id).finished
+        job = queue.job(job_id)
+        deadline = time.monotonic() + 120
+        while not job.finished and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert job.state == 'done' and job.result['passed'] == 2
+        assert queue.submit(POWERBI_EXERCISES[0], data, 'again.csv') == job_id
+        assert queue.job(job_id) is job and queue.pending == 0
+        assert queue.submit(POWERBI_EXERCISES[1], data, 'a.csv') != job_id
+        with pytest.raises(GradingError):
+            queue.submit(POWERBI_EXERCISES[0], b'x' * (autograde.MAX_SUBMISSION_BYTES + 1), 'big.csv')
+    finally:
+        if queue._pool is not None:
+            queue._pool.shutdown(cancel_futures=True)
@@ -0,0 +1,31 @@
+from mastery.cache import ByteLRUCache
+
+
+def test_put_evicts_replaced_value():
+    evicted = []
+    cache = ByteLRUCache(100, on_evict=lambda key, value: evicted.append((key, value)))
+    cache.put('a', '/tmp/one')
+    cache.put('a', '/tmp/two')
+    assert evicted == [('a', '/tmp/one')]
+    assert cache.get('a') == '/tmp/two'
+
+
+def test_put_equal_value_is_not_an_eviction():
+    evicted = []
+    cache = ByteLRUCache(100, on_evict=lambda key, value: evicted.append((key, value)))
+    path = '/tmp/' + 'export.csv'
+    cache.put('a', path)
+    cache.put('a', ''.join(['/tmp/', 'export.csv']))  # equal, not identical
+    assert evicted == []
+    assert len(cache) == 1 and cache.nbytes == len(path)
+
+
+def test_budget_evicts_least_recently_used():
+    evicted = []
+    cache = ByteLRUCache(10, on_evict=lambda key, value: evicted.append(key))
+    cache.put('a', 'aaaa')
+    cache.put('b', 'bbbb')
+    cache.get('a')
+    cache.put('c', 'cccc')
+    assert evicted == ['b']
+    assert 'a' in cache and 'c' in cache
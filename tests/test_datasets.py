@@ -0,0 +1,40 @@
+import numpy as np
+
+from mastery.cache import frame_fingerprint
+from mastery.datasets import DATASETS, dataset_key, generate_dataset, get_dataset
+from mastery.downsample import series
+
+
+def test_generation_is_seeded():
+    for name in DATASETS:
+        a, b = generate_dataset(name, 1_000, 3), generate_dataset(name, 1_000, 3)
+        assert a.equals(b)
+        assert not a.equals(generate_dataset(name, 1_000, 4))
+
+
+def test_get_dataset_is_cached_and_fingerprinted():
+    df = get_dataset('Sales Data', 1_000, 5)
+    assert get_dataset('Sales Data', 1_000, 5) is df
+    assert frame_fingerprint(df) == dataset_key('Sales Data', 1_000, 5)
+    # A regenerated frame with the same contents shares the key
+    assert frame_fingerprint(generate_dataset('Sales Data', 1_000, 5)) == frame_fingerprint(df)
+
+
+def test_derived_frames_do_not_inherit_the_fingerprint():
+    df = get_dataset('Sales Data', 1_000, 5)
+    base = frame_fingerprint(df)
+    derived = [df.head(10), df[df['Sales'] > 2_500], df.sort_values('Sales'), df[['Date', 'Sales']]]
+    changed = df.copy()
+    changed['Sales'] = changed['Sales'] + 1
+    for frame in derived + [changed]:
+        assert frame_fingerprint(frame) != base
+    assert frame_fingerprint(df.copy()) == frame_fingerprint(df.copy())
+
+
+def test_derived_frames_get_their_own_cached_results():
+    df = get_dataset('Sales Data', 1_000, 5)
+    head = df.head(10)
+    assert len(series(df, 'Date', 'Sales')[0]) == 1_000
+    xs, ys = series(head, 'Date', 'Sales')
+    assert len(xs) == 10
+    np.testing.assert_array_equal(np.sort(ys), np.sort(head['Sales'].to_numpy()))
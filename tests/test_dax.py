@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mastery.dax import DaxError, evaluate_matrix
+from mastery.datasets import generate_dataset
+
+
+@pytest.fixture(scope='module')
+def sales():
+    return generate_dataset('Sales Data', 1_000, 3)
+
+
+def column(matrix):
+    return matrix.iloc[:, 0]
+
+
+def test_sum_matrix_matches_pandas(sales):
+    matrix = evaluate_matrix(sales, 'Total = SUM(Sales[Sales])', ['Region'], ['Product'])
+    expected = pd.pivot_table(sales, 'Sales', 'Region', 'Product', aggfunc='sum', margins=True,
+                              margins_name='Grand Total', observed=True)
+    np.testing.assert_allclose(matrix.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64))
+
+
+def test_calculate_all_and_divide(sales):
+    matrix = evaluate_matrix(
+        sales, 'Share = DIVIDE(SUM(Sales[Sales]), CALCULATE(SUM(Sales[Sales]), ALL(Sales[Region])))', ['Region'])
+    by_region = sales.groupby('Region', observed=True)['Sales'].sum()
+    np.testing.assert_allclose(column(matrix).iloc[:-1], (by_region / by_region.sum()).to_numpy())
+    assert column(matrix).iloc[-1] == pytest.approx(1.0)
+
+
+def test_calculate_predicate_replaces_the_filter(sales):
+    matrix = evaluate_matrix(sales, 'N = CALCULATE(COUNTROWS(Sales), Sales[Product] = "Product A")',
+                             ['Region'], filters=[('Product', ['Product B'])])
+    expected = sales[sales['Product'] == 'Product A'].groupby('Region', observed=True).size()
+    np.testing.assert_allclose(column(matrix).iloc[:-1], expected.to_numpy())
+
+
+def test_iterators_over_filter(sales):
+    matrix = evaluate_matrix(sales, 'X = SUMX(FILTER(Sales, Sales[Units] > 50), Sales[Sales] * 2)', ['Region'])
+    subset = sales[sales['Units'] > 50]
+    expected = subset.groupby('Region', observed=True)['Sales'].sum() * 2
+    np.testing.assert_allclose(column(matrix).iloc[:-1], expected.to_numpy())
+    assert column(matrix).iloc[-1] == pytest.approx(subset['Sales'].sum() * 2)
+
+
+def test_same_period_last_year(sales):
+    matrix = evaluate_matrix(sales, 'LY = CALCULATE(SUM(Sales[Sales]), SAMEPERIODLASTYEAR(Sales[Date]))',
+                             ['Date (Year)'])
+    by_year = sales.groupby(sales['Date'].dt.year)['Sales'].sum()
+    assert column(matrix).loc['2024'] == pytest.approx(by_year[2023])
+
+
+def test_measure_references_and_distinct_count(sales):
+    matrix = evaluate_matrix(sales, 'Avg = [Total] / COUNTROWS(Sales)', ['Product'],
+                             measures={'Total': 'SUM(Sales[Sales])'})
+    expected = sales.groupby('Product', observed=True)['Sales'].mean()
+    np.testing.assert_allclose(column(matrix).iloc[:-1], expected.to_numpy())
+    distinct = evaluate_matrix(sales, 'D = DISTINCTCOUNT(Sales[Customer_Rating])')
+    assert column(distinct).iloc[-1] == sales['Customer_Rating'].nunique()
+
+
+@pytest.mark.parametrize('measure', [
+    'SUM(Sales[Sales]', 'SUM(Sales[Nope])', 'NOSUCH(Sales[Sales])', 'SUM(Sales[Date])',
+    'X = SUMX(Sales, Sales[Region])', 'X = SUMX(Sales, Sales[Date])', 'X = ABS()', 'DIVIDE(1)',
+    'CALCULATE(SUM(Sales[Sales]), DATE(2024, 13, 1) = Sales[Date])',
+    'CALCULATE(SUM(Sales[Sales]), Sales[Region] > 5)',
+    'CALCULATE(SUM(Sales[Sales]), NOT Sales[Date])',
+])
+def test_invalid_measures(sales, measure):
+    with pytest.raises(DaxError):
+        evaluate_matrix(sales, measure, ['Region'])
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mastery.cache import set_frame_fingerprint
+from mastery.downsample import downsample, lttb, minmax
+
+
+def reference_lttb(x, y, points):
+    """LTTB one point at a time, over the same bucket edges."""
+    n = len(x)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    keep, a = [0], 0
+    for i in range(points - 2):
+        start, stop = edges[i], edges[i + 1]
+        if i + 1 < points - 2:
+            nxt = range(edges[i + 1], edges[i + 2])
+            cx, cy = np.mean([x[j] for j in nxt]), np.mean([y[j] for j in nxt])
+        else:
+            cx, cy = x[-1], y[-1]
+        areas = [abs((x[a] - cx) * (y[b] - y[a]) - (x[a] - x[b]) * (cy - y[a])) for b in range(start, stop)]
+        a = start + int(np.argmax(areas))
+        keep.append(a)
+    return keep + [n - 1]
+
+
+@pytest.mark.parametrize('n, points', [(1000, 100), (10_001, 800), (57, 10), (5, 3)])
+def test_lttb_keeps_endpoints_and_the_point_count(n, points):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    y = np.cumsum(rng.normal(size=n))
+    keep = lttb(x, y, points)
+    assert len(keep) == points
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+    assert list(keep) == reference_lttb(x, y, points)
+
+
+def test_lttb_returns_short_series_whole():
+    assert list(lttb(np.arange(5.0), np.ones(5), 10)) == [0, 1, 2, 3, 4]
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=10_000)
+    y[1234], y[8765] = 50, -50  # spikes LTTB-style averaging could smooth away
+    keep = minmax(y, 100)
+    buckets = pd.Series(y).groupby(np.arange(len(y)) // 100)
+    assert set(buckets.idxmin()) | set(buckets.idxmax()) | {0, len(y) - 1} == set(keep)
+    assert {1234, 8765} <= set(keep)
+    assert len(keep) <= 2 * 100 + 2
+
+
+def test_downsample_a_frame():
+    n = 50_000
+    rng = np.random.default_rng(3)
+    dates = pd.date_range('2023-01-01', periods=n, freq='min')
+    df = pd.DataFrame({'Date': dates[::-1], 'Value': rng.normal(size=n)})
+    df.loc[[10, 20], 'Value'] = np.nan
+    set_frame_fingerprint(df, 'test-downsample')
+    xs, ys, total = downsample(df, 'Date', 'Value', 'LTTB', 800)
+    assert total == n - 2 and len(xs) == 800
+    assert (np.diff(xs.view(np.int64)) > 0).all()  # sorted by x
+    assert xs[0] == dates[0] and xs[-1] == dates[-1]
+    xs, ys, _ = downsample(df, 'Date', 'Value', 'Min/Max', 800)
+    assert ys.max() == df['Value'].max() and ys.min() == df['Value'].min()
+    # A window shows its raw points, plus the neighbours just outside it
+    window = (dates[1000].to_datetime64(), dates[1099].to_datetime64())
+    xs, _, total = downsample(df, 'Date', 'Value', 'LTTB', 800, x_range=window)
+    assert total == len(xs) == 102
+    with pytest.raises(ValueError):
+        downsample(df, 'Date', 'Value', 'Median')
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from mastery import export
+from mastery.cache import ByteLRUCache
+from mastery.datasets import generate_dataset
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_DIR', str(tmp_path))
+    monkeypatch.setattr(export, '_cache', ByteLRUCache(1 << 30, sizeof=os.path.getsize,
+                                                       on_evict=export._remove))
+    return tmp_path
+
+
+def test_export_twice_keeps_the_file(export_dir):
+    df = generate_dataset('Sales Data', 1_000, 7)
+    path = export.export_dataset(df, 'CSV (gzip)')
+    assert export.export_dataset(df, 'CSV (gzip)') == path
+    assert os.path.exists(path)
+
+
+def test_reexport_of_a_stale_entry_keeps_the_new_file(export_dir):
+    df = generate_dataset('Sales Data', 1_000, 7)
+    path = export.export_dataset(df, 'CSV (gzip)')
+    os.remove(path)
+    assert export.cached_export(df, 'CSV (gzip)') is None
+    again = export.export_dataset(df, 'CSV (gzip)')
+    assert again == path
+    assert os.path.exists(again)
+
+
+def test_concurrent_export_of_the_same_frame_keeps_the_file(export_dir):
+    # A second session finishing the same export puts an equal, distinct path
+    df = generate_dataset('Sales Data', 1_000, 7)
+    path = export.export_dataset(df, 'Parquet')
+    export._cache.put(export.export_key(df, 'Parquet'), os.path.join(os.path.dirname(path), os.path.basename(path)))
+    assert os.path.exists(path)
+    assert export.cached_export(df, 'Parquet') == path
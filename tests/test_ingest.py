@@ -0,0 +1,94 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mastery import ingest
+from mastery.cache import ByteLRUCache, frame_fingerprint
+
+CSV = b"Date,Team,Score,Points\n2024-01-05,Red,3,1.5\n2024-02-06,Blue,4,2.25\n2025-03-01,Red,1,\n"
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, 'UPLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(ingest, '_files', ByteLRUCache(1 << 30, sizeof=os.path.getsize,
+                                                       on_evict=ingest._remove))
+    monkeypatch.setattr(ingest, '_frames', ByteLRUCache(1 << 30, sizeof=ingest.frame_nbytes))
+    return tmp_path
+
+
+def upload(data, name='scores.csv'):
+    file = io.BytesIO(data)
+    file.name = name
+    return file
+
+
+def test_csv_types_match_pandas(upload_dir):
+    df, source = ingest.load_upload(upload(CSV))
+    assert source == 'parsed'
+    expected = pd.read_csv(io.BytesIO(CSV), parse_dates=['Date'])
+    assert df['Score'].dtype == np.int8
+    assert df['Points'].dtype == np.float32
+    assert isinstance(df['Team'].dtype, pd.CategoricalDtype)
+    np.testing.assert_array_equal(df['Score'], expected['Score'])
+    np.testing.assert_allclose(df['Points'], expected['Points'])
+    assert list(df['Date']) == list(expected['Date'])
+    assert list(df['Team']) == list(expected['Team'])
+
+
+def test_same_content_is_reopened(upload_dir):
+    df, _ = ingest.load_upload(upload(CSV))
+    assert ingest.load_upload(upload(CSV, 'copy.csv')) == (df, 'memory')
+    ingest._frames.clear()
+    again, source = ingest.load_upload(upload(CSV))
+    assert source == 'disk'
+    assert frame_fingerprint(again) == frame_fingerprint(df)
+    assert frame_fingerprint(again.head(1)) != frame_fingerprint(df)
+
+
+def test_reconverting_a_missing_file_keeps_the_new_file(upload_dir):
+    df, _ = ingest.load_upload(upload(CSV))
+    digest = ingest.content_hash(upload(CSV))
+    path = ingest._files.get(digest)
+    os.remove(path)
+    ingest._frames.clear()
+    again, source = ingest.load_upload(upload(CSV))
+    assert source == 'parsed'
+    assert os.path.exists(path)
+    assert again.equals(df)
+
+
+def test_xlsx_matches_csv(upload_dir):
+    buffer = io.BytesIO()
+    pd.read_csv(io.BytesIO(CSV)).to_excel(buffer, index=False)
+    df, _ = ingest.load_upload(upload(buffer.getvalue(), 'scores.xlsx'))
+    assert list(df.columns) == ['Date', 'Team', 'Score', 'Points']
+    assert list(df['Score']) == [3, 4, 1]
+
+
+def test_unreadable_file(upload_dir):
+    with pytest.raises(ingest.UploadError):
+        ingest.load_upload(upload(b'not a workbook', 'broken.xlsx'))
+
+
+def test_integers_above_2_53_are_exact(upload_dir):
+    data = (b"id,with_gap,too_long,ratio\n"
+            b"9007199254740993,9007199254740995,99999999999999999999,0.1\n"
+            b"-9007199254740993,,1,0.123456789\n")
+    df, _ = ingest.load_upload(upload(data))
+    assert df['id'].dtype == np.int64
+    assert list(df['id']) == [2 ** 53 + 1, -(2 ** 53 + 1)]
+    # Neither an int64 with nulls nor a float64 holds these exactly, so they stay text
+    assert list(df['with_gap'])[0] == '9007199254740995'
+    assert list(df['too_long']) == ['99999999999999999999', '1']
+    assert df['ratio'].dtype == np.float64
+
+
+def test_float32_only_when_the_text_round_trips(upload_dir):
+    df, _ = ingest.load_upload(upload(b"a,b,c\n0.1,16777217.5,1e400\n2.5,1,2\n"))
+    assert df['a'].dtype == np.float32
+    assert df['b'].dtype == np.float64
+    assert list(df['c']) == ['1e400', '2']
@@ -0,0 +1,47 @@
+import socket
+
+from mastery import metrics as metrics_module
+from mastery.metrics import Histogram, Metrics
+
+
+def test_unsampled_runs_record_nothing():
+    metrics = Metrics(sample_rate=0.0)
+    assert not metrics.begin_run()
+    with metrics.span('section'):
+        pass
+    metrics.end_run(0.1)
+    assert metrics.snapshot() == {}
+
+
+def test_forced_run_records_spans_and_the_run():
+    metrics = Metrics()
+    metrics.begin_run(force=True)
+    with metrics.span('section'):
+        pass
+    metrics.end_run(0.25)
+    snapshot = metrics.snapshot()
+    assert snapshot['section']['count'] == 1 and snapshot['rerun']['count'] == 1
+    assert 'mastery_section_seconds_count{section="rerun"} 1' in metrics.to_prometheus()
+    assert not metrics.sampled
+
+
+def test_histogram_quantiles_are_bucket_upper_bounds():
+    h = Histogram()
+    for seconds in (0.001, 0.002, 0.004, 0.1):
+        h.observe(seconds)
+    assert 0.002 <= h.quantile(0.5) <= 0.002 * 1.1
+    assert 0.1 <= h.quantile(0.99) <= 0.1 * 1.1
+
+
+def test_exporter_port_in_use_does_not_fail_startup(monkeypatch, caplog):
+    with socket.socket() as taken:
+        taken.bind(('127.0.0.1', 0))
+        taken.listen()
+        monkeypatch.setenv('MASTERY_METRICS_PORT', str(taken.getsockname()[1]))
+        metrics_module.get_metrics.cache_clear()
+        try:
+            metrics = metrics_module.get_metrics()
+        finally:
+            metrics_module.get_metrics.cache_clear()
+    assert metrics._server is None
+    assert 'Metrics exporter not started' in caplog.text
@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mastery import panels
+from mastery.panels import PanelBatch
+
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    pool = ThreadPoolExecutor(1)
+    monkeypatch.setattr(panels, '_executor', pool)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_results_come_back_in_submission_order():
+    batch = PanelBatch()
+    batch.submit('b', lambda x: x * 2, 2)
+    batch.submit('a', sorted, [3, 1, 2])
+    assert list(batch.collect().items()) == [('b', 4), ('a', [1, 2, 3])]
+
+
+def test_late_panels_fall_back_and_queued_ones_are_cancelled(one_worker):
+    release = threading.Event()
+    ran = []
+    batch = PanelBatch(timeout=0.05)
+    batch.submit('slow', release.wait, 5, fallback='pending')
+    batch.submit('queued', ran.append, 'queued', fallback='pending')
+    future = batch._panels[1].future
+    results = batch.collect()
+    release.set()
+    assert results == {'slow': 'pending', 'queued': 'pending'}
+    assert batch.timed_out == ['slow', 'queued']
+    assert future.cancelled()
+    one_worker.shutdown(wait=True)
+    assert ran == []
+
+
+def test_exceptions_are_reraised():
+    batch = PanelBatch()
+    batch.submit('broken', lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        batch.collect()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mastery.datasets import generate_dataset
+from mastery.pivot import PivotError, field_items, pivot_fields, pivot_table, value_fields
+
+
+@pytest.fixture(scope='module')
+def sales():
+    return generate_dataset('Sales Data', 1_000, 3)
+
+
+def test_fields(sales):
+    assert pivot_fields(sales)[:3] == ['Date (Year)', 'Date (Quarter)', 'Date (Month)']
+    assert {'Product', 'Region'} <= set(pivot_fields(sales))
+    assert {'Sales', 'Units'} <= set(value_fields(sales))
+    assert field_items(sales, 'Region') == ['North', 'South', 'East', 'West']
+
+
+@pytest.mark.parametrize('agg, aggfunc', [('Sum', 'sum'), ('Average', 'mean'), ('Count', 'count'),
+                                          ('Min', 'min'), ('Max', 'max')])
+def test_grid_and_totals_match_pandas(sales, agg, aggfunc):
+    table = pivot_table(sales, ['Region'], ['Product'], [('Sales', agg)])
+    expected = pd.pivot_table(sales, 'Sales', 'Region', 'Product', aggfunc=aggfunc, margins=True,
+                              margins_name='Grand Total', observed=True)
+    assert list(table.index) == list(expected.index.astype(str))
+    assert list(table.columns) == list(expected.columns.astype(str))
+    np.testing.assert_allclose(table.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64))
+
+
+def test_subtotals_and_filters_match_pandas(sales):
+    kept = ['Product A', 'Product B']
+    table = pivot_table(sales, ['Region', 'Product'], [], [('Units', 'Average')], [('Product', kept)])
+    subset = sales[sales['Product'].isin(kept)]
+    by_pair = subset.groupby(['Region', 'Product'], observed=True)['Units'].mean()
+    by_region = subset.groupby('Region', observed=True)['Units'].mean()
+    column = table.columns[0]
+    for (region, product), value in by_pair.items():
+        assert table.loc[(region, product), column] == pytest.approx(value)
+    for region, value in by_region.items():
+        assert table.loc[(f'{region} Total', ''), column] == pytest.approx(value)
+    assert table.iloc[-1, 0] == pytest.approx(subset['Units'].mean())
+    assert not any(product in ('Product C', 'Product D') for _, product in table.index)
+
+
+def test_date_parts_match_pandas(sales):
+    table = pivot_table(sales, ['Date (Year)'], [], [('Sales', 'Sum')])
+    expected = sales.groupby(sales['Date'].dt.year)['Sales'].sum()
+    assert [int(year) for year in table.index[:-1]] == expected.index.tolist()
+    np.testing.assert_allclose(table.iloc[:-1, 0], expected.to_numpy())
+
+
+def test_invalid_layouts(sales):
+    with pytest.raises(PivotError):
+        pivot_table(sales, ['Nope'], [], [('Sales', 'Sum')])
+    with pytest.raises(PivotError):
+        pivot_table(sales, ['Region'], ['Region'], [('Sales', 'Sum')])
+    with pytest.raises(PivotError):
+        pivot_table(sales, ['Region'], [], [('Sales', 'Median')])
@@ -0,0 +1,33 @@
+import pytest
+
+from mastery.planner import PrerequisiteGraph, get_prerequisite_graph
+
+
+def test_topological_order_and_ancestors():
+    graph = PrerequisiteGraph({'a': [], 'b': ['a'], 'c': ['b'], 'd': ['a']})
+    assert [graph.keys[i] for i in graph.order] == ['a', 'b', 'c', 'd']
+    assert graph.depends_on('c', 'a') and not graph.depends_on('d', 'b')
+    assert graph.missing_prerequisites('c', graph.bits(['a'])) == ['b']
+
+
+def test_completing_modules_unlocks_dependents():
+    path = PrerequisiteGraph({'a': [], 'b': ['a'], 'c': ['a', 'b']}).path()
+    assert path.next_modules() == ['a']
+    path.complete('a')
+    assert path.next_modules() == ['b']
+    path.complete('b')
+    assert path.next_modules() == ['c']
+    path.complete('c')
+    assert path.next_modules() == []
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError, match='cycle'):
+        PrerequisiteGraph({'a': ['b'], 'b': ['a']})
+
+
+def test_prerequisites_without_content_do_not_lock_the_catalog():
+    graph = get_prerequisite_graph()
+    path = graph.path(['excel_basics', 'excel_formulas'])
+    assert path.next_modules(limit=1) == ['data_analysis']
+    assert path.missing_prerequisites('data_analysis') == []
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mastery.datasets import generate_dataset
+from mastery.profiler import QUANTILES, TOP_K, HyperLogLog, profile_dataset, profile_frame
+
+
+@pytest.fixture(scope='module')
+def frame():
+    df = generate_dataset('Supply Chain', 5_000, 1)
+    # A float column with nulls
+    return df.assign(Gap=np.where(np.arange(len(df)) % 7 == 0, np.nan, df['Unit_Cost']))
+
+
+def by_name(profile):
+    return {c.name: c for c in profile.columns}
+
+
+def test_exact_statistics_match_pandas(frame):
+    columns = by_name(profile_frame(frame, chunk_rows=1_000))
+    for name in ('Order_Qty', 'Unit_Cost', 'Gap'):
+        c, values = columns[name], frame[name]
+        assert c.nulls == values.isna().sum()
+        assert c.min == values.min() and c.max == values.max()
+        assert c.mean == pytest.approx(values.astype(np.float64).mean())
+    assert columns['Order_Date'].min == frame['Order_Date'].min()
+    assert columns['On_Time'].mean == pytest.approx(frame['On_Time'].mean())
+
+
+def test_exact_counts_match_pandas(frame):
+    columns = by_name(profile_frame(frame, chunk_rows=1_000))
+    for name in ('Supplier', 'Warehouse', 'Order_Qty', 'On_Time'):
+        c = columns[name]
+        counts = frame[name].value_counts()
+        assert c.distinct_exact and c.top_exact
+        assert c.distinct == frame[name].nunique()
+        assert [count for _, count in c.top] == counts.head(TOP_K).tolist()
+        assert all(counts[value] == count for value, count in c.top)
+
+
+def test_sketched_distinct_count_is_close(frame):
+    c = by_name(profile_frame(frame))['Unit_Cost']
+    assert not c.distinct_exact
+    assert c.distinct == pytest.approx(frame['Unit_Cost'].nunique(), rel=0.05)
+    hll = HyperLogLog()
+    hll.add_hashes(pd.util.hash_array(np.arange(100_000)))
+    assert hll.estimate() == pytest.approx(100_000, rel=0.03)
+
+
+def test_quantiles_are_exact_when_every_row_is_sampled(frame):
+    profile = profile_frame(frame, sample_rows=len(frame))
+    assert not profile.sampled
+    for name in ('Order_Qty', 'Gap'):
+        expected = frame[name].astype(np.float64).quantile(QUANTILES).tolist()
+        assert list(by_name(profile)[name].quantiles) == pytest.approx(expected)
+
+
+def test_sampled_profile_reports_it(frame):
+    profile = profile_frame(frame, sample_rows=500)
+    assert profile.sampled and profile.sample_rows == 500
+    assert list(profile.to_frame().index) == list(frame.columns)
+
+
+def test_profile_dataset_is_cached(frame):
+    df = generate_dataset('Sales Data', 1_000, 2)
+    assert profile_dataset(df) is profile_dataset(df)
@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+from mastery.search import B, K1, SearchIndex, get_search_index, tokenize
+
+DOCS = [
+    ('a', 'Lesson', 'm1', 'Pivot tables', 'Pivot tables summarize data; a pivot groups rows.'),
+    ('b', 'Lesson', 'm1', 'Lookups', 'VLOOKUP and XLOOKUP find values in tables.'),
+    ('c', 'Quiz', 'm2', 'Charts', 'Charts show trends over time with lines and bars.'),
+    ('d', 'Exercise', 'm2', 'Pivot charts', 'A pivot chart plots a pivot table summary.'),
+]
+
+
+def bm25(query):
+    """Scores of every document from the BM25 formula, term by term."""
+    tokens = [tokenize(doc[4]) for doc in DOCS]
+    average = sum(map(len, tokens)) / len(tokens)
+    scores = []
+    for words in tokens:
+        score = 0.0
+        for term in tokenize(query):
+            tf = words.count(term)
+            df = sum(term in other for other in tokens)
+            idf = math.log(1 + (len(DOCS) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * len(words) / average))
+        scores.append(score)
+    return scores
+
+
+def test_tokenize():
+    assert tokenize("SUMIFS(B:B, \"N\") — 2024's Q1!") == ['sumifs', 'b', 'b', 'n', '2024', 's', 'q1']
+    assert tokenize('  ') == []
+
+
+@pytest.mark.parametrize('query', ['pivot', 'pivot table', 'charts tables', 'xlookup values'])
+def test_ranking_matches_bm25(query):
+    index = SearchIndex(DOCS)
+    expected = bm25(query)
+    hits = index.search(query, prefix=False)
+    ranked = sorted((i for i, s in enumerate(expected) if s > 0), key=lambda i: (-expected[i], i))
+    assert [hit.doc_id for hit in hits] == [DOCS[i][0] for i in ranked]
+    for hit in hits:
+        assert hit.score == pytest.approx(expected['abcd'.index(hit.doc_id)], rel=1e-5)
+
+
+def test_last_term_matches_as_a_prefix():
+    index = SearchIndex(DOCS)
+    assert index.search('piv', prefix=False) == []
+    assert {hit.doc_id for hit in index.search('piv')} == {'a', 'd'}
+    # Only the last term is expanded
+    assert [hit.doc_id for hit in index.search('piv chart')] == ['d', 'c']
+    assert index.search('', limit=3) == []
+
+
+def test_limit_keeps_the_best_hits():
+    index = SearchIndex(DOCS)
+    every = index.search('pivot tables charts lines', limit=10)
+    assert [hit.doc_id for hit in index.search('pivot tables charts lines', limit=2)] == \
+        [hit.doc_id for hit in every[:2]]
+
+
+def test_curriculum_index_covers_every_kind():
+    index = get_search_index()
+    hits = index.search('vlookup')
+    assert hits and 'vlookup' in tokenize(hits[0].title + ' ' + hits[0].snippet)
+    assert {hit.kind for hit in index.search('formula', limit=len(index))} == {
+        'Lesson', 'Exercise', 'Quiz', 'Case Study'}
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mastery.sheet import CYCLE, FormulaError, Sheet, example_sheet
+
+
+def summary(sheet):
+    return [sheet.value(f'H{row}') for row in range(1, 6)]
+
+
+def test_example_values():
+    sheet = example_sheet()
+    assert sheet.value('E2') == 12 * 950
+    assert summary(sheet) == [12 * 950 + 45 * 35 + 18 * 205, 20, 210, 'North', 'Laptop']
+
+
+def test_edits_propagate_to_dependents_only():
+    sheet = example_sheet()
+    computed = sheet.set('C2', 40)
+    assert summary(sheet) == [40 * 950 + 45 * 35 + 18 * 205, 48, 210, 'North', 'Laptop']
+    # E2, then H1, H2, H3 and H5; the other revenue formulas and H4 do not read C2
+    assert computed == sheet.last_recalc[0] == 5
+    sheet.set('D6', 3_000)
+    assert sheet.value('H5') == 'Monitor'
+    assert sheet.value('H3') == 210  # VLOOKUP finds the first Monitor
+
+
+def test_cycles_evaluate_to_an_error_and_recover():
+    sheet = example_sheet()
+    sheet.set_many({'J1': '=K1+1', 'K1': '=J1*2', 'L1': '=J1'})
+    assert sheet.value('J1') is CYCLE and sheet.value('K1') is CYCLE
+    assert sheet.value('L1') is CYCLE
+    sheet.set('K1', 4)
+    assert sheet.value('J1') == 5 and sheet.value('L1') == 5
+
+
+def test_whole_column_ranges_see_new_rows():
+    sheet = example_sheet()
+    sheet.set_many({'A7': 'Laptop', 'C7': 5})
+    assert sheet.value('H2') == 25
+    sheet.set('A7', 'Mouse')
+    assert sheet.value('H2') == 20
+
+
+def test_lookup_follows_a_formula_value_that_changes():
+    sheet = example_sheet()
+    sheet.set('I1', '=XLOOKUP(20000, E2:E6, A2:A6, "none")')
+    assert sheet.value('I1') == 'none'
+    sheet.set('C3', 20_000 / 210)
+    assert sheet.value('E3') == pytest.approx(20_000)
+    sheet.set('C3', 100)
+    sheet.set('D3', 200)
+    assert sheet.value('I1') == 'Monitor'
+    sheet.set('D3', 210)
+    assert sheet.value('I1') == 'none'
+
+
+def test_unbalanced_parentheses_raise_and_leave_the_sheet_unchanged():
+    sheet = example_sheet()
+    with pytest.raises(FormulaError):
+        sheet.set_many({'C2': 99, 'J1': '=SUM(A1:A3'})
+    with pytest.raises(FormulaError):
+        sheet.set('J1', '=(C2+1))')
+    assert sheet.value('C2') == 12 and sheet.value('J1') is None
+
+
+def test_aggregates_match_pandas():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'value': rng.integers(-50, 50, 200), 'region': rng.choice(['N', 'S', 'E'], 200)})
+    sheet = Sheet()
+    sheet.set_many({**{f'A{i + 1}': v for i, v in enumerate(frame['value'].tolist())},
+                    **{f'B{i + 1}': v for i, v in enumerate(frame['region'].tolist())},
+                    'D1': '=SUM(A:A)', 'D2': '=AVERAGE(A1:A200)', 'D3': '=SUMIFS(A:A, B:B, "N")',
+                    'D4': '=COUNTIFS(A:A, ">0", B:B, "S")', 'D5': '=MAX(A:A)-MIN(A:A)'})
+    north, south = frame[frame['region'] == 'N'], frame[frame['region'] == 'S']
+    assert sheet.value('D1') == frame['value'].sum()
+    assert sheet.value('D2') == pytest.approx(frame['value'].mean())
+    assert sheet.value('D3') == north['value'].sum()
+    assert sheet.value('D4') == (south['value'] > 0).sum()
+    assert sheet.value('D5') == frame['value'].max() - frame['value'].min()
+
+
+@pytest.mark.parametrize('formula, expected', [
+    ('=ROUND(2.5)', 3), ('=ROUND(-0.5)', -1), ('=ROUND(0.5)', 1), ('=ROUND(-2.5)', -3),
+    ('=ROUND(2.675, 2)', 2.68), ('=ROUND(1250, -2)', 1300), ('=ROUND(-0.4)', 0),
+])
+def test_round_halves_away_from_zero(formula, expected):
+    sheet = Sheet()
+    sheet.set('A1', formula)
+    assert sheet.value('A1') == expected
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from mastery.srs import DAY, MIN_EASE, START_EASE, ReviewScheduler
+
+T0 = 1_700_000_000
+
+
+def sm2(grades):
+    """Textbook SM-2: ``(ease, interval in days, repetitions)`` after each grade."""
+    ease, interval, reps, states = START_EASE, 0, 0, []
+    for grade in grades:
+        if grade < 3:
+            reps, interval = 0, 1
+        else:
+            interval = 1 if reps == 0 else 6 if reps == 1 else int(np.ceil(interval * ease))
+            reps += 1
+        ease = max(MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+        states.append((ease, interval, reps))
+    return states
+
+
+@pytest.mark.parametrize('grades', [[5, 5, 5, 5], [4, 3, 5, 2, 4, 4], [0, 1, 2, 0, 1], [3] * 8])
+def test_intervals_and_ease_follow_sm2(grades):
+    scheduler = ReviewScheduler()
+    now = T0
+    for grade, (ease, interval, reps) in zip(grades, sm2(grades)):
+        due = scheduler.review('card', grade, now=now)
+        assert due == now + interval * DAY
+        assert scheduler.ease[0] == pytest.approx(ease, abs=1e-5)
+        assert scheduler.interval[0] == interval and scheduler.reps[0] == reps
+        now = due
+
+
+def test_ease_never_drops_below_the_floor():
+    scheduler = ReviewScheduler()
+    for _ in range(10):
+        scheduler.review('card', 0, now=T0)
+    assert scheduler.ease[0] == pytest.approx(MIN_EASE)
+
+
+def test_due_cards_come_most_overdue_first():
+    scheduler = ReviewScheduler(capacity=2)  # grows past its initial arrays
+    for i, grade in enumerate([5, 2, 4, 0, 5]):
+        scheduler.review(f'card{i}', grade, now=T0 + i * 3600)
+    assert scheduler.due_now(now=T0) == []
+    later = T0 + 2 * DAY
+    due = scheduler.due_now(now=later)
+    order = sorted(range(5), key=lambda i: (scheduler.due[i], i))
+    assert due == [f'card{i}' for i in order]
+    assert scheduler.due_now(now=later, limit=2) == due[:2]
+    assert scheduler.due_count(now=later) == 5
+    # A rescheduled card leaves a stale heap entry behind, which must not resurface
+    scheduler.review('card0', 5, now=later)
+    assert scheduler.due_now(now=later) == [key for key in due if key != 'card0']
+    assert 'card0' not in scheduler.due_now(now=later + DAY)
+
+
+def test_round_trip_keeps_the_schedule():
+    scheduler = ReviewScheduler()
+    rng = np.random.default_rng(1)
+    for i in range(40):
+        scheduler.review(f'card{i % 13}', int(rng.integers(0, 6)), now=T0 + i * 600)
+    restored = ReviewScheduler.from_dict(scheduler.to_dict())
+    for now in (T0, T0 + DAY, T0 + 10 * DAY):
+        assert restored.due_now(now=now) == scheduler.due_now(now=now)
+        assert restored.due_count(now=now) == scheduler.due_count(now=now)
@@ -0,0 +1,64 @@
+import sqlite3
+import time
+
+import pytest
+
+from mastery.store import ProgressStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'progress.db')
+
+
+def stored_rows(path):
+    with sqlite3.connect(path) as conn:
+        return dict(((learner, field), value) for learner, field, value in
+                    conn.execute('SELECT learner, field, value FROM learner_state'))
+
+
+def test_saves_coalesce_into_one_write_per_field(path):
+    store = ProgressStore(path, flush_interval=3600)  # flushed by hand below
+    try:
+        for percent in (10, 20, 30):
+            store.save('ada', 'user_progress', {'excel_basics': percent})
+        store.save('ada', 'user_skill_level', 'Advanced')
+        store.save('bo', 'user_progress', {'excel_basics': 5})
+        # Unflushed saves are visible to load() and kept per learner
+        assert store.load('ada') == {'user_progress': {'excel_basics': 30}, 'user_skill_level': 'Advanced'}
+        assert store.load('bo') == {'user_progress': {'excel_basics': 5}}
+        assert stored_rows(path) == {}
+        assert store.flush() == 3
+        assert store.stats() == {'pending': 0, 'writes_requested': 5, 'writes_flushed': 3, 'flushes': 1}
+        assert stored_rows(path)[('ada', 'user_progress')] == '{"excel_basics":30}'
+        assert store.flush() == 0
+    finally:
+        store.close()
+
+
+def test_saves_survive_a_flush_and_a_close(path):
+    store = ProgressStore(path, flush_interval=3600)
+    store.save('ada', 'user_progress', {'excel_basics': 40})
+    store.flush()
+    store.save('ada', 'user_progress', {'excel_basics': 50})
+    store.save('ada', 'quizzes_passed', ['excel_basics'])
+    store.close()  # flushes what is still pending
+    store.close()
+    reopened = ProgressStore(path, flush_interval=3600)
+    try:
+        assert reopened.load('ada') == {'user_progress': {'excel_basics': 50}, 'quizzes_passed': ['excel_basics']}
+        assert reopened.load('nobody') == {}
+    finally:
+        reopened.close()
+
+
+def test_background_writer_flushes(path):
+    store = ProgressStore(path, flush_interval=0.01, max_batch=1)
+    try:
+        store.save('ada', 'user_skill_level', 'Beginner')
+        deadline = time.monotonic() + 5
+        while not stored_rows(path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert stored_rows(path) == {('ada', 'user_skill_level'): '"Beginner"'}
+    finally:
+        store.close()